@@ -0,0 +1,331 @@
+"""
+Alpha Vantage Stand-in Server for FIN-SIGHT
+Serves recorded or synthetic TIME_SERIES_* responses for offline benchmarking
+
+Run with:
+    python alpha_vantage_stub.py --port 8765 --latency-ms 50 --note-rate 0.1
+and point the collector at it:
+    ALPHA_VANTAGE_BASE_URL=http://127.0.0.1:8765/query streamlit run app.py
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import pandas as pd
+
+# Bars returned for outputsize='compact'
+COMPACT_SIZE = 100
+
+# Synthetic history lengths for outputsize='full'
+FULL_DAILY_BARS = 20 * 252
+FULL_WEEKLY_BARS = 20 * 52
+FULL_INTRADAY_DAYS = 30
+
+# Alpha Vantage intraday sessions include extended hours (04:00-20:00)
+SESSION_START_HOUR = 4
+SESSION_MINUTES = 16 * 60
+
+# Alpha Vantage's outputsize when a request sends none
+DEFAULT_OUTPUTSIZE = 'compact'
+
+# Functions that always return the full history and ignore outputsize
+FULL_HISTORY_FUNCTIONS = {'TIME_SERIES_WEEKLY'}
+
+# Response bodies kept per stub instance
+RESPONSE_CACHE_SIZE = 4096
+
+RATE_LIMIT_NOTE = (
+    "Thank you for using Alpha Vantage! Our standard API call frequency is "
+    "5 calls per minute and 500 calls per day."
+)
+
+SERIES_KEYS = {
+    'TIME_SERIES_DAILY': 'Time Series (Daily)',
+    'TIME_SERIES_WEEKLY': 'Time Series (Weekly)',
+}
+
+
+def synthetic_time_series(periods, end='2024-06-28', freq='B', seed=0):
+    """
+    Build an Alpha Vantage style 'Time Series (...)' dict, newest first
+
+    Args:
+        periods: Number of bars
+        end: Timestamp of the newest bar
+        freq: Bar frequency ('B' for daily, 'W-FRI' for weekly, '60min', ...)
+        seed: Random seed
+    """
+    rng = np.random.default_rng(seed)
+    if freq in ('B', 'D', 'W-FRI'):
+        index = pd.date_range(end=end, periods=periods, freq=freq)
+        fmt = '%Y-%m-%d'
+    else:
+        # Intraday bars only inside weekday extended-hours sessions
+        minutes = int(pd.Timedelta(freq).total_seconds() // 60)
+        per_day = SESSION_MINUTES // minutes
+        days = pd.bdate_range(end=pd.Timestamp(end).normalize(), periods=-(-periods // per_day))
+        offsets = pd.to_timedelta(SESSION_START_HOUR * 60 + np.arange(per_day) * minutes, unit='min')
+        index = pd.DatetimeIndex((days.values[:, None] + offsets.values[None, :]).ravel())[-periods:]
+        fmt = '%Y-%m-%d %H:%M:%S'
+
+    close = np.maximum(1.0, 100 + np.cumsum(rng.normal(0, 1, periods)))
+    volume = rng.lognormal(15, 0.5, periods).astype(np.int64)
+    # Occasional volume spikes so detection has something to find
+    spikes = rng.random(periods) < 0.01
+    volume[spikes] *= rng.integers(4, 10, spikes.sum())
+
+    labels = index.strftime(fmt)
+    series = {}
+    for i in range(periods - 1, -1, -1):
+        series[labels[i]] = {
+            '1. open': f'{close[i] - 0.5:.4f}',
+            '2. high': f'{close[i] + 1:.4f}',
+            '3. low': f'{close[i] - 1:.4f}',
+            '4. close': f'{close[i]:.4f}',
+            '5. volume': str(volume[i]),
+        }
+    return series
+
+
+def recording_name(params):
+    """File name under which a response for these query parameters is stored"""
+    parts = [params.get('function', ''), params.get('symbol', '')]
+    if params.get('interval'):
+        parts.append(params['interval'])
+    if parts[0] not in FULL_HISTORY_FUNCTIONS:
+        parts.append(params.get('outputsize', DEFAULT_OUTPUTSIZE))
+    return '_'.join(part.replace('/', '-') for part in parts) + '.json'
+
+
+def record_responses(collector, symbols, functions=('TIME_SERIES_DAILY',), record_dir='recordings',
+                     interval='60min', outputsize='full'):
+    """
+    Save live API responses so the stand-in can replay them later
+
+    Args:
+        collector: StockDataCollector configured with a real API key
+        symbols: Ticker symbols to record
+        functions: Alpha Vantage functions to record
+        record_dir: Directory to write JSON files into
+        interval: Interval used for TIME_SERIES_INTRADAY
+        outputsize: 'compact' or 'full'
+    """
+    os.makedirs(record_dir, exist_ok=True)
+    written = []
+    for symbol in symbols:
+        for function in functions:
+            params = {'function': function, 'symbol': symbol}
+            if function not in FULL_HISTORY_FUNCTIONS:
+                params['outputsize'] = outputsize
+            if function == 'TIME_SERIES_INTRADAY':
+                params['interval'] = interval
+            data = collector.transport.get_json(
+                collector.base_url, dict(params, apikey=collector.api_key)
+            )
+            path = os.path.join(record_dir, recording_name(params))
+            with open(path, 'w') as f:
+                json.dump(data, f)
+            written.append(path)
+    return written
+
+
+class AlphaVantageStub:
+    """
+    Local HTTP server that imitates the Alpha Vantage query endpoint
+
+    Responses come from `record_dir` when a matching recording exists and
+    are generated deterministically per symbol otherwise. Latency, rate-limit
+    notes, error payloads and HTTP failures can be injected.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0, jitter_ms=0, note_rate=0.0,
+                 error_rate=0.0, http_error_rate=0.0, invalid_symbols=(), record_dir=None,
+                 end='2024-06-28', seed=0):
+        """
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            latency_ms: Fixed delay added to every response
+            jitter_ms: Extra uniformly random delay up to this many milliseconds
+            note_rate: Probability of answering with a rate-limit 'Note'
+            error_rate: Probability of answering with an 'Error Message'
+            http_error_rate: Probability of answering with HTTP 503
+            invalid_symbols: Symbols that always get an 'Error Message'
+            record_dir: Directory of recorded responses to replay
+            end: Date of the newest synthetic bar
+            seed: Seed for injected faults and synthetic data
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.note_rate = note_rate
+        self.error_rate = error_rate
+        self.http_error_rate = http_error_rate
+        self.invalid_symbols = set(invalid_symbols)
+        self.record_dir = record_dir
+        self.end = end
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_count = 0
+        # Per-instance cache so the stub's bodies are freed with the stub
+        self._cached_body = lru_cache(maxsize=RESPONSE_CACHE_SIZE)(self._build_response_body)
+        self.thread = None
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        """Base URL to hand to StockDataCollector"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/query"
+
+    def start(self):
+        """Serve requests on a background thread"""
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Shut the server down"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def warm(self, symbols, function='TIME_SERIES_DAILY', interval=None, outputsize='full'):
+        """Pre-build responses so generation time stays out of measurements"""
+        for symbol in symbols:
+            self._response_body(function, symbol, interval, outputsize)
+
+    def _roll(self):
+        with self.lock:
+            self.request_count += 1
+            return self.random.random(), self.random.random()
+
+    def _handle(self, request):
+        params = {key: values[0] for key, values in parse_qs(urlparse(request.path).query).items()}
+        fault, jitter = self._roll()
+
+        delay = self.latency_ms + jitter * self.jitter_ms
+        if delay:
+            time.sleep(delay / 1000.0)
+
+        status, body = 200, None
+        if fault < self.http_error_rate:
+            status, body = 503, b'{}'
+        elif fault < self.http_error_rate + self.note_rate:
+            body = json.dumps({'Note': RATE_LIMIT_NOTE}).encode()
+        elif (fault < self.http_error_rate + self.note_rate + self.error_rate
+              or params.get('symbol') in self.invalid_symbols):
+            body = json.dumps({
+                'Error Message': 'Invalid API call. Please retry or visit the documentation.'
+            }).encode()
+        else:
+            body = self._response_body(
+                params.get('function', ''), params.get('symbol', ''),
+                params.get('interval'), params.get('outputsize', DEFAULT_OUTPUTSIZE)
+            )
+
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def _response_body(self, function, symbol, interval, outputsize):
+        if function in FULL_HISTORY_FUNCTIONS:
+            outputsize = 'full'
+        return self._cached_body(function, symbol, interval, outputsize)
+
+    def _build_response_body(self, function, symbol, interval, outputsize):
+        params = {'function': function, 'symbol': symbol, 'outputsize': outputsize}
+        if interval:
+            params['interval'] = interval
+
+        if self.record_dir:
+            path = os.path.join(self.record_dir, recording_name(params))
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    return f.read()
+
+        return json.dumps(self._synthetic_response(function, symbol, interval, outputsize)).encode()
+
+    def _synthetic_response(self, function, symbol, interval, outputsize):
+        seed = zlib.crc32(symbol.encode()) ^ self.seed
+        compact = outputsize != 'full'
+        if function == 'TIME_SERIES_DAILY':
+            series = synthetic_time_series(COMPACT_SIZE if compact else FULL_DAILY_BARS,
+                                           self.end, 'B', seed)
+        elif function == 'TIME_SERIES_WEEKLY':
+            series = synthetic_time_series(FULL_WEEKLY_BARS, self.end, 'W-FRI', seed)
+        elif function == 'TIME_SERIES_INTRADAY':
+            try:
+                minutes = int(interval.replace('min', ''))
+            except (AttributeError, ValueError):
+                return {'Error Message': 'Invalid API call. Please retry or visit the documentation.'}
+            periods = FULL_INTRADAY_DAYS * SESSION_MINUTES // minutes
+            end = pd.Timestamp(self.end) + pd.Timedelta(minutes=SESSION_START_HOUR * 60 + SESSION_MINUTES - minutes)
+            series = synthetic_time_series(COMPACT_SIZE if compact else periods, end, interval, seed)
+        else:
+            return {'Error Message': 'Invalid API call. Please retry or visit the documentation.'}
+
+        key = SERIES_KEYS.get(function, f'Time Series ({interval})')
+        return {
+            'Meta Data': {
+                '1. Information': f'{function} (synthetic)',
+                '2. Symbol': symbol,
+                '3. Last Refreshed': next(iter(series)),
+            },
+            key: series,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Alpha Vantage stand-in server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--note-rate', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--http-error-rate', type=float, default=0.0)
+    parser.add_argument('--record-dir', default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    stub = AlphaVantageStub(
+        host=args.host, port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        note_rate=args.note_rate, error_rate=args.error_rate,
+        http_error_rate=args.http_error_rate, record_dir=args.record_dir, seed=args.seed
+    )
+    print(f"Serving Alpha Vantage stand-in at {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,34 +3,266 @@ Anomaly Detection Module for FIN-SIGHT
 Detects statistically unusual trading activity
 """
 
+import threading
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from baselines import VolumeProfile, make_moments, median_mad
+
+# Default sweep grid, matching the Z-Score and Pre-Event Window sliders
+SWEEP_Z_SCORES = (2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0)
+SWEEP_WINDOWS = (1, 2, 3, 4, 5, 6, 7)
+
+# Columns added by AnomalyResult.to_frame()
+RESULT_COLUMNS = ['Is_Anomaly', 'Event_Day', 'Event_Type', 'Anomaly_Score', 'Z_Score']
+
+# Seasonal volume profiles kept across detectors, one per (symbol, by_weekday)
+PROFILE_CACHE_SIZE = 64
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+def _bar_interval(index):
+    """Bar spacing of an index (smallest gap among its first bars), in ns"""
+    gaps = np.diff(index[:64].values.astype('datetime64[ns]').view(np.int64))
+    gaps = gaps[gaps > 0]
+    return int(gaps.min()) if len(gaps) else 0
+
+
+def _cached_profile(symbol, interval, by_weekday, index, volume, keys):
+    """
+    Seasonal profile of a symbol's bars, reusing the cached one when possible
+
+    Profiles are cached per symbol and bar interval, so switching between
+    daily and intraday bars keeps both. A cached profile built from a prefix
+    of these bars (same first bar, same volume total) is extended with the
+    newer bars only; anything else is rebuilt. Without a symbol nothing is
+    cached.
+    """
+    key = (symbol, interval, by_weekday)
+    with _profiles_lock:
+        entry = _profiles.pop(key, None) if symbol is not None else None
+
+    profile, start = None, 0
+    total = np.nansum(volume)
+    if entry is not None:
+        cached, first, rows, cached_total = entry
+        prefix = total if rows == len(index) else np.nansum(volume[:rows])
+        if len(index) >= rows > 0 and index[0] == first and prefix == cached_total:
+            # Copied so detectors already holding it are not changed under them
+            profile, start = (cached.copy() if rows < len(index) else cached), rows
+    if profile is None:
+        profile = VolumeProfile(by_weekday)
+    if start < len(index):
+        profile.extend(index[start:], volume[start:], keys[start:])
+
+    if symbol is not None and len(index):
+        with _profiles_lock:
+            _profiles[key] = (profile, index[0], len(index), total)
+            while len(_profiles) > PROFILE_CACHE_SIZE:
+                _profiles.popitem(last=False)
+    return profile
+
+
+class AnomalyResult:
+    """
+    Detection output kept as compact arrays alongside the input frame
+    
+    Z-scores are float32, anomalies and event days are sparse arrays of row
+    positions and event types a categorical. The input frame is referenced,
+    never copied or modified; result columns are built only when asked for,
+    one at a time through result['Z_Score'] or all at once with to_frame().
+    """
+    
+    def __init__(self, data, z_scores, anomalies, event_days, event_types,
+                 baseline_mean=None, baseline_std=None):
+        self.data = data
+        self.z_scores = z_scores
+        self.anomalies = anomalies
+        self.event_days = event_days
+        self.event_types = event_types
+        self.baseline_mean = baseline_mean
+        self.baseline_std = baseline_std
+    
+    def __len__(self):
+        return len(self.data)
+    
+    @property
+    def anomaly_count(self):
+        return len(self.anomalies)
+    
+    @property
+    def anomaly_dates(self):
+        return self.data.index[self.anomalies]
+    
+    @property
+    def is_anomaly(self):
+        """Boolean anomaly flag per row"""
+        mask = np.zeros(len(self), dtype=bool)
+        mask[self.anomalies] = True
+        return mask
+    
+    @property
+    def event_day(self):
+        """Boolean event-day flag per row"""
+        mask = np.zeros(len(self), dtype=bool)
+        mask[self.event_days] = True
+        return mask
+    
+    @property
+    def anomaly_scores(self):
+        """Z-score on anomaly rows, 0 elsewhere"""
+        scores = np.zeros(len(self), dtype=np.float32)
+        scores[self.anomalies] = self.z_scores[self.anomalies]
+        return scores
+    
+    @property
+    def nbytes(self):
+        """Memory held by the result arrays (the input frame is shared)"""
+        arrays = [self.z_scores, self.anomalies, self.event_days, self.event_types.codes]
+        return sum(array.nbytes for array in arrays)
+    
+    def column(self, name):
+        """Materialize one result column as a Series aligned with the input"""
+        columns = {
+            'Is_Anomaly': lambda: self.is_anomaly,
+            'Event_Day': lambda: self.event_day,
+            'Event_Type': lambda: self.event_types,
+            'Anomaly_Score': lambda: self.anomaly_scores,
+            'Z_Score': lambda: self.z_scores,
+            'Baseline_Mean': lambda: self.baseline_mean,
+            'Baseline_Std': lambda: self.baseline_std,
+        }
+        if name in columns and columns[name]() is not None:
+            return pd.Series(columns[name](), index=self.data.index, name=name)
+        return self.data[name]
+    
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.column(key)
+        return pd.DataFrame({name: self.column(name) for name in key}, index=self.data.index)
+    
+    def to_frame(self):
+        """Build the input frame merged with all result columns"""
+        names = RESULT_COLUMNS
+        if self.baseline_mean is not None:
+            names = names + ['Baseline_Mean', 'Baseline_Std']
+        return pd.concat([self.data, self[names]], axis=1)
+
 
 class AnomalyDetector:
     """Detects anomalous trading patterns before major events"""
     
-    def __init__(self, df):
+    def __init__(self, df, calendar=None, symbol=None, interval=None):
         """
         Initialize detector with stock data
         
+        The frame is referenced, not copied: results are kept in an
+        AnomalyResult next to it, so read-only views (such as
+        MarketDataStore frames) work too.
+        
         Args:
             df: DataFrame with Date index and Volume column
+            calendar: Optional TradingCalendar; pre-event windows are then
+                      counted in trading sessions instead of calendar days
+            symbol: Optional ticker, the key for cached seasonal profiles
+            interval: Bar interval ('daily', '5min', ...) for the profile
+                      cache key (default: the index's bar spacing)
         """
-        self.df = df.copy()
+        self.df = df
+        self.calendar = calendar
+        self.symbol = symbol
+        self.interval = interval
+        self._bar_sessions = None
         self.avg_volume = None
         self.std_dev_volume = None
         self.anomaly_threshold = None
+        self.z_score = None
+        self.baseline_method = 'global'
+        self.moments = None
+        self.baseline_mean = None
+        self.baseline_std = None
+        self.event_dates = None
+        self.result = None
+        # Memoized per detection run
+        self._summary = None
+        self._statistics = None
         
-    def calculate_baseline(self, z_score=3):
+    @classmethod
+    def from_store(cls, store, symbol, start_date=None, end_date=None, interval='daily',
+                   calendar=None):
+        """
+        Create a detector over a MarketDataStore window without copying bars
+        
+        Args:
+            store: MarketDataStore holding the symbol
+            symbol: Stock ticker symbol
+            start_date: Inclusive start of the window
+            end_date: Inclusive end of the window
+            interval: Series interval
+            calendar: Optional TradingCalendar for session-based windows
+        """
+        return cls(store.frame(symbol, start_date, end_date, interval), calendar, symbol, interval)
+    
+    def calculate_baseline(self, z_score=3, method='global', window=20, span=20, by_weekday=False):
         """
         Calculate baseline statistics for anomaly detection
         
+        'global' scores every bar against the mean/std of the whole frame.
+        'expanding', 'rolling' and 'ewm' score each bar against the bars
+        before it only (all of them, the last `window`, or an exponentially
+        weighted average with `span`); the per-bar baseline is kept in the
+        baseline_mean and baseline_std arrays.
+        
+        'median' and 'rolling_median' are robust to the volume spikes being
+        hunted: they use the median and scaled median absolute deviation of
+        the whole frame or of the last `window` bars instead of mean/std.
+        
+        'seasonal' is for intraday bars: each bar is scored against the
+        mean/std of all bars at the same time of day (and weekday, with
+        by_weekday), so the regular open and close surges are not flagged.
+        The profile is cached per symbol.
+        
         Args:
             z_score: Number of standard deviations for threshold (default: 3)
+            method: 'global', 'expanding', 'rolling', 'ewm', 'median',
+                    'rolling_median' or 'seasonal'
+            window: Bars in a rolling baseline
+            span: Span of an exponentially weighted baseline
+            by_weekday: Seasonal profile per day of week as well as time of day
         """
-        self.avg_volume = self.df['Volume'].mean()
-        self.std_dev_volume = self.df['Volume'].std()
+        self.z_score = z_score
+        self.baseline_method = method
+        self._summary = self._statistics = None
+        
+        if method == 'seasonal':
+            keys = VolumeProfile(by_weekday).keys(self.df.index)
+            interval = self.interval if self.interval is not None else _bar_interval(self.df.index)
+            self.moments = _cached_profile(self.symbol, interval, by_weekday, self.df.index,
+                                           self.df['Volume'].to_numpy(dtype=np.float64), keys)
+            self.baseline_mean, self.baseline_std = self.moments.score(self.df.index, keys)
+            # Pooled over the whole profile, for the summary statistics
+            self.avg_volume = self.moments.mean
+            self.std_dev_volume = self.moments.std
+        elif method == 'median':
+            # No incremental tracker: append() recomputes it
+            self.moments = None
+            self.avg_volume, self.std_dev_volume = median_mad(self.df['Volume'].to_numpy())
+            self.baseline_mean = self.baseline_std = None
+        elif method == 'global':
+            self.moments = make_moments(method, window, span)
+            self.moments.extend(self.df['Volume'].to_numpy(dtype=np.float64))
+            self.avg_volume = self.df['Volume'].mean()
+            self.std_dev_volume = self.df['Volume'].std()
+            self.baseline_mean = self.baseline_std = None
+        else:
+            self.moments = make_moments(method, window, span)
+            means, stds = self.moments.extend(self.df['Volume'].to_numpy(dtype=np.float64))
+            self.baseline_mean, self.baseline_std = means, stds
+            # Baseline the next bar will be scored against
+            self.avg_volume = self.moments.mean
+            self.std_dev_volume = self.moments.std
         self.anomaly_threshold = self.avg_volume + (z_score * self.std_dev_volume)
         
         return {
@@ -39,101 +271,266 @@ class AnomalyDetector:
             'anomaly_threshold': self.anomaly_threshold
         }
     
+    def append(self, bars):
+        """
+        Append bars newer than the last one, updating the baseline incrementally
+        
+        Only the new bars are fed to the running moments, so the cost is
+        constant per bar rather than a rescan of the history. Call
+        detect_anomalies again to flag the new bars.
+        
+        Args:
+            bars: DataFrame with Date index and Volume column
+            
+        Returns:
+            Number of bars appended
+        """
+        if len(self.df):
+            bars = bars[bars.index > self.df.index[-1]]
+        if bars.empty:
+            return 0
+        
+        seasonal = self.baseline_method == 'seasonal'
+        if self.moments is not None and not seasonal:
+            means, stds = self.moments.extend(bars['Volume'].to_numpy(dtype=np.float64))
+            if self.baseline_mean is not None:
+                self.baseline_mean = np.concatenate((self.baseline_mean, means))
+                self.baseline_std = np.concatenate((self.baseline_std, stds))
+            self.avg_volume = self.moments.mean
+            self.std_dev_volume = self.moments.std
+            self.anomaly_threshold = self.avg_volume + (self.z_score * self.std_dev_volume)
+        
+        self.df = pd.concat([self.df, bars])
+        if self.baseline_method == 'median':
+            self.calculate_baseline(self.z_score, 'median')
+        elif seasonal:
+            # The cached profile is extended with the new bars only
+            self.calculate_baseline(self.z_score, 'seasonal', by_weekday=self.moments.by_weekday)
+        self.result = None
+        self._bar_sessions = None
+        self._summary = self._statistics = None
+        return len(bars)
+    
     def detect_anomalies(self, event_dates, pre_event_window=3, z_score=3):
         """
         Detect anomalies in pre-event windows
         
         Args:
-            event_dates: List of datetime objects for major events
-            pre_event_window: Number of days before event to check
+            event_dates: List of datetime objects for major events, or a dict
+                         mapping each event date to its type (e.g. 'Earnings')
+            pre_event_window: Number of days before event to check (trading
+                              sessions when the detector has a calendar)
             z_score: Number of standard deviations for threshold
             
         Returns:
-            DataFrame with anomaly flags and statistics
+            AnomalyResult with anomaly flags and statistics
         """
         # Calculate baseline if not already done
         if self.anomaly_threshold is None:
             self.calculate_baseline(z_score)
         
-        # Initialize columns
-        self.df['Is_Anomaly'] = False
-        self.df['Event_Day'] = False
-        self.df['Event_Type'] = ''
-        self.df['Anomaly_Score'] = 0.0
-        self.df['Z_Score'] = 0.0
-        
         # Calculate Z-scores for all days
-        self.df['Z_Score'] = (self.df['Volume'] - self.avg_volume) / self.std_dev_volume
+        volume = self.df['Volume'].to_numpy()
+        if self.baseline_mean is None:
+            mean, std = self.avg_volume, self.std_dev_volume
+            threshold = self.anomaly_threshold
+        else:
+            # Bars without enough history have no baseline and are never flagged
+            mean, std = self.baseline_mean, self.baseline_std
+            threshold = mean + self.z_score * std
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z_scores = ((volume - mean) / std).astype(np.float32)
         
-        # Process each event
-        for event_date in event_dates:
-            # Mark the actual event day
-            if event_date in self.df.index:
-                self.df.loc[event_date, 'Event_Day'] = True
-            
-            # Define the pre-event window
-            window_end = event_date - pd.Timedelta(days=1)
-            window_start = event_date - pd.Timedelta(days=pre_event_window)
-            
-            # Find suspicious trades in the window
-            mask = (self.df.index >= window_start) & (self.df.index <= window_end)
-            window_data = self.df[mask]
+        # Mark the actual event days
+        event_types = dict(event_dates) if isinstance(event_dates, dict) else {}
+        events = pd.DatetimeIndex(list(event_dates)).dropna()
+        self.event_dates = events
+        event_days = np.flatnonzero(self.df.index.isin(events))
+        
+        if self.calendar is not None:
+            # The N trading sessions before each event, by integer session number
+            in_window = self.calendar.window_mask(self.bar_sessions(), events, pre_event_window)
+        else:
+            # Union of all pre-event windows [event - N days, event - 1 day],
+            # located with binary search instead of one full-length mask per event
+            in_window = self._window_mask(
+                events - pd.Timedelta(days=pre_event_window),
+                events - pd.Timedelta(days=1)
+            )
+        
+        # Mark anomalies (score: how many std devs above mean)
+        with np.errstate(invalid='ignore'):
+            anomalies = np.flatnonzero(in_window & (volume > threshold))
+        
+        self.result = AnomalyResult(
+            self.df, z_scores, anomalies, event_days,
+            self._event_types(event_types, event_days),
+            self.baseline_mean, self.baseline_std
+        )
+        self._summary = self._statistics = None
+        return self.result
+    
+    def _event_types(self, event_types, event_days):
+        """Categorical event type per row ('' away from event days)"""
+        labels = pd.Series({pd.Timestamp(date): str(kind) for date, kind in event_types.items()})
+        categories = [''] + sorted(set(labels.values) - {''})
+        codes = np.zeros(len(self.df), dtype=np.int8 if len(categories) < 128 else np.int32)
+        if len(labels) and len(event_days):
+            days = labels.reindex(self.df.index[event_days]).fillna('')
+            codes[event_days] = pd.Index(categories).get_indexer(days.values)
+        return pd.Categorical.from_codes(codes, categories=categories)
+    
+    def bar_sessions(self):
+        """Trading session number of every bar (-1 off-session), computed once"""
+        if self._bar_sessions is None:
+            self._bar_sessions = self.calendar.bar_sessions(self.df.index)
+        return self._bar_sessions
+    
+    def sweep(self, event_dates=None, z_scores=SWEEP_Z_SCORES, pre_event_windows=SWEEP_WINDOWS):
+        """
+        Evaluate detection over a grid of thresholds and pre-event windows
+        
+        A bar falls in an N-day pre-event window exactly when the next event
+        at least one day later is at most N days (or N trading sessions, with
+        a calendar) away, so one sorted event-distance array answers every
+        window size. Flags match what detect_anomalies would produce for each
+        pair; the frame is not modified.
+        
+        Args:
+            event_dates: List of event dates (default: those of the last detection)
+            z_scores: Thresholds to evaluate
+            pre_event_windows: Window lengths in days (or trading sessions) to evaluate
             
-            # Mark anomalies
-            if not window_data.empty:
-                anomaly_mask = window_data['Volume'] > self.anomaly_threshold
-                anomaly_indices = window_data[anomaly_mask].index
-                
-                if not anomaly_indices.empty:
-                    self.df.loc[anomaly_indices, 'Is_Anomaly'] = True
-                    # Calculate anomaly score (how many std devs above mean)
-                    self.df.loc[anomaly_indices, 'Anomaly_Score'] = (
-                        self.df.loc[anomaly_indices, 'Volume'] - self.avg_volume
-                    ) / self.std_dev_volume
-        
-        return self.df
+        Returns:
+            DataFrame with one row per (z_score, pre_event_window) pair holding
+            anomaly_count and the flagged anomaly_dates; pivot it on anomaly_count
+            for a sensitivity heatmap
+        """
+        if event_dates is None:
+            event_dates = self.event_dates if self.event_dates is not None else []
+        if self.avg_volume is None:
+            self.calculate_baseline()
+        
+        if self.baseline_mean is None:
+            mean, std = self.avg_volume, self.std_dev_volume
+        else:
+            mean, std = self.baseline_mean, self.baseline_std
+        volume = self.df['Volume'].to_numpy()
+        
+        # Time from each bar to the next event at least one day later
+        events = pd.DatetimeIndex(event_dates).dropna()
+        if self.calendar is not None:
+            distance = self.calendar.sessions_to_next_event(self.bar_sessions(), events)
+            unit = 1
+        else:
+            ts = self.df.index.values.astype('datetime64[ns]').view(np.int64)
+            events = np.sort(events.values.astype('datetime64[ns]').view(np.int64))
+            unit = pd.Timedelta(days=1).value
+            nxt = np.searchsorted(events, ts + unit, side='left')
+            found = nxt < len(events)
+            distance = np.full(len(ts), np.iinfo(np.int64).max)
+            distance[found] = events[nxt[found]] - ts[found]
+        has_event = distance < np.iinfo(np.int64).max
+        
+        rows = []
+        for z in z_scores:
+            with np.errstate(invalid='ignore'):
+                candidates = np.flatnonzero(has_event & (volume > mean + z * std))
+            # Candidates nearest to their event first: each window is a prefix
+            candidates = candidates[np.argsort(distance[candidates], kind='stable')]
+            cutoffs = np.searchsorted(distance[candidates], np.asarray(pre_event_windows) * unit, side='right')
+            for window, cutoff in zip(pre_event_windows, cutoffs):
+                flagged = np.sort(candidates[:cutoff])
+                rows.append({
+                    'z_score': z,
+                    'pre_event_window': window,
+                    'anomaly_count': len(flagged),
+                    'anomaly_dates': self.df.index[flagged],
+                })
+        
+        return pd.DataFrame(rows, columns=['z_score', 'pre_event_window', 'anomaly_count', 'anomaly_dates'])
     
-    def get_anomaly_summary(self):
-        """Get summary of detected anomalies"""
-        anomalies = self.df[self.df['Is_Anomaly']].copy()
+    def _window_mask(self, window_starts, window_ends):
+        """
+        Boolean mask of rows falling inside any of the given closed intervals
         
-        if anomalies.empty:
-            return {
-                'total_anomalies': 0,
-                'details': []
-            }
+        Runs in O(n + k log n) for n rows and k intervals.
+        """
+        index = self.df.index
+        order = None
+        if not index.is_monotonic_increasing:
+            order = np.argsort(index.values, kind='stable')
+            index = index[order]
         
-        summary = {
-            'total_anomalies': len(anomalies),
-            'details': []
-        }
+        n = len(index)
+        lo = index.searchsorted(window_starts, side='left')
+        hi = index.searchsorted(window_ends, side='right')
+        nonempty = hi > lo
         
-        for idx, row in anomalies.iterrows():
-            summary['details'].append({
-                'date': idx,
-                'volume': row['Volume'],
-                'z_score': row['Z_Score'],
-                'anomaly_score': row['Anomaly_Score'],
-                'percentage_above_avg': ((row['Volume'] - self.avg_volume) / self.avg_volume) * 100
-            })
+        # +1 where a window opens, -1 where it closes; covered rows have a positive sum
+        edges = (np.bincount(lo[nonempty], minlength=n + 1)
+                 - np.bincount(hi[nonempty], minlength=n + 1))
+        covered = np.cumsum(edges[:n]) > 0
         
-        return summary
+        if order is None:
+            return covered
+        mask = np.empty(n, dtype=bool)
+        mask[order] = covered
+        return mask
+    
+    def get_anomaly_summary(self):
+        """
+        Get summary of detected anomalies
+        
+        Built with column operations once per detection run and memoized.
+        
+        Returns:
+            Dict with total_anomalies and details, a DataFrame with one row
+            per anomaly (date, volume, z_score, anomaly_score,
+            percentage_above_avg) sorted by date, ready for st.dataframe or
+            to_csv; treat it as read-only
+        """
+        if self._summary is None:
+            positions = (self.result.anomalies if self.result is not None
+                         else np.empty(0, dtype=np.int64))
+            volumes = self.df['Volume'].to_numpy()[positions]
+            z_scores = (self.result.z_scores[positions] if self.result is not None
+                        else np.empty(0, dtype=np.float32))
+            averages = self.baseline_mean[positions] if self.baseline_mean is not None else self.avg_volume
+            
+            details = pd.DataFrame({
+                'date': self.df.index[positions],
+                'volume': volumes,
+                'z_score': z_scores,
+                'anomaly_score': z_scores,
+                'percentage_above_avg': ((volumes - averages) / averages) * 100,
+            })
+            if not details['date'].is_monotonic_increasing:
+                details = details.sort_values('date', kind='stable', ignore_index=True)
+            
+            self._summary = {
+                'total_anomalies': len(details),
+                'details': details
+            }
+        return self._summary
     
     def get_statistics(self):
-        """Get comprehensive statistics about the data"""
-        return {
-            'total_days': len(self.df),
-            'average_volume': self.avg_volume,
-            'std_deviation': self.std_dev_volume,
-            'min_volume': self.df['Volume'].min(),
-            'max_volume': self.df['Volume'].max(),
-            'median_volume': self.df['Volume'].median(),
-            'anomaly_threshold': self.anomaly_threshold,
-            'anomaly_count': self.df['Is_Anomaly'].sum(),
-            'event_day_count': self.df['Event_Day'].sum()
-        }
+        """Get comprehensive statistics about the data (memoized per detection run)"""
+        if self._statistics is None:
+            volume = self.df['Volume'].to_numpy()
+            self._statistics = {
+                'total_days': len(volume),
+                'average_volume': self.avg_volume,
+                'std_deviation': self.std_dev_volume,
+                'min_volume': volume.min() if len(volume) else np.nan,
+                'max_volume': volume.max() if len(volume) else np.nan,
+                'median_volume': np.median(volume) if len(volume) else np.nan,
+                'anomaly_threshold': self.anomaly_threshold,
+                'anomaly_count': self.result.anomaly_count if self.result is not None else 0,
+                'event_day_count': len(self.result.event_days) if self.result is not None else 0
+            }
+        return self._statistics
     
     def get_data_with_anomalies(self):
-        """Return the full DataFrame with anomaly flags"""
-        return self.df
-
+        """Return the full DataFrame with anomaly flags (built on request)"""
+        return self.result.to_frame() if self.result is not None else self.df
@@ -8,11 +8,16 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import time
 import os
-from data_collector import StockDataCollector
+import hashlib
+from data_collector import StockDataCollector, get_shared_transport
 from anomaly_detector import AnomalyDetector
+from trading_calendar import calendar_for_symbol
+from downsampling import downsample, window_positions
+from pyramid import DataPyramid
 
 # Page configuration
 st.set_page_config(
@@ -22,626 +27,50 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-def apply_light_theme():
-    """Apply light theme CSS"""
-    st.markdown("""
-    <style>
-        /* Main container styling - Light Theme */
-        .main {
-            padding: 0;
-            background: #ffffff;
-            font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-        }
-    
-    /* Professional Header with Animation */
-    .main-header {
-        background: linear-gradient(135deg, #1e3c72 0%, #2a5298 100%);
-        padding: 4rem 3rem;
-        margin: -1rem -1rem 2rem -1rem;
-        color: white;
-        box-shadow: 0 4px 20px rgba(0, 0, 0, 0.1);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    /* Hide anchor link icons next to headers */
-    .stMarkdown h1 a, .stMarkdown h2 a, .stMarkdown h3 a, .stMarkdown h4 a {
-        visibility: hidden !important;
-    }
-    
-    /* Hide the hidden theme toggle button */
-    [data-testid="stButton-theme_toggle_hidden"] {
-        display: none !important;
-    }
-    
-    /* Animation for FIN-SIGHT Logo */
-    .animated-logo {
-        text-align: center;
-    }
-    
-    @keyframes bounceIn {
-        0% {
-            transform: scale(0.3);
-            opacity: 0;
-        }
-        50% {
-            transform: scale(1.05);
-        }
-        70% {
-            transform: scale(0.9);
-        }
-        100% {
-            transform: scale(1);
-            opacity: 1;
-        }
-    }
-    
-    @keyframes fadeIn {
-        0% {
-            opacity: 0;
-            transform: translateY(-20px);
-        }
-        100% {
-            opacity: 1;
-            transform: translateY(0);
-        }
-    }
-    
-    @keyframes pulse {
-        0%, 100% {
-            transform: scale(1);
-        }
-        50% {
-            transform: scale(1.05);
-        }
-    }
-    
-    .bounce-in {
-        animation: bounceIn 1s ease-out;
-    }
-    
-    .fade-in {
-        animation: fadeIn 1.5s ease-out 0.5s backwards;
-    }
-    
-    /* Pulsing animation for the logo */
-    .animated-logo h1 {
-        animation: pulse 2s ease-in-out infinite;
-    }
-    
-    .main-header::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background: url('data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1440 320"><path fill="rgba(255,255,255,0.05)" d="M0,96L48,112C96,128,192,160,288,160C384,160,480,128,576,122.7C672,117,768,139,864,138.7C960,139,1056,117,1152,117.3C1248,117,1344,139,1392,149.3L1440,160L1440,320L1392,320C1344,320,1248,320,1152,320C1056,320,960,320,864,320C768,320,672,320,576,320C480,320,384,320,288,320C192,320,96,320,48,320L0,320Z"></path></svg>');
-        background-size: cover;
-        opacity: 0.3;
-    }
-    
-    .main-header > * {
-        position: relative;
-        z-index: 1;
-    }
-    
-    .main-header h1 {
-        color: white;
-        margin-bottom: 0.5rem;
-        font-size: 3.5rem;
-        font-weight: 900;
-        letter-spacing: -1px;
-        text-shadow: 2px 2px 8px rgba(0,0,0,0.2);
-    }
-    
-    .main-header p {
-        color: rgba(255, 255, 255, 0.95);
-        font-size: 1.3rem;
-        margin: 0;
-        font-weight: 400;
-        letter-spacing: 0.5px;
-    }
-    
-    /* Professional card styling */
-    .metric-card {
-        background: white;
-        padding: 2rem;
-        border-radius: 12px;
-        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.08);
-        border-top: 4px solid;
-        transition: all 0.3s ease;
-        height: 100%;
-    }
-    
-    .metric-card:hover {
-        transform: translateY(-8px);
-        box-shadow: 0 12px 24px rgba(0, 0, 0, 0.15);
-    }
-    
-    .metric-card h3 {
-        font-size: 1.3rem;
-        font-weight: 700;
-        margin-bottom: 0.5rem;
-    }
-    
-    .metric-card p {
-        color: #666;
-        font-size: 0.95rem;
-        line-height: 1.6;
-    }
-    
-    /* Professional button styling */
-    .stButton>button {
-        background: linear-gradient(135deg, #1e3c72 0%, #2a5298 100%);
-        color: white;
-        border: none;
-        border-radius: 8px;
-        padding: 0.75rem 2rem;
-        font-weight: 600;
-        font-size: 1rem;
-        transition: all 0.3s ease;
-        box-shadow: 0 4px 12px rgba(30, 60, 114, 0.3);
-        width: 100%;
-    }
-    
-    .stButton>button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 6px 20px rgba(30, 60, 114, 0.4);
-        background: linear-gradient(135deg, #2a5298 0%, #3d6bb3 100%);
-    }
-    
-    .stButton>button:active {
-        transform: translateY(0);
-    }
-    
-    /* Cool Breeze info box styling */
-    .info-box {
-        background: linear-gradient(135deg, #e0f7fa 0%, #b2ebf2 100%);
-        padding: 1.5rem;
-        border-radius: 15px;
-        border-left: 5px solid #00acc1;
-        margin: 1rem 0;
-        box-shadow: 0 2px 10px rgba(0, 172, 193, 0.2);
-    }
-    
-    .info-box h4 {
-        color: #006064;
-        margin-top: 0;
-    }
-    
-    /* Success/Error styling - Cool Breeze theme */
-    .success-box {
-        background: linear-gradient(135deg, #c8e6c9 0%, #a5d6a7 100%);
-        color: #1b5e20;
-        padding: 1.5rem;
-        border-radius: 15px;
-        border-left: 5px solid #4caf50;
-        margin: 1rem 0;
-        box-shadow: 0 2px 10px rgba(76, 175, 80, 0.3);
-    }
-    
-    .error-box {
-        background: linear-gradient(135deg, #ffcdd2 0%, #ef9a9a 100%);
-        color: #b71c1c;
-        padding: 1.5rem;
-        border-radius: 15px;
-        border-left: 5px solid #f44336;
-        margin: 1rem 0;
-        box-shadow: 0 2px 10px rgba(244, 67, 54, 0.3);
-    }
-    
-    /* Warning box */
-    .warning-box {
-        background: linear-gradient(135deg, #fff9c4 0%, #fff59d 100%);
-        color: #f57f17;
-        padding: 1.5rem;
-        border-radius: 15px;
-        border-left: 5px solid #ffc107;
-        margin: 1rem 0;
-        box-shadow: 0 2px 10px rgba(255, 193, 7, 0.3);
-    }
-    
-    /* Hide Streamlit branding */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    
-    /* Hide sidebar */
-    [data-testid="stSidebar"] {
-        display: none;
-    }
-    
-    /* Full width layout */
-    .block-container {
-        padding-left: 2rem;
-        padding-right: 2rem;
-        max-width: 100%;
-        font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-    }
-    
-    /* Apply Consolas font to all elements */
-    * {
-        font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-    }
-    
-    /* Ensure all text uses Consolas */
-    body, p, div, span, h1, h2, h3, h4, h5, h6 {
-        font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-    }
-    
-    /* Professional Metric Cards */
-    [data-testid="stMetricValue"] {
-        font-size: 2.2rem;
-        font-weight: 800;
-        color: #1e3c72;
-        font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-    }
-    
-    [data-testid="stMetricLabel"] {
-        font-size: 0.9rem;
-        font-weight: 600;
-        color: #666;
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-        font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-    }
-    
-    /* Professional Input Fields */
-    .stTextInput>div>div>input {
-        border-radius: 8px;
-        border: 2px solid #e0e0e0;
-        padding: 0.75rem;
-    }
-    
-    .stTextInput>div>div>input:focus {
-        border-color: #2a5298;
-        box-shadow: 0 0 0 3px rgba(42, 82, 152, 0.1);
-    }
-    
-    /* Selectbox styling */
-    .stSelectbox>div>div>select {
-        border-radius: 8px;
-        border: 2px solid #e0e0e0;
-    }
-    
-    /* Date input styling */
-    .stDateInput>div>div>input {
-        border-radius: 8px;
-        border: 2px solid #e0e0e0;
-    }
-    
-    /* Slider styling */
-    .stSlider>div>div>div>div {
-        background: linear-gradient(90deg, #1e3c72 0%, #2a5298 100%);
-    }
-    
-    /* Text area styling */
-    .stTextArea>div>div>textarea {
-        border-radius: 8px;
-        border: 2px solid #e0e0e0;
-    }
-    
-    /* Expander styling */
-    [data-testid="stExpander"] {
-        background: white;
-        border-radius: 8px;
-        border: 1px solid #e0e0e0;
-        box-shadow: 0 2px 4px rgba(0, 0, 0, 0.05);
-    }
-    
-    /* Plotly chart container styling for better visibility */
-    .js-plotly-plot {
-        background: white !important;
-        border-radius: 10px;
-        padding: 10px;
-    }
-    
-    /* Ensure chart text is dark and readable */
-    .plotly .modebar {
-        background: white !important;
-    }
-    
-    /* Chart title styling */
-    .plotly .gtitle {
-        font-weight: 800 !important;
-        color: #1a1a1a !important;
-    }
-    
-    /* Axis labels styling */
-    .plotly .xtick text, .plotly .ytick text {
-        fill: #1a1a1a !important;
-        font-weight: 600 !important;
-    }
-    
-    /* Grid lines styling */
-    .plotly .gridlayer path {
-        stroke: #e0e0e0 !important;
-    }
-    
-    /* Threshold line styling - make it more visible */
-    .plotly .annotation {
-        font-weight: 900 !important;
-    }
-    
-    /* Ensure threshold annotations are prominent */
-    .plotly .annotation-text {
-        font-weight: 900 !important;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.5) !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+# Theme stylesheet, served by Streamlit's static file server
+# (server.enableStaticServing) from ./static/
+THEME_CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'theme.css')
 
-def apply_dark_theme():
-    """Apply dark theme CSS"""
-    st.markdown("""
-    <style>
-        /* Main container styling - Dark Theme */
-        .main {
-            padding: 0;
-            background: #1a1a1a;
-            font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-        }
-        
-        /* Dark Theme Header with Animation */
-        .main-header {
-            background: linear-gradient(135deg, #0a1929 0%, #132f4c 100%);
-            padding: 4rem 3rem;
-            margin: -1rem -1rem 2rem -1rem;
-            color: white;
-            box-shadow: 0 4px 20px rgba(0, 0, 0, 0.3);
-            position: relative;
-            overflow: hidden;
-        }
-        
-        /* Hide anchor link icons next to headers */
-        .stMarkdown h1 a, .stMarkdown h2 a, .stMarkdown h3 a, .stMarkdown h4 a {
-            visibility: hidden !important;
-        }
-        
-        /* Hide the hidden theme toggle button */
-        [data-testid="stButton-theme_toggle_hidden"] {
-            display: none !important;
-        }
-        
-        /* Animation for FIN-SIGHT Logo */
-        .animated-logo {
-            text-align: center;
-        }
-        
-        @keyframes bounceIn {
-            0% {
-                transform: scale(0.3);
-                opacity: 0;
-            }
-            50% {
-                transform: scale(1.05);
-            }
-            70% {
-                transform: scale(0.9);
-            }
-            100% {
-                transform: scale(1);
-                opacity: 1;
-            }
-        }
-        
-        @keyframes fadeIn {
-            0% {
-                opacity: 0;
-                transform: translateY(-20px);
-            }
-            100% {
-                opacity: 1;
-                transform: translateY(0);
-            }
-        }
-        
-        @keyframes pulse {
-            0%, 100% {
-                transform: scale(1);
-            }
-            50% {
-                transform: scale(1.05);
-            }
-        }
-        
-        .bounce-in {
-            animation: bounceIn 1s ease-out;
-        }
-        
-        .fade-in {
-            animation: fadeIn 1.5s ease-out 0.5s backwards;
-        }
-        
-        /* Pulsing animation for the logo */
-        .animated-logo h1 {
-            animation: pulse 2s ease-in-out infinite;
-        }
-        
-        .main-header::before {
-            content: '';
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            bottom: 0;
-            background: url('data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1440 320"><path fill="rgba(255,255,255,0.03)" d="M0,96L48,112C96,128,192,160,288,160C384,160,480,128,576,122.7C672,117,768,139,864,138.7C960,139,1056,117,1152,117.3C1248,117,1344,139,1392,149.3L1440,160L1440,320L1392,320C1344,320,1248,320,1152,320C1056,320,960,320,864,320C768,320,672,320,576,320C480,320,384,320,288,320C192,320,96,320,48,320L0,320Z"></path></svg>');
-            background-size: cover;
-            opacity: 0.3;
-        }
-        
-        .main-header > * {
-            position: relative;
-            z-index: 1;
-        }
-        
-        .main-header h1 {
-            color: white;
-            margin-bottom: 0.5rem;
-            font-size: 3.5rem;
-            font-weight: 900;
-            letter-spacing: -1px;
-            text-shadow: 2px 2px 8px rgba(0,0,0,0.3);
-        }
-        
-        .main-header p {
-            color: rgba(255, 255, 255, 0.95);
-            font-size: 1.3rem;
-            margin: 0;
-            font-weight: 400;
-            letter-spacing: 0.5px;
-        }
-        
-        /* Dark Theme Cards */
-        .metric-card {
-            background: #2d2d2d;
-            padding: 2rem;
-            border-radius: 12px;
-            box-shadow: 0 2px 8px rgba(0, 0, 0, 0.3);
-            border-top: 4px solid;
-            transition: all 0.3s ease;
-            height: 100%;
-        }
-        
-        .metric-card:hover {
-            transform: translateY(-8px);
-            box-shadow: 0 12px 24px rgba(0, 0, 0, 0.5);
-        }
-        
-        .metric-card h3 {
-            font-size: 1.3rem;
-            font-weight: 700;
-            margin-bottom: 0.5rem;
-            color: #ffffff;
-        }
-        
-        .metric-card p {
-            color: #b0b0b0;
-            font-size: 0.95rem;
-            line-height: 1.6;
-        }
-        
-        /* Dark Theme Buttons */
-        .stButton>button {
-            background: linear-gradient(135deg, #0a1929 0%, #132f4c 100%);
-            color: white;
-            border: none;
-            border-radius: 8px;
-            padding: 0.75rem 2rem;
-            font-weight: 600;
-            font-size: 1rem;
-            transition: all 0.3s ease;
-            box-shadow: 0 4px 12px rgba(0, 0, 0, 0.3);
-            width: 100%;
-        }
-        
-        .stButton>button:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 6px 20px rgba(0, 0, 0, 0.5);
-            background: linear-gradient(135deg, #132f4c 0%, #1a3d5f 100%);
-        }
-        
-        .stButton>button:active {
-            transform: translateY(0);
-        }
-        
-        /* Dark Theme Input Fields */
-        .stTextInput>div>div>input {
-            border-radius: 8px;
-            border: 2px solid #404040;
-            padding: 0.75rem;
-            background: #2d2d2d;
-            color: #ffffff;
-        }
-        
-        .stTextInput>div>div>input:focus {
-            border-color: #4a90e2;
-            box-shadow: 0 0 0 3px rgba(74, 144, 226, 0.1);
-        }
-        
-        .stSelectbox>div>div>select {
-            border-radius: 8px;
-            border: 2px solid #404040;
-            background: #2d2d2d;
-            color: #ffffff;
-        }
-        
-        .stDateInput>div>div>input {
-            border-radius: 8px;
-            border: 2px solid #404040;
-            background: #2d2d2d;
-            color: #ffffff;
-        }
-        
-        .stSlider>div>div>div>div {
-            background: linear-gradient(90deg, #0a1929 0%, #132f4c 100%);
-        }
-        
-        .stTextArea>div>div>textarea {
-            border-radius: 8px;
-            border: 2px solid #404040;
-            background: #2d2d2d;
-            color: #ffffff;
-        }
-        
-        [data-testid="stExpander"] {
-            background: #2d2d2d;
-            border-radius: 8px;
-            border: 1px solid #404040;
-            box-shadow: 0 2px 4px rgba(0, 0, 0, 0.3);
-        }
-        
-        /* Dark Theme Metrics */
-        [data-testid="stMetricValue"] {
-            font-size: 2.2rem;
-            font-weight: 800;
-            color: #4a90e2;
-            font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-        }
-        
-        [data-testid="stMetricLabel"] {
-            font-size: 0.9rem;
-            font-weight: 600;
-            color: #b0b0b0;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-            font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-        }
-        
-        /* Dark Theme Text */
-        .stMarkdown {
-            color: #e0e0e0;
-        }
-        
-        /* Hide Streamlit branding */
-        #MainMenu {visibility: hidden;}
-        footer {visibility: hidden;}
-        header {visibility: hidden;}
-        
-        /* Hide sidebar */
-        [data-testid="stSidebar"] {
-            display: none;
-        }
-        
-        /* Full width layout */
-        .block-container {
-            padding-left: 2rem;
-            padding-right: 2rem;
-            max-width: 100%;
-            font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-        }
-        
-        /* Apply Consolas font */
-        * {
-            font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-        }
-        
-        body, p, div, span, h1, h2, h3, h4, h5, h6 {
-            font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-        }
-    </style>
-    """, unsafe_allow_html=True)
+
+@st.cache_resource
+def theme_css_url():
+    """URL of the theme stylesheet, versioned by its content so browsers cache it safely"""
+    with open(THEME_CSS_PATH, 'rb') as f:
+        version = hashlib.md5(f.read()).hexdigest()[:12]
+    return f"app/static/theme.css?v={version}"
+
+
+def apply_theme():
+    """
+    Load the theme stylesheet once per session and switch themes by class
+    
+    The <link> and the fs-light / fs-dark class on <html> live outside
+    Streamlit's element tree, so they survive reruns: nothing is sent again
+    until the theme is toggled, and then only the class changes.
+    """
+    theme = 'fs-dark' if st.session_state.dark_mode else 'fs-light'
+    if st.session_state.get('applied_theme') == theme:
+        return
+    st.html(f"""
+    <script>
+        (function () {{
+            const href = new URL("{theme_css_url()}", document.baseURI).href;
+            let link = document.head.querySelector('link[data-fin-sight-theme]');
+            if (!link) {{
+                link = document.createElement('link');
+                link.rel = 'stylesheet';
+                link.dataset.finSightTheme = '';
+                document.head.appendChild(link);
+            }}
+            if (link.href !== href) {{
+                link.href = href;
+            }}
+            document.documentElement.classList.remove('fs-light', 'fs-dark');
+            document.documentElement.classList.add('{theme}');
+        }})();
+    </script>
+    """, unsafe_allow_javascript=True)
+    st.session_state.applied_theme = theme
 
 # Initialize session state
 if 'stock_data' not in st.session_state:
@@ -650,11 +79,97 @@ if 'detector' not in st.session_state:
     st.session_state.detector = None
 if 'analysis_complete' not in st.session_state:
     st.session_state.analysis_complete = False
+if 'data_key' not in st.session_state:
+    st.session_state.data_key = None
+if 'analysis_key' not in st.session_state:
+    st.session_state.analysis_key = None
 if 'dark_mode' not in st.session_state:
     st.session_state.dark_mode = False
 if 'current_page' not in st.session_state:
     st.session_state.current_page = 'welcome'
 
+# Cache layer shared by every rerun and session. Keys hold the symbol,
+# interval, date range and a fingerprint of the bars (plus the detection
+# settings for results and figures); entries expire after a TTL and the least
+# recently used are evicted beyond CACHE_ENTRIES.
+DATA_CACHE_TTL = 5 * 60
+RESULT_CACHE_TTL = 30 * 60
+CACHE_ENTRIES = 32
+
+# Time-series charts draw at most this many points of the visible range;
+# longer ranges are downsampled on the server and drawn with WebGL
+CHART_POINTS = 2000
+
+
+def data_fingerprint(df):
+    """Content hash of the bars, so refreshed data never hits stale results"""
+    return int(pd.util.hash_pandas_object(df, index=True).to_numpy().sum())
+
+
+@st.cache_data(ttl=DATA_CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def fetch_stock_data(_api_key, symbol, granularity, start_date, end_date):
+    """
+    Bars for one symbol, interval and date range
+
+    Intraday data is fetched once at 1min resolution and resampled locally
+    for the coarser intervals. Errors are not cached, and callers clear
+    stale (still refreshing) frames so they are not served for the TTL.
+    """
+    collector = StockDataCollector(_api_key)
+    return collector.fetch_bars(
+        symbol, granularity,
+        start_date=start_date, end_date=end_date,
+        base_interval='1min'
+    )
+
+
+@st.cache_resource(ttl=RESULT_CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def run_detection(data_key, event_dates, pre_event_window, z_score, _df):
+    """
+    Detector with the results of one analysis
+
+    Shared across reruns and sessions without copying, so treat it as read-only.
+    """
+    symbol, granularity = data_key[:2]
+    # Windows are counted in the listing exchange's sessions
+    calendar = calendar_for_symbol(symbol, [*_df.index[[0, -1]], *event_dates] if len(_df) else event_dates)
+    detector = AnomalyDetector(_df, calendar=calendar, symbol=symbol, interval=granularity)
+    # Intraday bars are scored against their time-of-day profile, so the
+    # regular open and close volume surges are not flagged
+    if granularity not in ('daily', 'weekly'):
+        detector.calculate_baseline(z_score, method='seasonal')
+    detector.detect_anomalies(list(event_dates), pre_event_window, z_score)
+    return detector
+
+
+@st.cache_data(ttl=RESULT_CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def anomaly_report_csv(analysis_key, _detector):
+    """CSV of the anomaly table for the download button"""
+    return _detector.get_anomaly_summary()['details'].to_csv(index=False)
+
+
+# Set FIN_SIGHT_SHOW_TIMINGS=1 to print each section's render time under it
+SHOW_TIMINGS = os.getenv('FIN_SIGHT_SHOW_TIMINGS', '').lower() in ('1', 'true', 'yes')
+
+
+@contextmanager
+def section_timer(name):
+    """
+    Record how long a page section takes to render, in milliseconds
+    
+    Times land in st.session_state.section_times; 'Full run' is the whole
+    script. A fragment rerun only updates its own section's time.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        st.session_state.setdefault('section_times', {})[name] = elapsed
+        if SHOW_TIMINGS:
+            st.caption(f"⏱️ {name}: {elapsed:.0f} ms")
+
+
 def welcome_page():
     """Welcome page with detailed information about FIN-SIGHT"""
     
@@ -964,46 +479,10 @@ def welcome_page():
             st.session_state.current_page = 'analysis'
             st.rerun()
 
-def analysis_page():
-    """Stock analysis page with anomaly detection functionality"""
-    
-    # Theme toggle button with JavaScript integration
-    st.markdown("""
-    <div style="position: fixed; bottom: 20px; right: 20px; z-index: 9999;">
-        <button id="theme-toggle-btn" 
-                style="width: 45px; height: 45px; border-radius: 50%; 
-                       background: rgba(30, 60, 114, 0.9); color: white; 
-                       border: 2px solid rgba(255, 255, 255, 0.2); 
-                       font-size: 1.2rem; cursor: pointer; 
-                       box-shadow: 0 4px 12px rgba(0,0,0,0.15);
-                       transition: all 0.3s ease;">
-            """ + ("🌙" if not st.session_state.dark_mode else "☀️") + """
-        </button>
-    </div>
-    <script>
-        document.getElementById('theme-toggle-btn').addEventListener('click', function() {
-            window.parent.postMessage({type: 'streamlit:setComponentValue', value: 'toggle_theme'}, '*');
-        });
-    </script>
-    """, unsafe_allow_html=True)
-    
-    # Actual theme toggle functionality
-    if st.button("", key="theme_toggle_hidden", use_container_width=False):
-        st.session_state.dark_mode = not st.session_state.dark_mode
-        st.rerun()
-    
-    # Back to Welcome button
-    if st.button("← Back to Welcome", key="back_to_welcome"):
-        st.session_state.current_page = 'welcome'
-        st.rerun()
-    
-    # Header
-    st.markdown("### 📊 Stock Anomaly Detection")
-    
-    # API Key from environment
-    api_key = os.getenv('ALPHA_VANTAGE_API_KEY', 'VO8CV7MCLOI5GNI3')
-    
-    st.markdown("---")
+@st.fragment
+@section_timer('Configuration')
+def configuration_section(api_key):
+    """Analysis settings; changing them reruns only this section until Analyze is pressed"""
     
     # Configuration Section
     st.markdown("### ⚙️ Configuration")
@@ -1050,8 +529,10 @@ def analysis_page():
     
     data_type = st.selectbox(
         "Select Data Type",
-        ["Daily", "Weekly", "Intraday (60min)"],
-        help="Select the time interval for data collection",
+        ["Daily", "Weekly", "Intraday (1min)", "Intraday (5min)", "Intraday (15min)",
+         "Intraday (30min)", "Intraday (60min)"],
+        help="Select the time interval for data collection. Coarser intervals are derived "
+             "locally from data already fetched, so switching does not use extra API calls.",
         index=0
     )
     
@@ -1059,17 +540,17 @@ def analysis_page():
     
     # Anomaly Detection Settings
     st.markdown("#### 🔍 Detection Settings")
-    st.markdown("Configure how the system detects anomalies. The pre-event window defines how many days before an announcement to check for suspicious activity.")
+    st.markdown("Configure how the system detects anomalies. The pre-event window defines how many trading days before an announcement to check for suspicious activity.")
     
     col1, col2 = st.columns(2)
     
     with col1:
         pre_event_window = st.slider(
-            "Pre-Event Window (days)",
+            "Pre-Event Window (trading days)",
             min_value=1,
             max_value=7,
             value=3,
-            help="Number of days before event to check for anomalies"
+            help="Number of trading sessions before event to check for anomalies (weekends and exchange holidays are skipped)"
         )
     
     with col2:
@@ -1091,25 +572,32 @@ def analysis_page():
         if st.button("🔍 Analyze Stock", use_container_width=True):
             with st.spinner("Fetching data and analyzing..."):
                 try:
-                    # Initialize collector
-                    collector = StockDataCollector(api_key)
-                    
-                    # Fetch data based on type
+                    # Fetch data based on type, limited to the date range
                     if data_type == "Daily":
-                        df = collector.fetch_daily_data(stock_symbol)
+                        granularity = 'daily'
                     elif data_type == "Weekly":
-                        df = collector.fetch_weekly_data(stock_symbol)
+                        granularity = 'weekly'
                     else:
-                        df = collector.fetch_intraday_data(stock_symbol)
-                    
-                    # Filter by date range
-                    df = df[(df.index >= pd.Timestamp(start_date)) & 
-                           (df.index <= pd.Timestamp(end_date))]
+                        granularity = data_type[len("Intraday ("):-1]
+                    df = fetch_stock_data(api_key, stock_symbol, granularity,
+                                          start_date, end_date)
+                    if df.attrs.get('stale'):
+                        # Don't keep a stale frame for the whole TTL: the next
+                        # Analyze asks the collector again and gets the
+                        # refreshed bars once the background refresh is done
+                        fetch_stock_data.clear(api_key, stock_symbol, granularity,
+                                               start_date, end_date)
                     
                     if df.empty:
                         st.error("No data available for the selected date range")
                     else:
                         st.session_state.stock_data = df
+                        st.session_state.data_key = (
+                            stock_symbol.upper(), granularity, str(start_date), str(end_date),
+                            data_fingerprint(df)
+                        )
+                        # Build the chart pyramid once, alongside the cached bars
+                        data_pyramid(st.session_state.data_key, df)
                         st.session_state.pre_event_window = pre_event_window
                         st.session_state.z_score = z_score
                         st.success(f"✅ Data fetched successfully! ({len(df)} records)")
@@ -1121,6 +609,55 @@ def analysis_page():
                     st.info("💡 **Tips:**\n- Use base symbols without exchange suffix (e.g., 'AAPL' not 'AAPL.NASDAQ')\n- Try popular stocks like AAPL, MSFT, GOOGL, AMZN, TSLA\n- Wait 60 seconds if you see rate limit errors")
                 except Exception as e:
                     st.error(f"❌ Error: {str(e)}")
+        
+        # API quota shared by every app process on this host
+        quota = get_shared_transport(api_key).limiter.usage()
+        queued = f" · {quota['waiting']} queued" if quota['waiting'] else ""
+        st.caption(f"API quota: {quota['used']}/{quota['limit']} calls in the last "
+                   f"{quota['window_seconds']:.0f}s{queued}")
+
+def analysis_page():
+    """Stock analysis page with anomaly detection functionality"""
+    
+    # Theme toggle button with JavaScript integration
+    st.markdown("""
+    <div style="position: fixed; bottom: 20px; right: 20px; z-index: 9999;">
+        <button id="theme-toggle-btn" 
+                style="width: 45px; height: 45px; border-radius: 50%; 
+                       background: rgba(30, 60, 114, 0.9); color: white; 
+                       border: 2px solid rgba(255, 255, 255, 0.2); 
+                       font-size: 1.2rem; cursor: pointer; 
+                       box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+                       transition: all 0.3s ease;">
+            """ + ("🌙" if not st.session_state.dark_mode else "☀️") + """
+        </button>
+    </div>
+    <script>
+        document.getElementById('theme-toggle-btn').addEventListener('click', function() {
+            window.parent.postMessage({type: 'streamlit:setComponentValue', value: 'toggle_theme'}, '*');
+        });
+    </script>
+    """, unsafe_allow_html=True)
+    
+    # Actual theme toggle functionality
+    if st.button("", key="theme_toggle_hidden", use_container_width=False):
+        st.session_state.dark_mode = not st.session_state.dark_mode
+        st.rerun()
+    
+    # Back to Welcome button
+    if st.button("← Back to Welcome", key="back_to_welcome"):
+        st.session_state.current_page = 'welcome'
+        st.rerun()
+    
+    # Header
+    st.markdown("### 📊 Stock Anomaly Detection")
+    
+    # API Key from environment
+    api_key = os.getenv('ALPHA_VANTAGE_API_KEY', 'VO8CV7MCLOI5GNI3')
+    
+    st.markdown("---")
+    
+    configuration_section(api_key)
     
     # Reset button
     if st.session_state.stock_data is not None:
@@ -1136,10 +673,15 @@ def analysis_page():
     
     # Main Content
     if st.session_state.stock_data is not None:
+        if st.session_state.stock_data.attrs.get('stale'):
+            age_minutes = st.session_state.stock_data.attrs['age_seconds'] / 60
+            st.info(f"🕒 Showing cached data from {age_minutes:.0f} minutes ago while it refreshes "
+                    f"in the background. Analyze again to pick up the refreshed data.")
         display_analysis(
             st.session_state.stock_data, 
             st.session_state.pre_event_window, 
-            st.session_state.z_score
+            st.session_state.z_score,
+            st.session_state.data_key
         )
     else:
         display_welcome()
@@ -1232,11 +774,410 @@ def display_welcome():
         </div>
         """, unsafe_allow_html=True)
 
-def display_analysis(df, pre_event_window, z_score):
-    """Display analysis results"""
+@st.cache_resource(ttl=DATA_CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def data_pyramid(data_key, _df):
+    """Multi-resolution volume aggregates of the fetched bars, built once per data key"""
+    return DataPyramid(_df.index, _df['Volume'])
+
+
+def bar_thresholds(detector):
+    """Volume threshold of each bar for per-bar baselines (e.g. seasonal), else None"""
+    if detector.baseline_mean is None:
+        return None
+    return detector.baseline_mean + detector.z_score * detector.baseline_std
+
+
+@st.cache_resource(ttl=RESULT_CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def analysis_pyramid(analysis_key, _detector):
+    """Data pyramid plus the per-bucket maximum z-score (and threshold) of one analysis"""
+    pyramid = data_pyramid(analysis_key[0], _detector.df).with_max('z_max', _detector.result.z_scores)
+    thresholds = bar_thresholds(_detector)
+    if thresholds is not None:
+        pyramid = pyramid.with_max('threshold_max', thresholds)
+    return pyramid
+
+
+def chart_points(pyramid, detector, column, view, method='minmax'):
+    """
+    Pyramid buckets of the visible range to draw for a series
+    
+    Reads the finest pyramid level with at most MAX_SCAN_BUCKETS buckets in
+    the range, so a render never touches more than that however many years
+    are visible, and downsamples those buckets to about CHART_POINTS. The
+    buckets holding anomalies and event days are always kept.
+    
+    Args:
+        pyramid: DataPyramid of the bars
+        detector: AnomalyDetector with results
+        column: Pyramid column to draw (e.g. 'volume_max', 'z_max')
+        view: (start, end) of the visible range, or None for all bars
+        method: Downsampling method ('minmax' or 'lttb')
+    
+    Returns:
+        (level, lo, hi, positions): the level read, the visible rows [lo, hi)
+        and the positions of the buckets to draw in that level
+    """
+    lo, hi = window_positions(detector.df.index, *view) if view else (0, len(detector.df))
+    level, first, last = pyramid.select(lo, hi)
+    buckets = pyramid.levels[level]
+    keep = np.concatenate((detector.result.anomalies, detector.result.event_days)).astype(np.int64)
+    keep = pyramid.bucket_of(level, visible_rows(keep, lo, hi)) - first
+    points = downsample(buckets['time'][first:last], buckets[column][first:last], CHART_POINTS, keep, method)
+    return level, lo, hi, first + points
+
+
+def visible_rows(positions, lo, hi):
+    """Sorted row positions that fall in [lo, hi)"""
+    return positions[(positions >= lo) & (positions < hi)]
+
+
+def resolution_note(level, points, visible):
+    """Chart title suffix describing the reduction, empty at full detail"""
+    if len(points) >= visible:
+        return ""
+    if level == 'raw':
+        return f" · {len(points):,} of {visible:,} bars drawn"
+    return f" · {level} peaks, {len(points):,} points for {visible:,} bars"
+
+
+def add_threshold_line(fig, threshold):
+    """Constant anomaly threshold line with high contrast and better visibility"""
+    fig.add_hrect(
+        y0=threshold,
+        y1=threshold,
+        fillcolor="#ff6b6b",
+        opacity=0.4,
+        layer="below",
+        line_width=0
+    )
+    fig.add_hline(
+        y=threshold,
+        line_dash="dash",
+        line_color="#ff0000",
+        line_width=4,
+        annotation_text=f"<b>ANOMALY THRESHOLD</b><br>{threshold:,.0f}",
+        annotation_position="right",
+        annotation=dict(
+            font=dict(size=16, color="#ffffff", family="Arial Black"),
+            bgcolor="#ff0000",
+            bordercolor="#cc0000",
+            borderwidth=3,
+            borderpad=8
+        )
+    )
+
+
+# Figures are cached as shared objects rather than serialized: st.plotly_chart
+# re-validates a figure rebuilt from JSON, which costs as much as building it.
+# Like the detector they are read-only.
+@st.cache_resource(ttl=RESULT_CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def volume_chart(analysis_key, _detector, view=None):
+    """
+    Volume with the threshold, anomaly and event-day markers
+    
+    Visible ranges of up to CHART_POINTS bars are drawn as bars. Longer ones
+    are read from the data pyramid, downsampled (min/max per bucket, so no
+    spike is lost) and drawn as a WebGL area of the peak bar per bucket.
+    Per-bar baselines (seasonal) draw each bar's own threshold as a line.
+    """
+    stats = _detector.get_statistics()
+    df = _detector.df
+    volume = df['Volume'].to_numpy(dtype=np.float64)
+    pyramid = analysis_pyramid(analysis_key, _detector)
+    level, lo, hi, points = chart_points(pyramid, _detector, 'volume_max', view)
+    buckets = pyramid.levels[level]
+    times = pd.to_datetime(buckets['time'][points])
     
-    # Create detector
-    detector = AnomalyDetector(df)
+    fig = go.Figure()
+    
+    if len(points) == hi - lo:
+        # Add volume bars with professional colors
+        fig.add_trace(go.Bar(
+            x=times,
+            y=buckets['volume'][points],
+            name='Trading Volume',
+            marker=dict(
+                color='#2a5298',
+                opacity=0.85,
+                line=dict(color='#1e3c72', width=1)
+            )
+        ))
+    else:
+        fig.add_trace(go.Scattergl(
+            x=times,
+            y=buckets['volume_max'][points],
+            customdata=buckets['volume'][points],
+            mode='lines',
+            name='Trading Volume' if level == 'raw' else f'Trading Volume ({level} peak)',
+            hovertemplate="%{y:,.0f} peak bar<br>%{customdata:,.0f} total",
+            line=dict(color='#1e3c72', width=1),
+            fill='tozeroy',
+            fillcolor='rgba(42, 82, 152, 0.6)'
+        ))
+    
+    if 'threshold_max' in buckets:
+        # Per-bar baselines: each bar has its own threshold
+        fig.add_trace(go.Scattergl(
+            x=times,
+            y=buckets['threshold_max'][points],
+            mode='lines',
+            name='Anomaly Threshold' if level == 'raw' else f'Anomaly Threshold ({level} peak)',
+            line=dict(color='#ff0000', width=2, dash='dash')
+        ))
+    else:
+        add_threshold_line(fig, stats['anomaly_threshold'])
+    
+    # Highlight anomalies with high contrast
+    anomalies = visible_rows(_detector.result.anomalies, lo, hi)
+    if len(anomalies):
+        fig.add_trace(go.Scattergl(
+            x=df.index[anomalies],
+            y=volume[anomalies],
+            mode='markers',
+            name='Anomalies',
+            marker=dict(
+                color='#ff0000',
+                size=15,
+                symbol='diamond',
+                line=dict(width=3, color='#cc0000'),
+                opacity=1.0
+            )
+        ))
+    
+    # Highlight event days with high contrast
+    event_days = visible_rows(_detector.result.event_days, lo, hi)
+    if len(event_days):
+        fig.add_trace(go.Scattergl(
+            x=df.index[event_days],
+            y=volume[event_days],
+            mode='markers',
+            name='Event Days',
+            marker=dict(
+                color='#00cc00',
+                size=12,
+                symbol='triangle-up',
+                line=dict(width=3, color='#009900'),
+                opacity=1.0
+            )
+        ))
+    
+    fig.update_layout(
+        title=dict(
+            text=f"Trading Volume Analysis - Anomalies Detected: {stats['anomaly_count']}"
+                 + resolution_note(level, points, hi - lo),
+            font=dict(size=18, color='#1a1a1a', family='Arial Black')
+        ),
+        xaxis=dict(
+            title=dict(text="Date", font=dict(size=14, color='#1a1a1a', family='Arial')),
+            gridcolor='#e0e0e0',
+            gridwidth=1,
+            showgrid=True
+        ),
+        yaxis=dict(
+            title=dict(text="Volume", font=dict(size=14, color='#1a1a1a', family='Arial')),
+            gridcolor='#e0e0e0',
+            gridwidth=1,
+            showgrid=True
+        ),
+        hovermode='x unified',
+        dragmode='select',
+        height=550,
+        template="plotly_white",
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1,
+            font=dict(size=12, color='#1a1a1a', family='Arial')
+        ),
+        font=dict(family="Arial", size=12, color='#1a1a1a')
+    )
+    
+    return fig
+
+
+@st.cache_resource(ttl=RESULT_CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def z_score_histogram(analysis_key, _detector):
+    """Distribution of z-scores against the threshold, binned on the server"""
+    z_score = analysis_key[3]
+    z_scores = _detector.result.z_scores
+    counts, edges = np.histogram(z_scores[np.isfinite(z_scores)], bins=50)
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        name='Z-Score Distribution',
+        marker=dict(
+            color='#2a5298',
+            opacity=0.85,
+            line=dict(color='#1e3c72', width=1)
+        )
+    ))
+    fig.add_vrect(
+        x0=z_score,
+        x1=z_score,
+        fillcolor="#ff6b6b",
+        opacity=0.3,
+        layer="below",
+        line_width=0
+    )
+    fig.add_vline(
+        x=z_score,
+        line_dash="dash",
+        line_color="#ff0000",
+        line_width=4,
+        annotation_text=f"<b>THRESHOLD</b><br>Z = {z_score}",
+        annotation=dict(
+            font=dict(size=14, color="#ffffff", family="Arial Black"),
+            bgcolor="#ff0000",
+            bordercolor="#cc0000",
+            borderwidth=3,
+            borderpad=8
+        )
+    )
+    fig.update_layout(
+        title=dict(
+            text="Z-Score Distribution",
+            font=dict(size=16, color='#1a1a1a', family='Arial Black')
+        ),
+        xaxis=dict(
+            title=dict(text="Z-Score", font=dict(size=12, color='#1a1a1a', family='Arial')),
+            gridcolor='#e0e0e0',
+            gridwidth=1,
+            showgrid=True
+        ),
+        yaxis=dict(
+            title=dict(text="Frequency", font=dict(size=12, color='#1a1a1a', family='Arial')),
+            gridcolor='#e0e0e0',
+            gridwidth=1,
+            showgrid=True
+        ),
+        template="plotly_white",
+        height=450,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font=dict(family="Arial", size=11, color='#1a1a1a')
+    )
+    return fig
+
+
+@st.cache_resource(ttl=RESULT_CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def z_score_timeline(analysis_key, _detector, view=None):
+    """
+    Z-scores over time against the threshold
+    
+    Drawn with WebGL from the data pyramid (the peak z-score per bucket for
+    long ranges); points are downsampled with largest-triangle-three-buckets,
+    which keeps the shape of the line, and every anomaly (each threshold
+    crossing) is kept.
+    """
+    z_score = analysis_key[3]
+    pyramid = analysis_pyramid(analysis_key, _detector)
+    level, lo, hi, points = chart_points(pyramid, _detector, 'z_max', view, method='lttb')
+    buckets = pyramid.levels[level]
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(
+        x=pd.to_datetime(buckets['time'][points]),
+        y=buckets['z_max'][points],
+        mode='lines',
+        name='Z-Score Over Time',
+        line=dict(
+            color='#2a5298',
+            width=2.5,
+            shape='linear'
+        ),
+        fill='tozeroy',
+        fillcolor='rgba(42, 82, 152, 0.2)'
+    ))
+    fig.add_hrect(
+        y0=z_score,
+        y1=z_score,
+        fillcolor="#ff6b6b",
+        opacity=0.3,
+        layer="below",
+        line_width=0
+    )
+    fig.add_hline(
+        y=z_score,
+        line_dash="dash",
+        line_color="#ff0000",
+        line_width=4,
+        annotation_text=f"<b>THRESHOLD</b><br>Z = {z_score}",
+        annotation=dict(
+            font=dict(size=14, color="#ffffff", family="Arial Black"),
+            bgcolor="#ff0000",
+            bordercolor="#cc0000",
+            borderwidth=3,
+            borderpad=8
+        )
+    )
+    fig.update_layout(
+        title=dict(
+            text="Z-Score Timeline" + resolution_note(level, points, hi - lo),
+            font=dict(size=16, color='#1a1a1a', family='Arial Black')
+        ),
+        xaxis=dict(
+            title=dict(text="Date", font=dict(size=12, color='#1a1a1a', family='Arial')),
+            gridcolor='#e0e0e0',
+            gridwidth=1,
+            showgrid=True
+        ),
+        yaxis=dict(
+            title=dict(text="Z-Score", font=dict(size=12, color='#1a1a1a', family='Arial')),
+            gridcolor='#e0e0e0',
+            gridwidth=1,
+            showgrid=True
+        ),
+        dragmode='select',
+        template="plotly_white",
+        height=450,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font=dict(family="Arial", size=11, color='#1a1a1a')
+    )
+    return fig
+
+
+@st.cache_resource(ttl=RESULT_CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def sensitivity_heatmap(analysis_key, _detector):
+    """Anomaly counts over the z-score and pre-event window grid"""
+    sweep = _detector.sweep()
+    counts = sweep.pivot(index='z_score', columns='pre_event_window', values='anomaly_count')
+    fig = go.Figure(go.Heatmap(
+        z=counts.values,
+        x=[f"{window}d" for window in counts.columns],
+        y=[f"Z = {z}" for z in counts.index],
+        text=counts.values,
+        texttemplate="%{text}",
+        colorscale='Reds',
+        hovertemplate="Window: %{x}<br>%{y}<br>Anomalies: %{z}<extra></extra>"
+    ))
+    fig.update_layout(
+        xaxis=dict(title=dict(text="Pre-Event Window (trading days)", font=dict(size=12, color='#1a1a1a', family='Arial'))),
+        yaxis=dict(title=dict(text="Z-Score Threshold", font=dict(size=12, color='#1a1a1a', family='Arial'))),
+        template="plotly_white",
+        height=400,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font=dict(family="Arial", size=11, color='#1a1a1a')
+    )
+    return fig
+
+
+@st.cache_resource(ttl=RESULT_CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def data_with_anomalies(analysis_key, _detector):
+    """Bars with the result columns for the raw data table"""
+    return _detector.get_data_with_anomalies()
+
+
+@st.fragment
+@section_timer('Event dates')
+def event_dates_section(df, pre_event_window, z_score, data_key):
+    """Event date entry and detection; editing the dates reruns only this section"""
     
     # Event dates input
     st.markdown("### 📅 Major Event Dates")
@@ -1260,6 +1201,10 @@ def display_analysis(df, pre_event_window, z_score):
     )
     
     col1, col2 = st.columns([3, 1])
+    with col1:
+        notice = st.session_state.pop('detection_notice', None)
+        if notice:
+            st.success(notice)
     with col2:
         if st.button("🔍 Detect Anomalies", use_container_width=True):
             # Parse event dates
@@ -1277,345 +1222,226 @@ def display_analysis(df, pre_event_window, z_score):
                         st.warning(f"⚠️ Invalid date format: {line.strip()}")
             
             if event_dates:
-                # Detect anomalies
-                detector.detect_anomalies(event_dates, pre_event_window, z_score)
+                # Detect anomalies (or reuse an identical earlier analysis)
+                analysis_key = (data_key, tuple(sorted(set(event_dates))), pre_event_window, z_score)
+                detector = run_detection(*analysis_key, _df=df)
                 st.session_state.detector = detector
+                st.session_state.analysis_key = analysis_key
                 st.session_state.analysis_complete = True
-                st.success(f"✅ Analysis complete! Detected {detector.df['Is_Anomaly'].sum()} anomalies")
+                # Shown after the full rerun that draws the new results
+                st.session_state.detection_notice = f"✅ Analysis complete! Detected {detector.result.anomaly_count} anomalies"
+                st.rerun()
             else:
                 st.error("Please enter at least one valid event date within the data range")
+
+
+@st.fragment
+@section_timer('Results')
+def results_section(analysis_key, detector, pre_event_window, z_score):
+    """Metrics, detailed statistics and the anomaly table"""
     
-    if st.session_state.analysis_complete and st.session_state.detector:
-        detector = st.session_state.detector
-        
-        # Statistics
-        stats = detector.get_statistics()
-        summary = detector.get_anomaly_summary()
-        
-        st.markdown("---")
-        st.markdown("### 📊 Analysis Results")
-        st.markdown("Below are the key metrics from your analysis. The system has analyzed trading volume patterns and identified statistically unusual activity.")
-        
-        # Metrics
-        col1, col2, col3, col4 = st.columns(4)
+    # Statistics
+    stats = detector.get_statistics()
+    summary = detector.get_anomaly_summary()
+    
+    st.markdown("---")
+    st.markdown("### 📊 Analysis Results")
+    st.markdown("Below are the key metrics from your analysis. The system has analyzed trading volume patterns and identified statistically unusual activity.")
+    
+    # Metrics
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Total Days Analyzed", f"{stats['total_days']:,}")
+    
+    with col2:
+        st.metric("Anomalies Detected", f"{stats['anomaly_count']}", 
+                 delta=f"{stats['anomaly_count']/stats['total_days']*100:.1f}%")
+    
+    with col3:
+        st.metric("Average Volume", f"{stats['average_volume']:,.0f}")
+    
+    # Per-bar baselines flag against each bar's own threshold; the single
+    # figure is then the one pooled over every bar
+    threshold_label = "Anomaly Threshold" if detector.baseline_mean is None else "Pooled Anomaly Threshold"
+    
+    with col4:
+        st.metric(threshold_label, f"{stats['anomaly_threshold']:,.0f}",
+                  help=None if detector.baseline_mean is None else
+                  "Bars are flagged against their own time-of-day threshold; this is the pooled mean + Z x std.")
+    
+    # Detailed Statistics
+    with st.expander("📈 Detailed Statistics"):
+        col1, col2 = st.columns(2)
         
         with col1:
-            st.metric("Total Days Analyzed", f"{stats['total_days']:,}")
+            st.markdown("**Volume Statistics**")
+            st.json({
+                "Minimum Volume": f"{stats['min_volume']:,.0f}",
+                "Maximum Volume": f"{stats['max_volume']:,.0f}",
+                "Median Volume": f"{stats['median_volume']:,.0f}",
+                "Average Volume": f"{stats['average_volume']:,.0f}",
+                "Standard Deviation": f"{stats['std_deviation']:,.0f}"
+            })
         
         with col2:
-            st.metric("Anomalies Detected", f"{stats['anomaly_count']}", 
-                     delta=f"{stats['anomaly_count']/stats['total_days']*100:.1f}%")
-        
-        with col3:
-            st.metric("Average Volume", f"{stats['average_volume']:,.0f}")
-        
-        with col4:
-            st.metric("Anomaly Threshold", f"{stats['anomaly_threshold']:,.0f}")
-        
-        # Detailed Statistics
-        with st.expander("📈 Detailed Statistics"):
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown("**Volume Statistics**")
-                st.json({
-                    "Minimum Volume": f"{stats['min_volume']:,.0f}",
-                    "Maximum Volume": f"{stats['max_volume']:,.0f}",
-                    "Median Volume": f"{stats['median_volume']:,.0f}",
-                    "Average Volume": f"{stats['average_volume']:,.0f}",
-                    "Standard Deviation": f"{stats['std_deviation']:,.0f}"
-                })
-            
-            with col2:
-                st.markdown("**Detection Settings**")
-                st.json({
-                    "Z-Score Threshold": z_score,
-                    "Pre-Event Window": f"{pre_event_window} days",
-                    "Anomaly Threshold": f"{stats['anomaly_threshold']:,.0f}",
-                    "Event Days": stats['event_day_count']
-                })
-        
-        # Anomaly Details
-        if summary['total_anomalies'] > 0:
-            st.markdown("### 🚨 Detected Anomalies")
-            st.markdown("The following dates show statistically unusual trading volume before major events. Each anomaly is classified by severity based on how many standard deviations above the average volume it is.")
-            
-            anomaly_df = pd.DataFrame(summary['details'])
-            anomaly_df['date'] = pd.to_datetime(anomaly_df['date'])
-            anomaly_df = anomaly_df.sort_values('date')
-            
-            st.dataframe(
-                anomaly_df.style.format({
-                    'volume': '{:,.0f}',
-                    'z_score': '{:.2f}',
-                    'anomaly_score': '{:.2f}',
-                    'percentage_above_avg': '{:.1f}%'
-                }),
-                use_container_width=True,
-                height=200
-            )
-            
-            # Download button
-            csv = anomaly_df.to_csv(index=False)
-            st.download_button(
-                label="📥 Download Anomaly Report",
-                data=csv,
-                file_name=f"anomaly_report_{datetime.now().strftime('%Y%m%d')}.csv",
-                mime="text/csv"
-            )
-        else:
-            st.info("ℹ️ No anomalies detected with current settings. Try adjusting the Z-score threshold or pre-event window.")
-        
-        # Visualizations
-        st.markdown("---")
-        st.markdown("### 📊 Interactive Visualizations")
-        st.markdown("Interactive charts help you visualize trading patterns and anomalies. The volume chart shows daily trading volume with anomaly markers (red diamonds) and event days (green triangles).")
+            st.markdown("**Detection Settings**")
+            st.json({
+                "Z-Score Threshold": z_score,
+                "Pre-Event Window": f"{pre_event_window} trading days",
+                threshold_label: f"{stats['anomaly_threshold']:,.0f}",
+                "Event Days": stats['event_day_count']
+            })
+    
+    # Anomaly Details
+    if summary['total_anomalies'] > 0:
+        st.markdown("### 🚨 Detected Anomalies")
+        st.markdown("The following dates show statistically unusual trading volume before major events. Each anomaly is classified by severity based on how many standard deviations above the average volume it is.")
         
-        # Volume Chart with high contrast
-        fig = go.Figure()
+        # Columnar and already sorted by date; shared across reruns
+        anomaly_df = summary['details']
         
-        # Add volume bars with professional colors
-        fig.add_trace(go.Bar(
-            x=detector.df.index,
-            y=detector.df['Volume'],
-            name='Trading Volume',
-            marker=dict(
-                color='#2a5298',
-                opacity=0.85,
-                line=dict(color='#1e3c72', width=1)
-            )
-        ))
-        
-        # Add anomaly threshold line with high contrast and better visibility
-        fig.add_hrect(
-            y0=stats['anomaly_threshold'],
-            y1=stats['anomaly_threshold'],
-            fillcolor="#ff6b6b",
-            opacity=0.4,
-            layer="below",
-            line_width=0
+        st.dataframe(
+            anomaly_df.style.format({
+                'volume': '{:,.0f}',
+                'z_score': '{:.2f}',
+                'anomaly_score': '{:.2f}',
+                'percentage_above_avg': '{:.1f}%'
+            }),
+            use_container_width=True,
+            height=200
         )
-        fig.add_hline(
-            y=stats['anomaly_threshold'],
-            line_dash="dash",
-            line_color="#ff0000",
-            line_width=4,
-            annotation_text=f"<b>ANOMALY THRESHOLD</b><br>{stats['anomaly_threshold']:,.0f}",
-            annotation_position="right",
-            annotation=dict(
-                font=dict(size=16, color="#ffffff", family="Arial Black"),
-                bgcolor="#ff0000",
-                bordercolor="#cc0000",
-                borderwidth=3,
-                borderpad=8
-            )
-        )
-        
-        # Highlight anomalies with high contrast
-        anomalies = detector.df[detector.df['Is_Anomaly']]
-        if not anomalies.empty:
-            fig.add_trace(go.Scatter(
-                x=anomalies.index,
-                y=anomalies['Volume'],
-                mode='markers',
-                name='Anomalies',
-                marker=dict(
-                    color='#ff0000',
-                    size=15,
-                    symbol='diamond',
-                    line=dict(width=3, color='#cc0000'),
-                    opacity=1.0
-                )
-            ))
         
-        # Highlight event days with high contrast
-        event_days = detector.df[detector.df['Event_Day']]
-        if not event_days.empty:
-            fig.add_trace(go.Scatter(
-                x=event_days.index,
-                y=event_days['Volume'],
-                mode='markers',
-                name='Event Days',
-                marker=dict(
-                    color='#00cc00',
-                    size=12,
-                    symbol='triangle-up',
-                    line=dict(width=3, color='#009900'),
-                    opacity=1.0
-                )
-            ))
-        
-        fig.update_layout(
-            title=dict(
-                text=f"Trading Volume Analysis - Anomalies Detected: {stats['anomaly_count']}",
-                font=dict(size=18, color='#1a1a1a', family='Arial Black')
-            ),
-            xaxis=dict(
-                title=dict(text="Date", font=dict(size=14, color='#1a1a1a', family='Arial')),
-                gridcolor='#e0e0e0',
-                gridwidth=1,
-                showgrid=True
-            ),
-            yaxis=dict(
-                title=dict(text="Volume", font=dict(size=14, color='#1a1a1a', family='Arial')),
-                gridcolor='#e0e0e0',
-                gridwidth=1,
-                showgrid=True
-            ),
-            hovermode='x unified',
-            height=550,
-            template="plotly_white",
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1,
-                font=dict(size=12, color='#1a1a1a', family='Arial')
-            ),
-            font=dict(family="Arial", size=12, color='#1a1a1a')
+        # Download button
+        csv = anomaly_report_csv(analysis_key, detector)
+        st.download_button(
+            label="📥 Download Anomaly Report",
+            data=csv,
+            file_name=f"anomaly_report_{datetime.now().strftime('%Y%m%d')}.csv",
+            mime="text/csv",
+            on_click="ignore"
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Z-Score Distribution
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            fig2 = go.Figure()
-            fig2.add_trace(go.Histogram(
-                x=detector.df['Z_Score'],
-                nbinsx=50,
-                name='Z-Score Distribution',
-                marker=dict(
-                    color='#2a5298',
-                    opacity=0.85,
-                    line=dict(color='#1e3c72', width=1)
-                )
-            ))
-            fig2.add_vrect(
-                x0=z_score,
-                x1=z_score,
-                fillcolor="#ff6b6b",
-                opacity=0.3,
-                layer="below",
-                line_width=0
-            )
-            fig2.add_vline(
-                x=z_score,
-                line_dash="dash",
-                line_color="#ff0000",
-                line_width=4,
-                annotation_text=f"<b>THRESHOLD</b><br>Z = {z_score}",
-                annotation=dict(
-                    font=dict(size=14, color="#ffffff", family="Arial Black"),
-                    bgcolor="#ff0000",
-                    bordercolor="#cc0000",
-                    borderwidth=3,
-                    borderpad=8
-                )
-            )
-            fig2.update_layout(
-                title=dict(
-                    text="Z-Score Distribution",
-                    font=dict(size=16, color='#1a1a1a', family='Arial Black')
-                ),
-                xaxis=dict(
-                    title=dict(text="Z-Score", font=dict(size=12, color='#1a1a1a', family='Arial')),
-                    gridcolor='#e0e0e0',
-                    gridwidth=1,
-                    showgrid=True
-                ),
-                yaxis=dict(
-                    title=dict(text="Frequency", font=dict(size=12, color='#1a1a1a', family='Arial')),
-                    gridcolor='#e0e0e0',
-                    gridwidth=1,
-                    showgrid=True
-                ),
-                template="plotly_white",
-                height=450,
-                plot_bgcolor='white',
-                paper_bgcolor='white',
-                font=dict(family="Arial", size=11, color='#1a1a1a')
-            )
-            st.plotly_chart(fig2, use_container_width=True)
-        
-        with col2:
-            fig3 = go.Figure()
-            fig3.add_trace(go.Scatter(
-                x=detector.df.index,
-                y=detector.df['Z_Score'],
-                mode='lines',
-                name='Z-Score Over Time',
-                line=dict(
-                    color='#2a5298',
-                    width=2.5,
-                    shape='linear'
-                ),
-                fill='tozeroy',
-                fillcolor='rgba(42, 82, 152, 0.2)'
-            ))
-            fig3.add_hrect(
-                y0=z_score,
-                y1=z_score,
-                fillcolor="#ff6b6b",
-                opacity=0.3,
-                layer="below",
-                line_width=0
-            )
-            fig3.add_hline(
-                y=z_score,
-                line_dash="dash",
-                line_color="#ff0000",
-                line_width=4,
-                annotation_text=f"<b>THRESHOLD</b><br>Z = {z_score}",
-                annotation=dict(
-                    font=dict(size=14, color="#ffffff", family="Arial Black"),
-                    bgcolor="#ff0000",
-                    bordercolor="#cc0000",
-                    borderwidth=3,
-                    borderpad=8
-                )
-            )
-            fig3.update_layout(
-                title=dict(
-                    text="Z-Score Timeline",
-                    font=dict(size=16, color='#1a1a1a', family='Arial Black')
-                ),
-                xaxis=dict(
-                    title=dict(text="Date", font=dict(size=12, color='#1a1a1a', family='Arial')),
-                    gridcolor='#e0e0e0',
-                    gridwidth=1,
-                    showgrid=True
-                ),
-                yaxis=dict(
-                    title=dict(text="Z-Score", font=dict(size=12, color='#1a1a1a', family='Arial')),
-                    gridcolor='#e0e0e0',
-                    gridwidth=1,
-                    showgrid=True
-                ),
-                template="plotly_white",
-                height=450,
-                plot_bgcolor='white',
-                paper_bgcolor='white',
-                font=dict(family="Arial", size=11, color='#1a1a1a')
-            )
-            st.plotly_chart(fig3, use_container_width=True)
-        
-        # Raw Data
-        with st.expander("📋 View Raw Data"):
-            st.dataframe(detector.df, use_container_width=True, height=300)
+    else:
+        st.info("ℹ️ No anomalies detected with current settings. Try adjusting the Z-score threshold or pre-event window.")
+
+
+def zoomable_chart(name, figure, analysis_key, detector):
+    """
+    Time-series chart that redraws the selected range at finer resolution
+    
+    Plotly zoom happens in the browser on the points already sent, which are
+    downsampled for long ranges. Box-selecting a range instead reruns the
+    calling fragment with that range as the view, so the server downsamples
+    only the visible bars; "Reset zoom" returns to the full range. Views are
+    kept per chart in session state and dropped when the analysis changes.
+    
+    Args:
+        name: Chart name, unique on the page
+        figure: Cached figure builder taking (analysis_key, detector, view)
+        analysis_key: Key of the analysis being shown
+        detector: AnomalyDetector with results
+    """
+    views = st.session_state.setdefault('chart_views', {})
+    stored = views.get(name)
+    if stored is not None and stored[0] != analysis_key:
+        del views[name]
+        stored = None
+    view = stored[1] if stored else None
+    
+    # A new key per zoom change and analysis starts with an empty selection
+    key = f"{name}_{st.session_state.setdefault('chart_serial', 0)}_{hash(analysis_key)}"
+    
+    # Callbacks run before the fragment reruns, so the new view draws at once
+    def zoom():
+        boxes = st.session_state[key].selection.box
+        if boxes:
+            views[name] = (analysis_key, tuple(sorted(pd.to_datetime(boxes[0]['x']))))
+            st.session_state.chart_serial += 1
+    
+    def reset():
+        views.pop(name, None)
+        st.session_state.chart_serial += 1
+    
+    st.plotly_chart(
+        figure(analysis_key, detector, view),
+        use_container_width=True,
+        key=key,
+        on_select=zoom,
+        selection_mode="box"
+    )
+    if view is not None:
+        st.caption(f"Showing {view[0]:%Y-%m-%d %H:%M} to {view[1]:%Y-%m-%d %H:%M}")
+        st.button("Reset zoom", key=f"{name}_reset", on_click=reset)
+
+
+@st.fragment
+@section_timer('Volume chart')
+def volume_chart_section(analysis_key, detector):
+    """Volume chart with anomaly and event-day markers"""
+    
+    # Visualizations
+    st.markdown("---")
+    st.markdown("### 📊 Interactive Visualizations")
+    st.markdown("Interactive charts help you visualize trading patterns and anomalies. The volume chart shows daily trading volume with anomaly markers (red diamonds) and event days (green triangles). Drag across a chart to zoom into that range at full detail.")
+    
+    # Volume Chart with high contrast
+    zoomable_chart('volume_chart', volume_chart, analysis_key, detector)
+
 
+@st.fragment
+@section_timer('Z-score charts')
+def z_score_section(analysis_key, detector):
+    """Z-score distribution, timeline and sensitivity heatmap"""
+    
+    # Z-Score Distribution
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.plotly_chart(z_score_histogram(analysis_key, detector), use_container_width=True)
+    
+    with col2:
+        zoomable_chart('z_score_timeline', z_score_timeline, analysis_key, detector)
+    
+    # Sensitivity to the detection settings
+    with st.expander("🎛️ Sensitivity Analysis"):
+        st.markdown("Anomaly counts for every Z-score threshold and pre-event window combination, computed in a single pass.")
+        st.plotly_chart(sensitivity_heatmap(analysis_key, detector), use_container_width=True)
+
+
+@st.fragment
+@section_timer('Raw data')
+def raw_data_section(analysis_key, detector):
+    """Bars with the result columns"""
+    
+    # Raw Data
+    with st.expander("📋 View Raw Data"):
+        st.dataframe(data_with_anomalies(analysis_key, detector), use_container_width=True, height=300)
+
+
+def display_analysis(df, pre_event_window, z_score, data_key):
+    """
+    Display analysis results
+    
+    Each section is a fragment: a widget inside one reruns only that section,
+    not the whole page (theme CSS, configuration and every chart).
+    """
+    
+    event_dates_section(df, pre_event_window, z_score, data_key)
+    
+    if st.session_state.analysis_complete and st.session_state.detector:
+        detector = st.session_state.detector
+        analysis_key = st.session_state.analysis_key
+        results_section(analysis_key, detector, pre_event_window, z_score)
+        volume_chart_section(analysis_key, detector)
+        z_score_section(analysis_key, detector)
+        raw_data_section(analysis_key, detector)
+
+@section_timer('Full run')
 def main():
     """Main application function"""
     
-    # Apply theme CSS
-    if st.session_state.dark_mode:
-        apply_dark_theme()
-    else:
-        apply_light_theme()
+    # Apply theme (sent once per session and on toggles)
+    apply_theme()
     
     # Route to appropriate page
     if st.session_state.current_page == 'welcome':
@@ -0,0 +1,622 @@
+"""
+Baselines Module for FIN-SIGHT
+Running volume statistics with constant-time updates per bar
+"""
+
+import math
+from bisect import bisect_left, insort
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# Bars needed before a standard deviation (and so a z-score) exists
+MIN_PERIODS = 2
+
+# Scales the median absolute deviation to a standard deviation for normal data
+MAD_SCALE = 1.4826
+
+
+# Standard deviations at or below this fraction of the mean are rounding
+# noise (e.g. a flat stretch of bars) and give no baseline
+STD_RTOL = 1e-9
+
+# A removal that cancels more than this share of the squared deviations
+# (a spike leaving the window) triggers an exact recompute of the moments
+CANCELLATION = 0.999
+
+# Bars merged per vectorized step when extending expanding moments
+EXTEND_CHUNK = 4096
+
+
+def _usable_std(std, counts, means):
+    """
+    NaN below MIN_PERIODS bars and where the spread is indistinguishable
+    from zero, like the MAD of RollingMedian, so flat stretches never give
+    infinite z-scores
+    """
+    with np.errstate(invalid='ignore'):
+        return np.where((counts >= MIN_PERIODS) & (std > STD_RTOL * np.abs(means)), std, np.nan)
+
+
+def _sample_std(m2, counts, means):
+    """Sample standard deviation from sums of squared deviations (see _usable_std)"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.sqrt(np.maximum(m2, 0.0) / (counts - 1))
+    return _usable_std(std, counts, means)
+
+
+def _valid_priors(valid, means, stds):
+    """
+    Baseline of each bar from the stats after each valid bar
+
+    `means` and `stds` hold the state before the batch at position 0 and
+    after each valid bar from there on; NaN bars are skipped, so every bar
+    is scored against the state as of the last valid bar before it.
+    """
+    before = np.cumsum(valid) - valid
+    return np.asarray(means)[before], np.asarray(stds)[before]
+
+
+def _window_moments(values, window):
+    """
+    Count, mean and sum of squared deviations of every trailing window
+
+    The window ending at each position is the tail of one `window`-long
+    block plus the head of the next. Both parts come from cumulative sums
+    within their own block, taken about the block's median, and are merged
+    with Chan et al.'s pairwise update, so bars that have left the window
+    never enter the arithmetic and spikes cannot cancel a later flat
+    stretch down to zero.
+
+    Returns:
+        Arrays of (count, mean, M2) for the windows ending at each position
+    """
+    n = len(values)
+    blocks = np.full(-(-n // window) * window, np.nan)
+    blocks[:n] = values
+    blocks = blocks.reshape(-1, window)
+    ref = np.nanmedian(blocks, axis=1)
+    d = np.nan_to_num(blocks - ref[:, None])
+    head1 = np.cumsum(d, axis=1).ravel()
+    head2 = np.cumsum(d * d, axis=1).ravel()
+    tail1 = np.cumsum(d[:, ::-1], axis=1)[:, ::-1].ravel()
+    tail2 = np.cumsum((d * d)[:, ::-1], axis=1)[:, ::-1].ravel()
+    ref = np.repeat(ref, window)
+
+    last = np.arange(n)
+    first = np.maximum(last + 1 - window, 0)
+    split = last // window * window
+    # Head of the last block: [split, last]
+    n_head = last + 1 - split
+    mean_head = ref[last] + head1[last] / n_head
+    m2_head = head2[last] - head1[last] ** 2 / n_head
+    # Tail of the block before it, if the window reaches back: [first, split)
+    n_tail = split - first
+    crosses = n_tail > 0
+    at = np.where(crosses, first, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_tail = ref[at] + tail1[at] / n_tail
+        m2_tail = tail2[at] - tail1[at] ** 2 / n_tail
+
+    counts = n_head + n_tail
+    delta = np.where(crosses, mean_head - mean_tail, 0.0)
+    means = np.where(crosses, mean_head - delta * n_tail / counts, mean_head)
+    m2 = np.where(crosses, m2_head + m2_tail + delta * delta * n_tail * n_head / counts, m2_head)
+    return counts, means, np.maximum(m2, 0.0)
+
+
+class ExpandingMoments:
+    """
+    Mean and sample standard deviation of every bar seen so far
+
+    Single bars are added with Welford's update; batches are merged into the
+    running moments chunk by chunk (Chan et al.), each chunk measured from
+    the running mean at its start. NaN bars are skipped.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._mean = 0.0
+        self.m2 = 0.0
+
+    @property
+    def mean(self):
+        return self._mean if self.count else np.nan
+
+    @property
+    def std(self):
+        return float(_sample_std(self.m2, self.count, self._mean))
+
+    def update(self, x):
+        """
+        Add one bar
+
+        Returns:
+            (mean, std) of the bars before it, i.e. the baseline it is scored against
+        """
+        prior = (self.mean, self.std)
+        if x == x:
+            self.count += 1
+            delta = x - self._mean
+            self._mean += delta / self.count
+            self.m2 += delta * (x - self._mean)
+        return prior
+
+    def extend(self, values):
+        """
+        Add a batch of bars
+
+        Returns:
+            Arrays of (mean, std) of the bars before each new bar
+        """
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        means, m2s, counts = [[self.mean]], [[self.m2]], [[self.count]]
+        present = values[valid]
+        for start in range(0, len(present), EXTEND_CHUNK):
+            chunk = present[start:start + EXTEND_CHUNK]
+            ref = self._mean if self.count else chunk[0]
+            d = chunk - ref
+            s1 = np.cumsum(d)
+            chunk_counts = self.count + np.arange(1, len(chunk) + 1)
+            chunk_m2 = np.maximum(self.m2 + np.cumsum(d * d) - s1 * s1 / chunk_counts, 0.0)
+            chunk_means = ref + s1 / chunk_counts
+            means.append(chunk_means)
+            m2s.append(chunk_m2)
+            counts.append(chunk_counts)
+            self.count = int(chunk_counts[-1])
+            self._mean = float(chunk_means[-1])
+            self.m2 = float(chunk_m2[-1])
+
+        means, m2s, counts = (np.concatenate(x) for x in (means, m2s, counts))
+        return _valid_priors(valid, means, _sample_std(m2s, counts, means))
+
+
+class RollingMoments:
+    """
+    Mean and sample standard deviation of the last `window` bars
+
+    Values live in a ring buffer; each new bar replaces the oldest one with a
+    Welford-style add/remove update, so memory and time per bar are constant.
+    The moments are recomputed from the buffer once per window, and whenever
+    a removal cancels nearly all of the spread, so rounding error from
+    removed bars cannot build up. Batches use _window_moments.
+    NaN bars are skipped.
+    """
+
+    def __init__(self, window=20):
+        if window < MIN_PERIODS:
+            raise ValueError(f"Rolling window must be at least {MIN_PERIODS} bars")
+        self.window = int(window)
+        self.buffer = np.empty(self.window)
+        self.head = 0
+        self.count = 0
+        self._mean = 0.0
+        self.m2 = 0.0
+
+    @property
+    def mean(self):
+        return self._mean if self.count else np.nan
+
+    @property
+    def std(self):
+        return float(_sample_std(self.m2, self.count, self._mean))
+
+    def values(self):
+        """Buffered bars, oldest first"""
+        if self.count < self.window:
+            return self.buffer[:self.count].copy()
+        return np.roll(self.buffer, -self.head)
+
+    def _reseed(self, values):
+        """Reset the ring buffer and moments to the newest bars, oldest first"""
+        tail = values[-self.window:]
+        self.count = len(tail)
+        self.buffer[:self.count] = tail
+        self.head = self.count % self.window
+        self._mean = float(tail.mean()) if self.count else 0.0
+        self.m2 = float(((tail - self._mean) ** 2).sum())
+
+    def update(self, x):
+        """
+        Add one bar, dropping the oldest one once the window is full
+
+        Returns:
+            (mean, std) of the window before it, i.e. the baseline it is scored against
+        """
+        prior = (self.mean, self.std)
+        if x != x:
+            return prior
+        cancelled = False
+        if self.count < self.window:
+            self.count += 1
+            delta = x - self._mean
+            self._mean += delta / self.count
+            self.m2 += delta * (x - self._mean)
+        else:
+            old = float(self.buffer[self.head])
+            old_mean, old_m2 = self._mean, self.m2
+            self._mean += (x - old) / self.window
+            self.m2 += (x - old) * (x - self._mean + old - old_mean)
+            cancelled = self.m2 < (1 - CANCELLATION) * old_m2
+        self.buffer[self.head] = x
+        self.head = (self.head + 1) % self.window
+        if self.head == 0 or cancelled:
+            self._reseed(self.values())
+        return prior
+
+    def extend(self, values):
+        """
+        Add a batch of bars
+
+        Returns:
+            Arrays of (mean, std) of the window before each new bar
+        """
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        history = self.values()
+        full = np.concatenate((history, values[valid]))
+        # Windows ending at each new bar, after the state before the batch
+        counts, means, m2 = _window_moments(full, self.window)
+        known = len(history)
+        means = np.concatenate(([self.mean], means[known:]))
+        stds = np.concatenate(([self.std], _sample_std(m2[known:], counts[known:], means[1:])))
+
+        self._reseed(full)
+        return _valid_priors(valid, means, stds)
+
+
+class EwmMoments:
+    """
+    Exponentially weighted mean and standard deviation
+
+    Uses West's incremental update; the weighted variance is the biased
+    (population) estimate, like pandas' ewm(adjust=False).var(bias=True).
+    NaN bars are skipped.
+    """
+
+    def __init__(self, span=20, alpha=None):
+        if alpha is None:
+            if span < 1:
+                raise ValueError("EWM span must be at least 1")
+            alpha = 2.0 / (span + 1.0)
+        self.alpha = float(alpha)
+        self.count = 0
+        self._mean = 0.0
+        self.var = 0.0
+
+    @property
+    def mean(self):
+        return self._mean if self.count else np.nan
+
+    @property
+    def std(self):
+        return float(_usable_std(math.sqrt(self.var), self.count, self._mean))
+
+    def update(self, x):
+        """
+        Add one bar
+
+        Returns:
+            (mean, std) before it, i.e. the baseline it is scored against
+        """
+        prior = (self.mean, self.std)
+        if x != x:
+            return prior
+        if self.count == 0:
+            self._mean, self.var = float(x), 0.0
+        else:
+            diff = x - self._mean
+            incr = self.alpha * diff
+            self._mean += incr
+            self.var = (1 - self.alpha) * (self.var + diff * incr)
+        self.count += 1
+        return prior
+
+    def extend(self, values):
+        """
+        Add a batch of bars
+
+        Returns:
+            Arrays of (mean, std) before each new bar
+        """
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        if not valid.any():
+            return _valid_priors(valid, [self.mean], [self.std])
+        prior = (self.mean, self.std)
+        values = values[valid]
+
+        # The mean follows a linear recurrence, and so does the variance
+        # given each bar's distance from the previous mean:
+        #   var_t = (1 - a) * var_{t-1} + a * ((1 - a) * diff_t ** 2)
+        # Both run through pandas' compiled EWM with the current state
+        # prepended as the seed; every term is non-negative, so nothing cancels.
+        seed_mean = self._mean if self.count else values[0]
+
+        def smooth(x):
+            return pd.Series(x).ewm(alpha=self.alpha, adjust=False).mean().to_numpy()[1:]
+
+        means = smooth(np.concatenate(([seed_mean], values)))
+        diff = values - np.concatenate(([seed_mean], means[:-1]))
+        variances = smooth(np.concatenate(([self.var], (1 - self.alpha) * diff * diff)))
+
+        counts = self.count + np.arange(1, len(values) + 1)
+        stds = _usable_std(np.sqrt(variances), counts, means)
+
+        self.count += len(values)
+        self._mean = float(means[-1])
+        self.var = float(variances[-1])
+        return _valid_priors(valid, np.concatenate(([prior[0]], means)),
+                             np.concatenate(([prior[1]], stds)))
+
+
+def median_mad(values):
+    """
+    Median and scaled median absolute deviation, ignoring NaN
+
+    Returns:
+        (median, MAD_SCALE * MAD); the scale is NaN when there is no spread
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if len(values) < MIN_PERIODS:
+        return np.nan, np.nan
+    median = float(np.median(values))
+    mad = float(np.median(np.abs(values - median)))
+    return median, (MAD_SCALE * mad if mad > 0 else np.nan)
+
+
+def _median(window):
+    """Median of a sorted list"""
+    n = len(window)
+    half = n // 2
+    return window[half] if n % 2 else (window[half - 1] + window[half]) / 2
+
+
+def _mad(window, median):
+    """
+    Median absolute deviation of a sorted list from its median
+
+    The distances below and above the median form two sorted runs, so the
+    middle distance is found by binary search over how many come from the
+    lower run, in O(log n) instead of sorting the deviations.
+    """
+    n = len(window)
+    split = bisect_left(window, median)
+    above = n - split
+    k = (n - 1) // 2
+    lo, hi = max(0, k + 1 - above), min(k + 1, split)
+    while lo < hi:
+        taken = (lo + hi) // 2
+        if median - window[split - 1 - taken] < window[split + k - taken] - median:
+            lo = taken + 1
+        else:
+            hi = taken
+    below, upper = lo, k + 1 - lo
+    kth = max(median - window[split - below] if below else -math.inf,
+              window[split + upper - 1] - median if upper else -math.inf)
+    if n % 2:
+        return kth
+    following = min(median - window[split - 1 - below] if below < split else math.inf,
+                    window[split + upper] - median if upper < above else math.inf)
+    return (kth + following) / 2
+
+
+class RollingMedian:
+    """
+    Median and scaled median absolute deviation of the last `window` bars
+
+    The window is kept sorted with bisect, so each new bar costs one
+    insertion and one removal; the median is then a lookup and the MAD a
+    binary search over the sorted window (see _mad), both exact. Batches run
+    the same update in a tight loop. `mean` and `std` return the median and
+    scaled MAD so it can stand in for the moment trackers. NaN bars are
+    skipped.
+    """
+
+    def __init__(self, window=20):
+        if window < MIN_PERIODS:
+            raise ValueError(f"Rolling window must be at least {MIN_PERIODS} bars")
+        self.window = int(window)
+        self.sorted = []
+        self.fifo = deque()
+
+    @property
+    def count(self):
+        return len(self.fifo)
+
+    @property
+    def mean(self):
+        return _median(self.sorted) if self.sorted else np.nan
+
+    @property
+    def std(self):
+        if len(self.sorted) < MIN_PERIODS:
+            return np.nan
+        mad = _mad(self.sorted, _median(self.sorted))
+        return MAD_SCALE * mad if mad > 0 else np.nan
+
+    def update(self, x):
+        """
+        Add one bar, dropping the oldest one once the window is full
+
+        Returns:
+            (median, scaled MAD) of the window before it
+        """
+        prior = (self.mean, self.std)
+        if x == x:
+            if len(self.fifo) == self.window:
+                del self.sorted[bisect_left(self.sorted, self.fifo.popleft())]
+            self.fifo.append(x)
+            insort(self.sorted, x)
+        return prior
+
+    def extend(self, values):
+        """
+        Add a batch of bars
+
+        Returns:
+            Arrays of (median, scaled MAD) of the window before each new bar
+        """
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        window, fifo, ordered = self.window, self.fifo, self.sorted
+        # Stats after each valid bar; position 0 is the window before the batch
+        medians = [self.mean]
+        mads = [_mad(ordered, medians[0]) if len(ordered) >= MIN_PERIODS else np.nan]
+        for x in values[valid].tolist():
+            if len(fifo) == window:
+                del ordered[bisect_left(ordered, fifo.popleft())]
+            fifo.append(x)
+            insort(ordered, x)
+            median = _median(ordered)
+            medians.append(median)
+            mads.append(_mad(ordered, median) if len(ordered) >= MIN_PERIODS else np.nan)
+
+        mads = np.asarray(mads)
+        with np.errstate(invalid='ignore'):
+            scales = np.where(mads > 0, MAD_SCALE * mads, np.nan)
+        # Each bar is scored against the window as of the last valid bar before it
+        before = np.cumsum(valid) - valid
+        return np.asarray(medians)[before], scales[before]
+
+
+DAY_NS = 86_400_000_000_000
+MINUTE_NS = 60_000_000_000
+MINUTES_PER_DAY = 1440
+
+
+class VolumeProfile:
+    """
+    Per-time-of-day (optionally per-weekday) volume mean and standard deviation
+
+    Intraday volume is U-shaped across the session, so each bar is scored
+    against the bars at the same minute of the day (and the same weekday)
+    instead of the whole series. Bars are bucketed by integer key and every
+    bucket's moments come from one bincount pass; later batches are merged
+    in with Chan et al.'s pairwise update, so extending the profile costs
+    time proportional to the new bars only. Daily bars all share one
+    time-of-day bucket, which reduces to the global baseline (or a
+    day-of-week profile with by_weekday).
+    """
+
+    def __init__(self, by_weekday=False):
+        self.by_weekday = bool(by_weekday)
+        size = MINUTES_PER_DAY * (7 if self.by_weekday else 1)
+        self.counts = np.zeros(size, dtype=np.int64)
+        self.means = np.zeros(size)
+        self.m2 = np.zeros(size)
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    @property
+    def mean(self):
+        n = self.count
+        return float(self.counts @ self.means / n) if n else np.nan
+
+    @property
+    def std(self):
+        """Pooled sample standard deviation over every bucket"""
+        n = self.count
+        if n < MIN_PERIODS:
+            return np.nan
+        m2 = self.m2.sum() + self.counts @ (self.means - self.mean) ** 2
+        return math.sqrt(max(m2, 0.0) / (n - 1))
+
+    def copy(self):
+        profile = VolumeProfile.__new__(VolumeProfile)
+        profile.by_weekday = self.by_weekday
+        profile.counts = self.counts.copy()
+        profile.means = self.means.copy()
+        profile.m2 = self.m2.copy()
+        return profile
+
+    def keys(self, timestamps):
+        """Bucket of each timestamp: minute of the day, offset by weekday"""
+        minutes = pd.DatetimeIndex(timestamps).values.astype('datetime64[m]').view(np.int64)
+        keys = minutes % MINUTES_PER_DAY
+        if self.by_weekday:
+            # The epoch fell on a Thursday; Monday is weekday 0
+            keys += (minutes // MINUTES_PER_DAY + 3) % 7 * MINUTES_PER_DAY
+        return keys
+
+    def extend(self, timestamps, values, keys=None):
+        """Add a batch of bars (NaN volumes are skipped)"""
+        values = np.asarray(values, dtype=np.float64)
+        keys = self.keys(timestamps) if keys is None else keys
+        valid = ~np.isnan(values)
+        if not valid.all():
+            keys, values = keys[valid], values[valid]
+        if len(values) == 0:
+            return
+
+        size = len(self.counts)
+        counts = np.bincount(keys, minlength=size)
+        seen = counts > 0
+        means = np.zeros(size)
+        means[seen] = np.bincount(keys, weights=values, minlength=size)[seen] / counts[seen]
+        m2 = np.bincount(keys, weights=(values - means[keys]) ** 2, minlength=size)
+
+        # Merge the batch's bucket moments into the running ones
+        total = self.counts + counts
+        delta = means - self.means
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(seen, counts / total, 0.0)
+        self.m2 += m2 + delta * delta * self.counts * weight
+        self.means += delta * weight
+        self.counts = total
+
+    def table(self):
+        """
+        Per-bucket baseline
+
+        Returns:
+            Arrays of (mean, std) per bucket; NaN where the bucket has fewer
+            than MIN_PERIODS bars or no spread
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(np.maximum(self.m2, 0.0) / (self.counts - 1))
+        mean = np.where(self.counts > 0, self.means, np.nan)
+        std = np.where((self.counts >= MIN_PERIODS) & (std > 0), std, np.nan)
+        return mean, std
+
+    def score(self, timestamps, keys=None):
+        """
+        Profile baseline of each bar's bucket
+
+        Returns:
+            Arrays of (mean, std) per bar, as in table()
+        """
+        keys = self.keys(timestamps) if keys is None else keys
+        mean, std = self.table()
+        return mean[keys], std[keys]
+
+
+BASELINE_METHODS = ['global', 'expanding', 'rolling', 'ewm', 'median', 'rolling_median']
+
+
+def make_moments(method='global', window=20, span=20):
+    """
+    Create the running-moments tracker for a baseline method
+
+    Args:
+        method: 'global' or 'expanding' (all bars), 'rolling' (last `window`
+                bars), 'ewm' (exponentially weighted with `span`) or
+                'rolling_median' (median/MAD of the last `window` bars)
+        window: Bars in a rolling baseline
+        span: Span of an exponentially weighted baseline
+    """
+    if method in ('global', 'expanding'):
+        return ExpandingMoments()
+    if method == 'rolling':
+        return RollingMoments(window)
+    if method == 'ewm':
+        return EwmMoments(span)
+    if method == 'rolling_median':
+        return RollingMedian(window)
+    if method == 'median':
+        raise ValueError("The global median baseline has no incremental tracker")
+    raise ValueError(f"Unsupported baseline method: {method}")
@@ -0,0 +1,506 @@
+"""
+Benchmarks for FIN-SIGHT
+Run with: python benchmarks.py [name ...]   (no names runs everything)
+"""
+
+import os
+import sys
+import time
+import json
+import tempfile
+import numpy as np
+import pandas as pd
+from alpha_vantage_stub import AlphaVantageStub, synthetic_time_series
+from anomaly_detector import AnomalyDetector
+from data_collector import AlphaVantageTransport, StockDataCollector, decode_time_series, OHLCV_COLUMNS
+from market_store import MarketDataStore
+from panel_detector import PanelAnomalyDetector
+from streaming_detector import StreamingAnomalyDetector
+from baselines import MAD_SCALE, RollingMedian
+from trading_calendar import NYSEHolidayCalendar, get_calendar
+from downsampling import DEFAULT_MAX_POINTS, downsample, window_positions
+from pyramid import DataPyramid
+
+
+def _best_of(fn, repeat=5):
+    """Return the best wall time of several runs, in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _legacy_decode(series):
+    """The original transpose-and-astype path, kept as the baseline"""
+    df = pd.DataFrame(series).T
+    df.index = pd.to_datetime(df.index)
+    df.columns = OHLCV_COLUMNS
+    df = df.astype(float)
+    return df.sort_index()
+
+
+def _legacy_detect(df, event_dates, pre_event_window=3, z_score=3):
+    """The original per-event masking loop, kept as the baseline"""
+    df = df.copy()
+    volume = df['Volume']
+    avg, std = volume.mean(), volume.std()
+    threshold = avg + z_score * std
+    df['Is_Anomaly'] = False
+    df['Event_Day'] = False
+    df['Event_Type'] = ''
+    df['Anomaly_Score'] = 0.0
+    df['Z_Score'] = (volume - avg) / std
+    for event_date in event_dates:
+        if event_date in df.index:
+            df.loc[event_date, 'Event_Day'] = True
+        window_end = event_date - pd.Timedelta(days=1)
+        window_start = event_date - pd.Timedelta(days=pre_event_window)
+        mask = (df.index >= window_start) & (df.index <= window_end)
+        window_data = df[mask]
+        if not window_data.empty:
+            anomaly_indices = window_data[window_data['Volume'] > threshold].index
+            if not anomaly_indices.empty:
+                df.loc[anomaly_indices, 'Is_Anomaly'] = True
+                df.loc[anomaly_indices, 'Anomaly_Score'] = (df.loc[anomaly_indices, 'Volume'] - avg) / std
+    return df
+
+
+def _minute_bars(bars, seed=0):
+    """Synthetic 1-minute bars, 09:30-16:00 on business days"""
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range('2000-01-03', periods=-(-bars // 390))
+    offsets = pd.to_timedelta(570 + np.arange(390), unit='min')
+    index = pd.DatetimeIndex((days.values[:, None] + offsets.values[None, :]).ravel()[:bars])
+    volume = rng.lognormal(10, 0.5, bars).astype(np.int64)
+    spikes = rng.random(bars) < 0.001
+    volume[spikes] *= 20
+    return pd.DataFrame({'Close': 100 + np.cumsum(rng.normal(0, 0.01, bars)), 'Volume': volume},
+                        index=index)
+
+
+def bench_detect(bars=1_000_000, events=10_000, legacy_sample=50):
+    """Event-window detection on minute bars: per-event loop vs interval union"""
+    rng = np.random.default_rng(1)
+    df = _minute_bars(bars)
+    days = df.index.normalize().unique()
+    event_dates = pd.DatetimeIndex(np.sort(rng.choice(days.values, events)))
+
+    detector = AnomalyDetector(df)
+    new = _best_of(lambda: detector.detect_anomalies(event_dates), repeat=3)
+
+    # The legacy loop is far too slow for every event; time a sample and extrapolate
+    sample = event_dates[:legacy_sample]
+    legacy = _best_of(lambda: _legacy_detect(df, sample), repeat=1) * events / legacy_sample
+
+    # Output must match the original exactly
+    columns = ['Is_Anomaly', 'Event_Day', 'Event_Type', 'Anomaly_Score', 'Z_Score']
+    small = df.iloc[:200_000]
+    small_events = event_dates[event_dates <= small.index[-1]]
+    expected = _legacy_detect(small, small_events)[columns]
+    actual = AnomalyDetector(small).detect_anomalies(small_events)[columns]
+    for column in ['Is_Anomaly', 'Event_Day']:
+        pd.testing.assert_series_equal(actual[column], expected[column])
+    # Scores are kept as float32
+    for column in ['Anomaly_Score', 'Z_Score']:
+        pd.testing.assert_series_equal(actual[column], expected[column], check_dtype=False, rtol=1e-6)
+
+    print(f"detect ({bars:,} minute bars, {events:,} events)")
+    print(f"  legacy per-event loop (extrapolated): {legacy / 1000:8.2f} s")
+    print(f"  searchsorted interval union:          {new / 1000:8.2f} s  ({legacy / new:,.0f}x)")
+    print(f"  output identical on {len(small):,} bars / {len(small_events):,} events")
+
+
+def bench_stream(bars=1_000_000, events=2_000, batch=1_000):
+    """Push minute bars through StreamingAnomalyDetector one at a time and in micro-batches"""
+    rng = np.random.default_rng(1)
+    df = _minute_bars(bars)
+    event_dates = np.sort(rng.choice(df.index.normalize().unique().values, events))
+    ts = df.index.values.astype('datetime64[ns]').view(np.int64).tolist()
+    volume = df['Volume'].tolist()
+
+    detector = StreamingAnomalyDetector(event_dates)
+    push = detector.push
+    start = time.perf_counter()
+    single = sum(len(push(bar)) for bar in zip(ts, volume))
+    single_s = time.perf_counter() - start
+
+    detector = StreamingAnomalyDetector(event_dates)
+    start = time.perf_counter()
+    batched = sum(len(detector.push(df.iloc[i:i + batch])) for i in range(0, bars, batch))
+    batch_s = time.perf_counter() - start
+
+    print(f"stream ({bars:,} minute bars, {events:,} events)")
+    print(f"  push one bar at a time:   {bars / single_s:12,.0f} bars/s  ({single} anomalies)")
+    print(f"  push {batch:,}-bar batches: {bars / batch_s:12,.0f} bars/s  ({batched} anomalies)")
+
+
+def bench_panel(symbols=2_000, days=1_000, events_per_symbol=8):
+    """Scan a universe: one AnomalyDetector per symbol vs one PanelAnomalyDetector"""
+    rng = np.random.default_rng(2)
+    dates = pd.bdate_range(end='2024-06-28', periods=days)
+    names = [f'SYM{i:04d}' for i in range(symbols)]
+    wide = pd.DataFrame(rng.lognormal(15, 0.5, (days, symbols)).round(), index=dates, columns=names)
+    events = {name: dates[rng.integers(5, days, events_per_symbol)] for name in names}
+
+    def per_symbol():
+        return {name: AnomalyDetector(wide[[name]].rename(columns={name: 'Volume'}))
+                .detect_anomalies(events[name])['Is_Anomaly'] for name in names}
+
+    def panel():
+        return PanelAnomalyDetector(wide).detect_anomalies(events)
+
+    loop = _best_of(per_symbol, repeat=1)
+    vectorized = _best_of(panel, repeat=3)
+    flags = panel()
+    assert all((flags[name].to_numpy() == column.to_numpy()).all()
+               for name, column in per_symbol().items())
+
+    print(f"panel ({symbols:,} symbols x {days:,} days, {events_per_symbol} events each)")
+    print(f"  AnomalyDetector per symbol: {loop:9.1f} ms")
+    print(f"  PanelAnomalyDetector:       {vectorized:9.1f} ms  ({loop / vectorized:.0f}x, "
+          f"{int(flags.to_numpy().sum())} anomalies, identical flags)")
+
+
+def _exact_rolling_median(volume, window):
+    """Median and scaled MAD of every window with np.median, independent of RollingMedian"""
+    series = pd.Series(volume)
+    median = series.rolling(window, min_periods=1).apply(np.median, raw=True)
+    mad = series.rolling(window, min_periods=2).apply(
+        lambda x: np.median(np.abs(x - np.median(x))), raw=True
+    )
+    scale = (MAD_SCALE * mad).where(mad > 0)
+    return median.shift(1).to_numpy(), scale.shift(1).to_numpy()
+
+
+def bench_robust(bars=3_000_000, window=390, reference_sample=20_000, streamed=200_000):
+    """Rolling median/MAD baseline on minute bars: per-window np.median vs sorted window"""
+    volume = _minute_bars(bars)['Volume'].to_numpy(dtype=np.float64)
+
+    start = time.perf_counter()
+    median, scale = RollingMedian(window).extend(volume)
+    batch_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    exact_median, exact_scale = _exact_rolling_median(volume[:reference_sample], window)
+    exact_s = (time.perf_counter() - start) * bars / reference_sample
+
+    # Appends and streaming feed one bar at a time through the sorted window
+    tracker = RollingMedian(window)
+    tracker.extend(volume[:window])
+    start = time.perf_counter()
+    stats = [tracker.update(x) for x in volume[window:window + streamed].tolist()]
+    update_us = (time.perf_counter() - start) / streamed * 1e6
+
+    assert np.allclose(median[:reference_sample], exact_median, equal_nan=True)
+    assert np.allclose(scale[:reference_sample], exact_scale, equal_nan=True)
+    assert np.array_equal(np.array(stats), np.column_stack((median, scale))[window:window + streamed],
+                          equal_nan=True)
+
+    print(f"robust ({bars:,} minute bars, {window}-bar median/MAD window)")
+    print(f"  np.median per window (extrapolated): {exact_s:8.2f} s")
+    print(f"  RollingMedian.extend (batch):        {batch_s:8.2f} s  "
+          f"({exact_s / batch_s:.0f}x, {bars / batch_s:,.0f} bars/s, identical values)")
+    print(f"  RollingMedian.update (streaming):    {update_us:8.2f} us/bar, same values")
+
+
+def bench_seasonal(bars=1_000_000, z_score=3):
+    """Intraday baselines on U-shaped minute volume: global vs time-of-day profile"""
+    df = _minute_bars(bars)
+    minute = (df.index.hour * 60 + df.index.minute).to_numpy()
+    # Volume is about three times higher at the open and close than at midday
+    df['Volume'] = df['Volume'] * (1 + 8 * ((minute - 570) / 390 - 0.5) ** 2)
+    edges = (minute < 600) | (minute >= 930)
+
+    def flagged_at_edges(method, symbol=None):
+        detector = AnomalyDetector(df, symbol=symbol)
+        detector.calculate_baseline(z_score, method=method)
+        mean = detector.avg_volume if detector.baseline_mean is None else detector.baseline_mean
+        std = detector.std_dev_volume if detector.baseline_std is None else detector.baseline_std
+        above = df['Volume'].to_numpy() > mean + z_score * std
+        return above.sum(), (above & edges).sum(), detector
+
+    groupby = _best_of(lambda: df.groupby(minute)['Volume'].agg(['mean', 'std']), repeat=3)
+    build = _best_of(lambda: flagged_at_edges('seasonal'), repeat=3)
+    flagged_at_edges('seasonal', symbol='BENCH')
+    cached = _best_of(lambda: flagged_at_edges('seasonal', symbol='BENCH'), repeat=3)
+
+    _, _, detector = flagged_at_edges('seasonal')
+    stats = df.groupby(minute)['Volume'].agg(['mean', 'std'])
+    assert np.allclose(detector.baseline_mean, stats['mean'].reindex(minute).to_numpy())
+    assert np.allclose(detector.baseline_std, stats['std'].reindex(minute).to_numpy())
+
+    print(f"seasonal ({bars:,} U-shaped minute bars, z > {z_score})")
+    for method in ('global', 'seasonal'):
+        total, at_edges = flagged_at_edges(method)[:2]
+        print(f"  {method:8s} baseline: {total:7,} bars above threshold, "
+              f"{at_edges:7,} in the first/last 30 minutes")
+    print(f"  pandas groupby mean/std:         {groupby:8.1f} ms")
+    print(f"  VolumeProfile build and score:   {build:8.1f} ms (matches groupby)")
+    print(f"  cached profile for the symbol:   {cached:8.1f} ms")
+
+
+def bench_calendar(bars=1_000_000, events=10_000, window=3, legacy_sample=50):
+    """Trading-session windows: per-event business-day offsets vs the session bitmap"""
+    rng = np.random.default_rng(4)
+    df = _minute_bars(bars)
+    days = df.index.normalize().unique()
+    event_dates = pd.DatetimeIndex(np.sort(rng.choice(days.values, events)))
+
+    def legacy(events):
+        # Step back N exchange sessions from every event and mask the bars
+        session = pd.offsets.CustomBusinessDay(calendar=NYSEHolidayCalendar())
+        back = window * session
+        dates = df.index.normalize()
+        on_session = dates.isin([day for day in days if session.is_on_offset(day)])
+        mask = np.zeros(len(df), dtype=bool)
+        for event in events:
+            mask |= (dates >= event - back) & (dates < event) & on_session
+        return mask
+
+    calendar = get_calendar('NYSE')
+    build = _best_of(lambda: get_calendar.__wrapped__('NYSE'), repeat=1)
+    detector = AnomalyDetector(df, calendar=calendar)
+    detector.calculate_baseline(z_score=-np.inf)
+    new = _best_of(lambda: detector.detect_anomalies(event_dates, window), repeat=3)
+    slow = _best_of(lambda: legacy(event_dates[:legacy_sample]), repeat=1) * events / legacy_sample
+
+    sample = event_dates[:legacy_sample]
+    flags = detector.detect_anomalies(sample, window)['Is_Anomaly'].to_numpy()
+    assert np.array_equal(flags, legacy(sample))
+
+    print(f"calendar ({bars:,} minute bars, {events:,} events, {window} sessions)")
+    print(f"  build NYSE session bitmap:                {build / 1000:8.2f} s  (once per process)")
+    print(f"  per-event business-day offsets (extrap.): {slow / 1000:8.2f} s")
+    print(f"  session bitmap lookups:                   {new / 1000:8.2f} s  ({slow / new:,.0f}x)")
+    print(f"  flags identical for {legacy_sample} events")
+
+
+def _element_bytes(node):
+    """Serialized size of an AppTest element tree, split into (total, theme script)"""
+    total = theme = 0
+    proto = getattr(node, 'proto', None)
+    if proto is not None and hasattr(proto, 'ByteSize'):
+        total = proto.ByteSize()
+        if 'fin-sight-theme' in getattr(proto, 'body', ''):
+            theme = total
+    children = getattr(node, 'children', None)
+    for child in (children.values() if isinstance(children, dict) else ()):
+        child_total, child_theme = _element_bytes(child)
+        total += child_total
+        theme += child_theme
+    return total, theme
+
+
+def bench_theme(reruns=5):
+    """Bytes sent per rerun for the theme: inline CSS every run vs one stylesheet per session"""
+    from streamlit.testing.v1 import AppTest
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+    with open(os.path.join(os.path.dirname(app), 'static', 'theme.css'), 'rb') as f:
+        stylesheet = len(f.read())
+
+    at = AppTest.from_file(app, default_timeout=60)
+    runs = []
+    for run in range(reruns + 1):
+        if run == reruns:
+            at.session_state['dark_mode'] = True
+        start = time.perf_counter()
+        at.run()
+        runs.append(((time.perf_counter() - start) * 1000, *_element_bytes(at._tree)))
+
+    print(f"theme (welcome page, {reruns} reruns then a theme toggle)")
+    print(f"  stylesheet, fetched once per session and cached: {stylesheet:,} B (both themes)")
+    for label, (ms, total, theme) in zip(['first run'] + ['rerun'] * (reruns - 1) + ['toggle'], runs):
+        print(f"  {label:9s} {ms:7.1f} ms  {total:7,} B of elements, {theme:5,} B theme loader")
+
+
+def bench_downsample(bars=1_000_000, events=200, z_score=3, max_points=DEFAULT_MAX_POINTS):
+    """Volume and z-score chart payloads: every bar vs server-side downsampling"""
+    import plotly.graph_objects as go
+    rng = np.random.default_rng(5)
+    df = _minute_bars(bars)
+    days = df.index.normalize().unique()
+    detector = AnomalyDetector(df)
+    detector.detect_anomalies(pd.DatetimeIndex(np.sort(rng.choice(days.values, events))), z_score=z_score)
+    keep = np.union1d(detector.result.anomalies, detector.result.event_days)
+    x = df.index.values.astype('datetime64[ns]').view(np.int64)
+    volume = df['Volume'].to_numpy(dtype=np.float64)
+    z_scores = detector.result.z_scores
+
+    def payload(trace, rows):
+        start = time.perf_counter()
+        size = len(go.Figure(trace(x=df.index[rows], y=volume[rows])).to_json())
+        return size, (time.perf_counter() - start) * 1000
+
+    print(f"downsample ({bars:,} minute bars, {len(keep):,} anomalies and event days)")
+    full, full_ms = payload(go.Bar, np.arange(bars))
+    print(f"  every bar (go.Bar):      {bars:9,} points {full / 1e6:7.1f} MB, built in {full_ms:7.0f} ms")
+    for label, values, method in (('volume min/max', volume, 'minmax'), ('z-score LTTB', z_scores, 'lttb')):
+        rows = downsample(x, values, max_points, keep, method)
+        pick = _best_of(lambda: downsample(x, values, max_points, keep, method), repeat=3)
+        assert np.isin(keep, rows).all()
+        size, ms = payload(go.Scattergl, rows)
+        print(f"  {label:15s} (WebGL): {len(rows):9,} points {size / 1e6:7.2f} MB, "
+              f"selected in {pick:5.1f} ms, built in {ms:5.0f} ms")
+    assert volume[downsample(x, volume, max_points, keep)].max() == volume.max()
+
+    # Zooming into one session redraws it from the full-resolution bars
+    lo, hi = window_positions(df.index, days[len(days) // 2], days[len(days) // 2] + pd.Timedelta(days=1))
+    rows = lo + downsample(x[lo:hi], volume[lo:hi], max_points)
+    print(f"  zoomed to one session:   {len(rows):9,} points of {hi - lo:,} (full detail)")
+    print("  all anomalies and event days drawn; peak volume preserved")
+
+
+def bench_pyramid(bars=2_000_000, pans=20, max_points=DEFAULT_MAX_POINTS):
+    """Panning a one-year window over minute bars: downsampling the bars vs the data pyramid"""
+    df = _minute_bars(bars)
+    days = df.index.normalize().unique()
+    x = df.index.values.astype('datetime64[ns]').view(np.int64)
+    volume = df['Volume'].to_numpy(dtype=np.float64)
+    build = _best_of(lambda: DataPyramid(df.index, volume), repeat=3)
+    pyramid = DataPyramid(df.index, volume)
+    starts = days[np.linspace(0, len(days) - 253, pans).astype(int)]
+    windows = [window_positions(df.index, start, start + pd.DateOffset(years=1)) for start in starts]
+
+    def from_bars():
+        for lo, hi in windows:
+            downsample(x[lo:hi], volume[lo:hi], max_points)
+
+    def from_pyramid():
+        for lo, hi in windows:
+            level, first, last = pyramid.select(lo, hi)
+            buckets = pyramid.levels[level]
+            downsample(buckets['time'][first:last], buckets['volume_max'][first:last], max_points)
+
+    bars_ms = _best_of(from_bars, repeat=3) / pans
+    pyramid_ms = _best_of(from_pyramid, repeat=3) / pans
+
+    print(f"pyramid ({bars:,} minute bars, {len(days) / 252:.0f} years, {pans} one-year pans)")
+    print("  levels: " + ", ".join(f"{level} {len(buckets['time']):,}" for level, buckets in pyramid.levels.items()))
+    print(f"  build once per fetch:        {build:7.1f} ms")
+    print(f"  per pan, downsample bars:    {bars_ms:7.2f} ms")
+    print(f"  per pan, pyramid level:      {pyramid_ms:7.2f} ms  ({bars_ms / pyramid_ms:,.0f}x)")
+    level, first, last = pyramid.select(0, len(df))
+    full_bars = _best_of(lambda: downsample(x, volume, max_points), repeat=3)
+    full_pyramid = _best_of(lambda: downsample(pyramid.levels[level]['time'][first:last],
+                                               pyramid.levels[level]['volume_max'][first:last], max_points), repeat=3)
+    print(f"  full range, downsample bars: {full_bars:7.2f} ms")
+    print(f"  full range, pyramid level:   {full_pyramid:7.2f} ms  ({last - first:,} {level} buckets read)")
+
+
+def bench_decode():
+    """Decode a 20-year daily payload: legacy path vs decode_time_series"""
+    # Round-trip through JSON so the dict looks exactly like a parsed response
+    series = json.loads(json.dumps(synthetic_time_series(20 * 252)))
+    end = pd.Timestamp('2024-06-28')
+    start = end - pd.Timedelta(days=180)
+
+    legacy = _best_of(lambda: _legacy_decode(series))
+    full = _best_of(lambda: decode_time_series(series))
+    ranged = _best_of(lambda: decode_time_series(series, start, end))
+
+    print(f"decode ({len(series):,} daily bars)")
+    print(f"  legacy DataFrame(...).T.astype(float): {legacy:8.2f} ms")
+    print(f"  decode_time_series (full):             {full:8.2f} ms  ({legacy / full:.1f}x)")
+    print(f"  decode_time_series (last 180 days):    {ranged:8.2f} ms  ({legacy / ranged:.1f}x)")
+
+
+def bench_collector(symbols=50, latency_ms=20, workers=8):
+    """Fetch, parse and detect against the offline stand-in server"""
+    names = [f'SYM{i:04d}' for i in range(symbols)]
+    transport = AlphaVantageTransport(calls_per_minute=600000, max_retries=0)
+    event_dates = pd.to_datetime(['2024-02-01', '2024-04-01', '2024-06-03'])
+
+    with AlphaVantageStub(latency_ms=latency_ms) as stub:
+        stub.warm(names)
+        collector = StockDataCollector('demo', use_cache=False, transport=transport, base_url=stub.url)
+
+        start = time.perf_counter()
+        frames = dict(collector.fetch_many(names, 'daily', max_workers=workers))
+        fetch_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        anomalies = 0
+        for df in frames.values():
+            detector = AnomalyDetector(df)
+            anomalies += int(detector.detect_anomalies(event_dates, 3, 3)['Is_Anomaly'].sum())
+        detect_s = time.perf_counter() - start
+
+    bars = sum(len(df) for df in frames.values())
+    print(f"collector ({symbols} symbols x {bars // symbols:,} daily bars, {latency_ms} ms latency, {workers} workers)")
+    print(f"  fetch + decode: {fetch_s * 1000:8.1f} ms  ({symbols / fetch_s:,.1f} symbols/s)")
+    print(f"  detect:         {detect_s * 1000:8.1f} ms  ({bars / detect_s:,.0f} bars/s, {anomalies} anomalies)")
+
+
+def bench_store(symbols=5000, bars=252, csv_sample=200):
+    """Cold-start analysis across a universe: CSV reload vs memory-mapped store"""
+    root = tempfile.mkdtemp(prefix='fin_sight_bench_')
+    store = MarketDataStore(os.path.join(root, 'store'))
+    csv_dir = os.path.join(root, 'csv')
+    os.makedirs(csv_dir)
+    collector = StockDataCollector('demo', use_cache=False)
+
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range(end='2024-06-28', periods=bars)
+    names = [f'SYM{i:04d}' for i in range(symbols)]
+    frames = {}
+    for i, name in enumerate(names):
+        close = 100 + np.cumsum(rng.normal(0, 1, bars))
+        frames[name] = pd.DataFrame({
+            'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+            'Volume': rng.lognormal(15, 0.5, bars).astype(np.int64),
+        }, index=index)
+        if i < csv_sample:
+            collector.save_data(frames[name], os.path.join(csv_dir, f'{name}.csv'))
+    store.append_many(frames)
+
+    event_dates = [index[-60], index[-20]]
+    start, end = index[-126], index[-1]
+
+    t0 = time.perf_counter()
+    for name in names[:csv_sample]:
+        df = pd.read_csv(os.path.join(csv_dir, f'{name}.csv'), index_col=0, parse_dates=True)
+        df = df[(df.index >= start) & (df.index <= end)]
+        AnomalyDetector(df).detect_anomalies(event_dates)
+    csv_s = (time.perf_counter() - t0) * symbols / csv_sample
+
+    t0 = time.perf_counter()
+    cold = MarketDataStore(os.path.join(root, 'store'))
+    for name in cold.symbols():
+        AnomalyDetector.from_store(cold, name, start, end).detect_anomalies(event_dates)
+    store_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    cold = MarketDataStore(os.path.join(root, 'store'))
+    for name in cold.symbols():
+        volume = cold.window(name, start, end)['Volume']
+        volume.mean(), volume.std()
+    views_s = time.perf_counter() - t0
+
+    print(f"store ({symbols:,} symbols x {bars} bars, 126-bar window)")
+    print(f"  CSV reload + detect (extrapolated): {csv_s:8.2f} s")
+    print(f"  store open + detect:                {store_s:8.2f} s  ({csv_s / store_s:.1f}x)")
+    print(f"  store open + window views only:     {views_s:8.2f} s")
+
+
+BENCHMARKS = {
+    'decode': bench_decode,
+    'collector': bench_collector,
+    'store': bench_store,
+    'detect': bench_detect,
+    'stream': bench_stream,
+    'panel': bench_panel,
+    'robust': bench_robust,
+    'calendar': bench_calendar,
+    'seasonal': bench_seasonal,
+    'theme': bench_theme,
+    'downsample': bench_downsample,
+    'pyramid': bench_pyramid,
+}
+
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
@@ -0,0 +1,200 @@
+"""
+Data Cache Module for FIN-SIGHT
+Persists fetched OHLCV bars on disk so repeat analyses only download new bars
+"""
+
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_PATH = os.path.join('.fin_sight_cache', 'market_data.sqlite')
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class MarketDataCache:
+    """SQLite-backed store of OHLCV bars keyed by symbol and interval"""
+
+    def __init__(self, path=None):
+        """
+        Open (and create if needed) the on-disk cache
+
+        Args:
+            path: SQLite file path (default: FIN_SIGHT_CACHE_PATH env var or
+                  .fin_sight_cache/market_data.sqlite)
+        """
+        self.path = path or os.getenv('FIN_SIGHT_CACHE_PATH', DEFAULT_CACHE_PATH)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS bars (
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    ts INTEGER NOT NULL,
+                    open REAL,
+                    high REAL,
+                    low REAL,
+                    close REAL,
+                    volume INTEGER,
+                    PRIMARY KEY (symbol, interval, ts)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS refreshes (
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    refreshed_at REAL NOT NULL,
+                    PRIMARY KEY (symbol, interval)
+                )
+            """)
+            # Largest outputsize downloaded per series ('compact' or 'full'),
+            # so a request for full history after a compact load backfills it
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS history (
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    outputsize TEXT NOT NULL,
+                    PRIMARY KEY (symbol, interval)
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation keeps the cache safe to
+        # share between Streamlit script threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def store(self, symbol, interval, df, outputsize=None):
+        """
+        Merge bars into the cache, replacing any bars with the same timestamp
+
+        Args:
+            symbol: Stock ticker symbol
+            interval: Series interval ('daily', 'weekly', '60min', ...)
+            df: DataFrame with DatetimeIndex and OHLCV columns
+            outputsize: Download the bars came from ('compact' or 'full'); a
+                        compact one never downgrades a recorded full history
+        """
+        if df is None or df.empty:
+            return 0
+
+        ts = df.index.values.astype('datetime64[ns]').astype(np.int64)
+        rows = zip(
+            [symbol] * len(df),
+            [interval] * len(df),
+            ts.tolist(),
+            *(df[col].astype(float).tolist() for col in OHLCV_COLUMNS[:4]),
+            df['Volume'].astype(np.int64).tolist()
+        )
+
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows
+            )
+            conn.execute(
+                'INSERT OR REPLACE INTO refreshes VALUES (?, ?, ?)',
+                (symbol, interval, time.time())
+            )
+            if outputsize == 'full':
+                conn.execute('INSERT OR REPLACE INTO history VALUES (?, ?, ?)',
+                             (symbol, interval, outputsize))
+            elif outputsize is not None:
+                conn.execute('INSERT OR IGNORE INTO history VALUES (?, ?, ?)',
+                             (symbol, interval, outputsize))
+        return len(df)
+
+    def load(self, symbol, interval, start_date=None, end_date=None):
+        """
+        Load cached bars for a symbol, optionally restricted to a date range
+
+        Args:
+            symbol: Stock ticker symbol
+            interval: Series interval
+            start_date: Inclusive lower bound (anything pd.Timestamp accepts)
+            end_date: Inclusive upper bound
+
+        Returns:
+            DataFrame sorted by date, or None when nothing is cached
+        """
+        query = 'SELECT ts, open, high, low, close, volume FROM bars WHERE symbol = ? AND interval = ?'
+        params = [symbol, interval]
+        if start_date is not None:
+            query += ' AND ts >= ?'
+            params.append(pd.Timestamp(start_date).value)
+        if end_date is not None:
+            query += ' AND ts <= ?'
+            params.append(pd.Timestamp(end_date).value)
+        query += ' ORDER BY ts'
+
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        if not rows:
+            return None
+
+        ts, open_, high, low, close, volume = zip(*rows)
+        df = pd.DataFrame({
+            'Open': np.array(open_, dtype=np.float64),
+            'High': np.array(high, dtype=np.float64),
+            'Low': np.array(low, dtype=np.float64),
+            'Close': np.array(close, dtype=np.float64),
+            'Volume': np.array(volume, dtype=np.int64),
+        }, index=pd.DatetimeIndex(np.array(ts, dtype='datetime64[ns]')))
+        return df
+
+    def latest_timestamp(self, symbol, interval):
+        """Return the timestamp of the newest cached bar, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT MAX(ts) FROM bars WHERE symbol = ? AND interval = ?',
+                (symbol, interval)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return pd.Timestamp(row[0])
+
+    def last_refreshed(self, symbol, interval):
+        """Return the UNIX time of the last successful store, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT refreshed_at FROM refreshes WHERE symbol = ? AND interval = ?',
+                (symbol, interval)
+            ).fetchone()
+        return row[0] if row else None
+
+    def loaded_outputsize(self, symbol, interval):
+        """Return the largest outputsize cached for a series ('compact'/'full'), or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT outputsize FROM history WHERE symbol = ? AND interval = ?',
+                (symbol, interval)
+            ).fetchone()
+        return row[0] if row else None
+
+    def clear(self, symbol=None, interval=None):
+        """Remove cached bars, optionally only for one symbol and/or interval"""
+        clauses, params = [], []
+        if symbol is not None:
+            clauses.append('symbol = ?')
+            params.append(symbol)
+        if interval is not None:
+            clauses.append('interval = ?')
+            params.append(interval)
+        where = (' WHERE ' + ' AND '.join(clauses)) if clauses else ''
+
+        with self._connect() as conn:
+            conn.execute('DELETE FROM bars' + where, params)
+            conn.execute('DELETE FROM refreshes' + where, params)
+            conn.execute('DELETE FROM history' + where, params)
@@ -3,23 +3,615 @@ Data Collection Module for FIN-SIGHT
 Handles fetching stock data from Alpha Vantage API
 """
 
+import numpy as np
 import pandas as pd
 import requests
+import random
+import threading
 import time
+from operator import itemgetter
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from data_cache import MarketDataCache
+from market_store import MarketDataStore
+from quota_ledger import QuotaLedger, scope_for_key
+from resampling import INTRADAY_INTERVALS, can_derive, resample_ohlcv
 
 load_dotenv()
 
+DEFAULT_BASE_URL = "https://www.alphavantage.co/query"
+
+# Alpha Vantage returns the last 100 bars for outputsize='compact'
+COMPACT_SIZE = 100
+
+# Free tier allows 5 calls per minute
+DEFAULT_CALLS_PER_MINUTE = 5
+
+# HTTP statuses worth retrying
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def _date_bound(value, date_only, upper):
+    """Format a range bound so it compares correctly with API timestamp keys"""
+    bound = pd.Timestamp(value)
+    if date_only:
+        # Daily keys are bare dates (midnight), so round the bound inwards
+        bound = bound.floor('D') if upper else bound.ceil('D')
+        return bound.strftime('%Y-%m-%d')
+    return bound.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _empty_ohlcv():
+    """OHLCV frame with no bars, typed like a decoded one"""
+    return pd.DataFrame(
+        {col: np.array([], dtype=np.int64 if col == 'Volume' else np.float64)
+         for col in OHLCV_COLUMNS},
+        index=pd.DatetimeIndex([], dtype='datetime64[ns]')
+    )
+
+
+def decode_time_series(series, start_date=None, end_date=None):
+    """
+    Decode an Alpha Vantage 'Time Series (...)' object into an OHLCV DataFrame
+    
+    Goes straight from the JSON dict to typed NumPy columns instead of
+    transposing an object-dtype frame. Timestamp keys are ISO formatted, so
+    the date range is applied by string comparison before anything is
+    parsed, and only rows inside it are converted.
+    
+    Args:
+        series: Dict mapping timestamp strings to field dicts
+        start_date: Inclusive lower bound (anything pd.Timestamp accepts)
+        end_date: Inclusive upper bound
+        
+    Returns:
+        DataFrame with a sorted DatetimeIndex, float64 prices and int64 volume
+    """
+    if not series:
+        return _empty_ohlcv()
+    
+    keys = np.array(list(series))
+    rows = list(series.values())
+    
+    # Open, high, low and close come first; volume is named explicitly
+    # because adjusted series put extra fields before it
+    fields = list(rows[0])
+    volume_field = next((f for f in fields if f.endswith('volume')), None)
+    if len(fields) < 4 or volume_field is None:
+        raise ValueError("Unexpected time series format")
+    
+    if start_date is not None or end_date is not None:
+        date_only = len(keys[0]) == 10
+        mask = np.ones(len(keys), dtype=bool)
+        if start_date is not None:
+            mask &= keys >= _date_bound(start_date, date_only, upper=False)
+        if end_date is not None:
+            mask &= keys <= _date_bound(end_date, date_only, upper=True)
+        selected = np.flatnonzero(mask)
+        if not len(selected):
+            # No bars in the range (e.g. a holiday, or nothing new yet)
+            return _empty_ohlcv()
+        keys = keys[selected]
+        rows = [rows[i] for i in selected]
+    
+    # The API lists newest first; reverse instead of sorting when possible
+    if len(keys) > 1:
+        if keys[0] > keys[-1] and np.all(keys[:-1] > keys[1:]):
+            keys = keys[::-1]
+            rows = rows[::-1]
+        elif not np.all(keys[:-1] < keys[1:]):
+            order = np.argsort(keys, kind='stable')
+            keys = keys[order]
+            rows = [rows[i] for i in order]
+    
+    getter = itemgetter(*fields[:4], volume_field)
+    values = np.array([getter(row) for row in rows], dtype=str).reshape(len(rows), 5)
+    
+    volume = values[:, 4]
+    try:
+        volume = volume.astype(np.int64)
+    except ValueError:
+        volume = volume.astype(np.float64).astype(np.int64)
+    
+    prices = values[:, :4].astype(np.float64)
+    df = pd.DataFrame({
+        'Open': prices[:, 0],
+        'High': prices[:, 1],
+        'Low': prices[:, 2],
+        'Close': prices[:, 3],
+        'Volume': volume,
+    }, index=pd.DatetimeIndex(keys.astype('datetime64[ns]')))
+    return df
+
+
+class TokenBucket:
+    """Thread-safe token bucket that paces calls to a per-minute budget"""
+    
+    def __init__(self, calls_per_minute, burst=None):
+        """
+        Args:
+            calls_per_minute: Sustained call rate
+            burst: Maximum calls allowed back to back (default: calls_per_minute)
+        """
+        self.rate = calls_per_minute / 60.0
+        self.capacity = float(burst or calls_per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def acquire(self):
+        """Block until a call may be made, then consume one token"""
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+    
+    def drain(self):
+        """Empty the bucket, e.g. after the server reports a rate limit"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = 0.0
+    
+    def usage(self):
+        """Report approximate usage in the same shape as QuotaLedger.usage()"""
+        with self.lock:
+            self._refill(time.monotonic())
+            return {
+                'used': int(self.capacity - self.tokens),
+                'limit': int(self.capacity),
+                'window_seconds': 60.0,
+                'waiting': 0,
+            }
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the API while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing upstream for a cool-down period
+    
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are refused until `reset_timeout` seconds have passed. Then one
+    trial call is let through: success closes the circuit, failure opens it
+    again.
+    """
+    
+    def __init__(self, failure_threshold=3, reset_timeout=60.0):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds to wait before a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+    
+    @property
+    def state(self):
+        """'closed', 'open' or 'half-open'"""
+        with self.lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+    
+    def allow(self):
+        """Return True if a call may be made now"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+    
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+    
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+class AlphaVantageTransport:
+    """
+    Shared HTTP layer for Alpha Vantage calls
+    
+    Keeps a pooled keep-alive session, paces calls with a limiter (a
+    per-process TokenBucket or a host-wide QuotaLedger) and retries
+    rate-limited or transient failures with jittered exponential backoff.
+    """
+    
+    def __init__(self, calls_per_minute=None, max_retries=4, backoff_base=1.0,
+                 backoff_cap=60.0, timeout=30, pool_size=10, limiter=None, breaker=None):
+        """
+        Args:
+            calls_per_minute: Plan call budget (default: ALPHA_VANTAGE_CALLS_PER_MINUTE
+                              env var or 5)
+            max_retries: Retries after the first attempt
+            backoff_base: Base delay in seconds for exponential backoff
+            backoff_cap: Upper bound for a single backoff delay in seconds
+            timeout: Per-request timeout in seconds
+            pool_size: Maximum pooled connections kept alive
+            limiter: Object with acquire()/drain()/usage() pacing calls
+                     (default: TokenBucket(calls_per_minute))
+            breaker: CircuitBreaker guarding the upstream (default: a new one)
+        """
+        if calls_per_minute is None:
+            calls_per_minute = float(os.getenv('ALPHA_VANTAGE_CALLS_PER_MINUTE',
+                                               DEFAULT_CALLS_PER_MINUTE))
+        self.calls_per_minute = calls_per_minute
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = timeout
+        self.limiter = limiter or TokenBucket(calls_per_minute)
+        self.breaker = breaker or CircuitBreaker()
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def _backoff(self, attempt, floor=0.0):
+        # Full jitter keeps concurrent retries from synchronising
+        delay = min(self.backoff_cap, self.backoff_base * (2 ** attempt))
+        return max(floor, random.uniform(0, delay))
+    
+    def get_json(self, url, params):
+        """
+        GET a URL and return the decoded JSON body
+        
+        Rate-limit notes, timeouts, connection errors and transient HTTP
+        statuses are retried. If retries run out on a rate-limit note, the
+        note payload is returned so callers can report it; network errors
+        are re-raised. Calls that still fail count towards the circuit
+        breaker, and while it is open CircuitOpenError is raised at once.
+        
+        Args:
+            url: Endpoint URL
+            params: Query parameters
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(
+                "Alpha Vantage is failing repeatedly; pausing requests for "
+                f"{self.breaker.reset_timeout:.0f} seconds."
+            )
+        try:
+            data = self._get_json_with_retries(url, params)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        if 'Note' in data:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return data
+    
+    def _get_json_with_retries(self, url, params):
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                if response.status_code in TRANSIENT_STATUS_CODES:
+                    response.raise_for_status()
+                data = response.json()
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout,
+                    requests.exceptions.HTTPError):
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            
+            if 'Note' in data and attempt < self.max_retries:
+                # The server's per-minute window is exhausted: stop other
+                # callers from spending tokens and wait at least one slot
+                self.limiter.drain()
+                time.sleep(self._backoff(attempt, floor=60.0 / self.calls_per_minute))
+                attempt += 1
+                continue
+            
+            return data
+
+
+_shared_transports = {}
+_shared_transport_lock = threading.Lock()
+
+
+def get_shared_transport(api_key=None):
+    """
+    Return the process-wide transport shared by all collectors using an API key
+    
+    Its calls are paced by a host-wide QuotaLedger scoped to a hash of the
+    key, so every server process using the same key draws from one budget
+    while different keys do not throttle each other. Set FIN_SIGHT_SHARED_QUOTA
+    to 0 to pace per process instead; plans below one call per minute are
+    always paced per process.
+    
+    Args:
+        api_key: Alpha Vantage API key (default: ALPHA_VANTAGE_API_KEY env var)
+    """
+    api_key = api_key or os.getenv('ALPHA_VANTAGE_API_KEY')
+    with _shared_transport_lock:
+        if api_key not in _shared_transports:
+            calls_per_minute = float(os.getenv('ALPHA_VANTAGE_CALLS_PER_MINUTE',
+                                               DEFAULT_CALLS_PER_MINUTE))
+            limiter = None
+            shared = os.getenv('FIN_SIGHT_SHARED_QUOTA', '1').lower() not in ('0', 'false', 'no', 'off')
+            if shared and calls_per_minute >= 1:
+                limiter = QuotaLedger(calls_per_minute, scope=scope_for_key(api_key))
+            _shared_transports[api_key] = AlphaVantageTransport(calls_per_minute, limiter=limiter)
+        return _shared_transports[api_key]
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one
+    
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for it and receive the same result (or exception).
+    The key is forgotten as soon as the call finishes, so later callers
+    start a fresh call.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+    
+    def do(self, key, fn):
+        """
+        Run fn() once per key among concurrent callers
+        
+        Args:
+            key: Hashable identity of the call
+            fn: Zero-argument callable
+        """
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.calls[key] = future
+        
+        if not leader:
+            return future.result()
+        
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.calls[key]
+    
+    def in_flight(self):
+        """Return the number of calls currently running"""
+        with self.lock:
+            return len(self.calls)
+
+
+_shared_single_flight = SingleFlight()
+
+# Series currently being refreshed in the background, across all collectors
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _refresh_in_background(key, refresh):
+    """Run refresh() on a daemon thread unless one is already running for key"""
+    with _refreshing_lock:
+        if key in _refreshing:
+            return False
+        _refreshing.add(key)
+    
+    def run():
+        try:
+            refresh()
+        except Exception:
+            # The stale frame keeps being served; the transport's circuit
+            # breaker has already recorded the failure
+            pass
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+    
+    threading.Thread(target=run, daemon=True).start()
+    return True
+
+
+class BatchFetch:
+    """
+    Iterator over a concurrent multi-symbol fetch
+    
+    Iterating yields (symbol, DataFrame) pairs in completion order, as soon
+    as each symbol arrives. Symbols that fail are not yielded; their error
+    messages collect in `failed` and the rest of the batch carries on.
+    """
+    
+    def __init__(self, collector, symbols, interval='daily', outputsize='full', max_workers=4):
+        """
+        Args:
+            collector: StockDataCollector used for each symbol
+            symbols: Iterable of ticker symbols (duplicates are fetched once)
+            interval: 'daily', 'weekly' or an intraday interval such as '60min'
+            outputsize: 'compact' or 'full' (ignored for weekly data)
+            max_workers: Upper bound on concurrent requests
+        """
+        self.collector = collector
+        self.symbols = list(dict.fromkeys(symbols))
+        self.interval = interval
+        self.outputsize = outputsize
+        self.max_workers = max_workers
+        self.failed = {}
+        self.completed = 0
+    
+    def __iter__(self):
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = {
+                executor.submit(self.collector.fetch, symbol, self.interval, self.outputsize): symbol
+                for symbol in self.symbols
+            }
+            for future in as_completed(futures):
+                symbol = futures[future]
+                self.completed += 1
+                try:
+                    df = future.result()
+                except Exception as e:
+                    self.failed[symbol] = str(e)
+                    continue
+                yield symbol, df
+        finally:
+            # Stop queued symbols if the consumer abandons the batch early
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
 class StockDataCollector:
     """Collects stock data from Alpha Vantage API"""
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, cache=None, use_cache=True, transport=None, max_age=60,
+                 base_url=None, single_flight=None, stale_while_revalidate=True):
+        """
+        Args:
+            api_key: Alpha Vantage API key (default: ALPHA_VANTAGE_API_KEY env var)
+            cache: MarketDataCache to read from and merge into
+            use_cache: Create a default on-disk cache when none is given
+            transport: AlphaVantageTransport (default: process-wide one shared by
+                       collectors using the same API key)
+            max_age: Seconds a cached series is served without re-checking the API
+            base_url: Query endpoint (default: ALPHA_VANTAGE_BASE_URL env var or the
+                      public API); point it at alpha_vantage_stub for offline runs
+            single_flight: SingleFlight used to coalesce identical downloads
+                           (default: process-wide shared one)
+            stale_while_revalidate: Serve expired cached series immediately and
+                                    refresh them on a background thread
+        """
         self.api_key = api_key or os.getenv('ALPHA_VANTAGE_API_KEY')
-        self.base_url = "https://www.alphavantage.co/query"
+        self.base_url = base_url or os.getenv('ALPHA_VANTAGE_BASE_URL', DEFAULT_BASE_URL)
+        if cache is None and use_cache:
+            cache = MarketDataCache()
+        self.cache = cache
+        self.transport = transport or get_shared_transport(self.api_key)
+        self.max_age = max_age
+        self.single_flight = single_flight or _shared_single_flight
+        self.stale_while_revalidate = stale_while_revalidate
+    
+    def _coalesced(self, function, symbol, interval, outputsize, start_date, end_date, download):
+        """
+        Run a download, sharing it with identical downloads already in flight
+        
+        Concurrent callers (e.g. several Streamlit sessions analysing the
+        same symbol) wait on one request and receive the same decoded
+        DataFrame, which they must treat as read-only.
+        """
+        key = (self.base_url, function, symbol, interval, outputsize, start_date, end_date)
+        return self.single_flight.do(key, download)
+    
+    def _fetch_incremental(self, function, symbol, interval, download, outputsize,
+                           start_date=None, end_date=None):
+        """
+        Serve a series from the cache, downloading only the bars it is missing
+        
+        The first load honours the requested outputsize. Once bars are cached
+        only the compact (last 100 bars) response is requested and merged in;
+        a full download is repeated only when the compact window no longer
+        overlaps the cached history, or once when full history is requested
+        for a series that was only loaded compact. Series refreshed less than `max_age`
+        seconds ago are served without any API call.
+        
+        Expired series are served from the cache straight away and refreshed
+        on a background thread (stale-while-revalidate). With that turned
+        off the refresh runs inline, and the cached frame is still returned
+        if it fails. The returned frame's `attrs` carry 'age_seconds' and
+        'stale' so callers can show how old the data is.
+        
+        Args:
+            function: Alpha Vantage function name, used to coalesce downloads
+            symbol: Stock ticker symbol
+            interval: Cache key for the series ('daily', '60min', ...)
+            download: Callable taking an outputsize and optional date range
+                      and returning a DataFrame
+            outputsize: Requested outputsize ('compact' or 'full')
+            start_date: Inclusive lower bound of the returned bars
+            end_date: Inclusive upper bound of the returned bars
+        """
+        def fetch(size, start=None, end=None):
+            return self._coalesced(function, symbol, interval, size, start, end,
+                                   lambda: download(size, start, end))
+        
+        if self.cache is None:
+            return fetch(outputsize, start_date, end_date)
+        
+        latest = self.cache.latest_timestamp(symbol, interval)
+        age, stale = 0.0, False
+        if latest is None or (outputsize == 'full'
+                              and self.cache.loaded_outputsize(symbol, interval) != 'full'):
+            # Nothing cached, or only the compact tail: backfill the history
+            self.cache.store(symbol, interval, fetch(outputsize), outputsize)
+        else:
+            def refresh():
+                fresh, size = fetch('compact'), 'compact'
+                if not fresh.empty and fresh.index.min() > latest:
+                    # Gap between cached history and the compact window
+                    fresh, size = fetch('full'), 'full'
+                self.cache.store(symbol, interval, fresh, size)
+            
+            refreshed = self.cache.last_refreshed(symbol, interval)
+            age = time.time() - refreshed if refreshed is not None else float('inf')
+            if age >= self.max_age:
+                stale = True
+                if self.stale_while_revalidate:
+                    _refresh_in_background((self.base_url, symbol, interval), refresh)
+                else:
+                    try:
+                        refresh()
+                        age, stale = 0.0, False
+                    except Exception:
+                        pass
+        
+        df = self.cache.load(symbol, interval, start_date, end_date)
+        if df is None:
+            df = decode_time_series({})
+        elif outputsize == 'compact':
+            df = df.tail(COMPACT_SIZE)
+        df.attrs['age_seconds'] = age
+        df.attrs['stale'] = stale
+        return df
         
-    def fetch_intraday_data(self, symbol, interval='60min', outputsize='full'):
+    def fetch_intraday_data(self, symbol, interval='60min', outputsize='full',
+                            start_date=None, end_date=None):
         """
         Fetch intraday stock data
         
@@ -27,7 +619,23 @@ class StockDataCollector:
             symbol: Stock ticker symbol (e.g., 'RELIANCE.BSE')
             interval: Time interval (1min, 5min, 15min, 30min, 60min)
             outputsize: 'compact' (100 data points) or 'full' (all data)
+            start_date: Optional inclusive start of the returned range
+            end_date: Optional inclusive end of the returned range
         """
+        if interval not in INTRADAY_INTERVALS:
+            raise ValueError(
+                f"Unsupported intraday interval '{interval}'. "
+                f"Use one of: {', '.join(INTRADAY_INTERVALS)}"
+            )
+        return self._fetch_incremental(
+            'TIME_SERIES_INTRADAY', symbol, interval,
+            lambda size, start=None, end=None: self._download_intraday(
+                symbol, interval, size, start, end),
+            outputsize, start_date, end_date
+        )
+    
+    def _download_intraday(self, symbol, interval, outputsize, start_date=None, end_date=None):
+        """Download intraday bars from the API without touching the cache"""
         params = {
             'function': 'TIME_SERIES_INTRADAY',
             'symbol': symbol,
@@ -37,8 +645,7 @@ class StockDataCollector:
         }
         
         try:
-            response = requests.get(self.base_url, params=params)
-            data = response.json()
+            data = self.transport.get_json(self.base_url, params)
             
             if 'Error Message' in data:
                 raise ValueError(f"API Error: {data['Error Message']}")
@@ -46,28 +653,33 @@ class StockDataCollector:
             if 'Note' in data:
                 raise ValueError("API rate limit reached. Please wait a moment.")
             
-            if 'Time Series (60min)' not in data:
+            series_key = f'Time Series ({interval})'
+            if series_key not in data:
                 raise ValueError(f"No data available for symbol: {symbol}")
             
-            # Convert to DataFrame
-            df = pd.DataFrame(data['Time Series (60min)']).T
-            df.index = pd.to_datetime(df.index)
-            df.columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-            df = df.astype(float)
-            
-            return df.sort_index()
+            return decode_time_series(data[series_key], start_date, end_date)
             
         except Exception as e:
             raise Exception(f"Error fetching data: {str(e)}")
     
-    def fetch_daily_data(self, symbol, outputsize='full'):
+    def fetch_daily_data(self, symbol, outputsize='full', start_date=None, end_date=None):
         """
         Fetch daily stock data
         
         Args:
             symbol: Stock ticker symbol
             outputsize: 'compact' (100 data points) or 'full' (all data)
+            start_date: Optional inclusive start of the returned range
+            end_date: Optional inclusive end of the returned range
         """
+        return self._fetch_incremental(
+            'TIME_SERIES_DAILY', symbol, 'daily',
+            lambda size, start=None, end=None: self._download_daily(symbol, size, start, end),
+            outputsize, start_date, end_date
+        )
+    
+    def _download_daily(self, symbol, outputsize, start_date=None, end_date=None):
+        """Download daily bars from the API without touching the cache"""
         params = {
             'function': 'TIME_SERIES_DAILY',
             'symbol': symbol,
@@ -76,8 +688,7 @@ class StockDataCollector:
         }
         
         try:
-            response = requests.get(self.base_url, params=params, timeout=30)
-            data = response.json()
+            data = self.transport.get_json(self.base_url, params)
             
             # Check for various error types
             if 'Error Message' in data:
@@ -121,13 +732,7 @@ class StockDataCollector:
                         f"- Use 'TCS' instead of 'TCS.BSE'"
                     )
             
-            # Convert to DataFrame
-            df = pd.DataFrame(data['Time Series (Daily)']).T
-            df.index = pd.to_datetime(df.index)
-            df.columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-            df = df.astype(float)
-            
-            return df.sort_index()
+            return decode_time_series(data['Time Series (Daily)'], start_date, end_date)
             
         except requests.exceptions.Timeout:
             raise Exception("Request timeout. Please check your internet connection and try again.")
@@ -138,8 +743,25 @@ class StockDataCollector:
         except Exception as e:
             raise Exception(f"Error fetching data: {str(e)}")
     
-    def fetch_weekly_data(self, symbol):
-        """Fetch weekly stock data"""
+    def fetch_weekly_data(self, symbol, start_date=None, end_date=None):
+        """
+        Fetch weekly stock data
+        
+        Args:
+            symbol: Stock ticker symbol
+            start_date: Optional inclusive start of the returned range
+            end_date: Optional inclusive end of the returned range
+        """
+        # The weekly endpoint ignores outputsize and always returns the full
+        # history, so every refresh simply replaces the cached bars
+        return self._fetch_incremental(
+            'TIME_SERIES_WEEKLY', symbol, 'weekly',
+            lambda size, start=None, end=None: self._download_weekly(symbol, start, end),
+            'full', start_date, end_date
+        )
+    
+    def _download_weekly(self, symbol, start_date=None, end_date=None):
+        """Download weekly bars from the API without touching the cache"""
         params = {
             'function': 'TIME_SERIES_WEEKLY',
             'symbol': symbol,
@@ -147,8 +769,7 @@ class StockDataCollector:
         }
         
         try:
-            response = requests.get(self.base_url, params=params)
-            data = response.json()
+            data = self.transport.get_json(self.base_url, params)
             
             if 'Error Message' in data:
                 raise ValueError(f"API Error: {data['Error Message']}")
@@ -156,19 +777,110 @@ class StockDataCollector:
             if 'Time Series (Weekly)' not in data:
                 raise ValueError(f"No data available for symbol: {symbol}")
             
-            # Convert to DataFrame
-            df = pd.DataFrame(data['Time Series (Weekly)']).T
-            df.index = pd.to_datetime(df.index)
-            df.columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-            df = df.astype(float)
-            
-            return df.sort_index()
+            return decode_time_series(data['Time Series (Weekly)'], start_date, end_date)
             
         except Exception as e:
             raise Exception(f"Error fetching data: {str(e)}")
     
+    def fetch(self, symbol, interval='daily', outputsize='full', start_date=None, end_date=None):
+        """
+        Fetch a series by interval name
+        
+        Args:
+            symbol: Stock ticker symbol
+            interval: 'daily', 'weekly' or an intraday interval such as '60min'
+            outputsize: 'compact' or 'full' (ignored for weekly data)
+            start_date: Optional inclusive start of the returned range
+            end_date: Optional inclusive end of the returned range
+        """
+        if interval == 'daily':
+            return self.fetch_daily_data(symbol, outputsize, start_date, end_date)
+        if interval == 'weekly':
+            return self.fetch_weekly_data(symbol, start_date, end_date)
+        return self.fetch_intraday_data(symbol, interval, outputsize, start_date, end_date)
+    
+    def fetch_bars(self, symbol, granularity, start_date=None, end_date=None, base_interval=None):
+        """
+        Fetch bars at any granularity, deriving them locally where possible
+        
+        Daily and weekly bars are built from the cached daily series. Intraday
+        bars are built from the finest cached intraday series that divides the
+        requested interval; when none is cached, `base_interval` (or the
+        requested interval) is downloaded once and later switches between
+        coarser granularities cost no API calls.
+        
+        Args:
+            symbol: Stock ticker symbol
+            granularity: One of '1min', '5min', '15min', '30min', '60min',
+                         'daily' or 'weekly'
+            start_date: Optional inclusive start of the returned range
+            end_date: Optional inclusive end of the returned range
+            base_interval: Intraday interval to download when nothing usable
+                           is cached (must divide `granularity`)
+        """
+        if granularity in ('daily', 'weekly'):
+            df = self.fetch_daily_data(symbol, start_date=start_date, end_date=end_date)
+            if granularity == 'daily':
+                return df
+            out = resample_ohlcv(df, 'weekly')
+            out.attrs.update(df.attrs)
+            return out
+        
+        source = None
+        if self.cache is not None:
+            source = next(
+                (interval for interval in INTRADAY_INTERVALS
+                 if can_derive(interval, granularity)
+                 and self.cache.latest_timestamp(symbol, interval) is not None),
+                None
+            )
+        if source is None:
+            source = base_interval if base_interval and can_derive(base_interval, granularity) else granularity
+        
+        df = self.fetch_intraday_data(symbol, source, start_date=start_date, end_date=end_date)
+        if source == granularity:
+            return df
+        out = resample_ohlcv(df, granularity)
+        out.attrs.update(df.attrs)
+        return out
+    
+    def fetch_many(self, symbols, interval='daily', outputsize='full', max_workers=4):
+        """
+        Fetch many symbols concurrently on a bounded thread pool
+        
+        Calls go through the shared transport, so the batch stays within the
+        plan's rate budget however many workers are used.
+        
+        Args:
+            symbols: Iterable of ticker symbols
+            interval: 'daily', 'weekly' or an intraday interval such as '60min'
+            outputsize: 'compact' or 'full' (ignored for weekly data)
+            max_workers: Upper bound on concurrent requests
+            
+        Returns:
+            BatchFetch yielding (symbol, DataFrame) as each symbol arrives;
+            failures are reported in its `failed` dict
+        """
+        return BatchFetch(self, symbols, interval, outputsize, max_workers)
+    
     def save_data(self, df, filename):
         """Save DataFrame to CSV"""
         df.to_csv(filename)
         return filename
+    
+    def save_to_store(self, df, symbol, interval='daily', store=None):
+        """
+        Append bars to a memory-mapped MarketDataStore
+        
+        Args:
+            df: DataFrame with DatetimeIndex and OHLCV columns
+            symbol: Stock ticker symbol
+            interval: Series interval
+            store: MarketDataStore (default: one at the default location)
+            
+        Returns:
+            Number of bars appended
+        """
+        store = store or MarketDataStore()
+        return store.append(symbol, df, interval)
 
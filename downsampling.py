@@ -0,0 +1,122 @@
+"""
+Downsampling Module for FIN-SIGHT
+Reduces long volume and z-score series to what a chart can actually show
+"""
+
+import numpy as np
+
+# Points drawn per series: about two per horizontal pixel of a wide chart
+DEFAULT_MAX_POINTS = 2000
+
+DOWNSAMPLING_METHODS = ['minmax', 'lttb']
+
+
+def minmax_indices(values, buckets):
+    """
+    Positions of the minimum and maximum of each of `buckets` equal slices
+
+    Keeping both extremes of every pixel-wide bucket draws the same envelope
+    as the full series, so volume spikes are never smoothed away. Runs in one
+    vectorized pass; NaN values are ignored.
+
+    Returns:
+        Sorted array of positions
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n <= 2 * buckets:
+        return np.arange(n)
+
+    starts = np.linspace(0, n, buckets + 1).astype(np.int64)[:-1]
+    bucket = np.repeat(np.arange(buckets), np.diff(np.append(starts, n)))
+    with np.errstate(invalid='ignore'):
+        highs = np.fmax.reduceat(values, starts)
+        lows = np.fmin.reduceat(values, starts)
+    picked = []
+    for extreme in (highs, lows):
+        hits = np.flatnonzero(values == extreme[bucket])
+        # First hit per bucket
+        picked.append(hits[np.unique(bucket[hits], return_index=True)[1]])
+    return np.union1d(*picked)
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-triangle-three-buckets selection of `threshold` points
+
+    Keeps the first and last points and, from each bucket in between, the
+    point forming the largest triangle with the previously kept point and the
+    average of the next bucket, which preserves the visual shape of the line.
+    NaN values count as 0 when choosing points.
+
+    Args:
+        x: Numeric x positions (e.g. nanoseconds), increasing
+        y: Values
+        threshold: Points to keep
+
+    Returns:
+        Sorted array of positions
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt = slice(hi, edges[i + 2]) if i + 2 < len(edges) else slice(n - 1, n)
+        avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+
+def downsample(x, y, max_points=DEFAULT_MAX_POINTS, keep=(), method='minmax'):
+    """
+    Positions of the points to draw for a series
+
+    Series no longer than max_points are returned whole. Positions in `keep`
+    (anomalies, event days) are always included, as are the first and last
+    points.
+
+    Args:
+        x: Numeric x positions (e.g. nanoseconds), increasing
+        y: Values
+        max_points: Target number of points
+        keep: Positions that must be drawn
+        method: 'minmax' (extremes of each bucket) or 'lttb'
+
+    Returns:
+        Sorted array of unique positions
+    """
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    if method == 'minmax':
+        picked = minmax_indices(y, max(max_points // 2, 1))
+    elif method == 'lttb':
+        picked = lttb_indices(x, y, max_points)
+    else:
+        raise ValueError(f"Unsupported downsampling method: {method}")
+    keep = np.asarray(keep, dtype=np.int64)
+    return np.union1d(picked, np.concatenate((keep, [0, n - 1])))
+
+
+def window_positions(index, start=None, end=None):
+    """
+    Row range [lo, hi) of a sorted DatetimeIndex between two timestamps
+
+    Args:
+        index: Sorted DatetimeIndex
+        start: Inclusive start (default: first row)
+        end: Inclusive end (default: last row)
+    """
+    lo = 0 if start is None else int(index.searchsorted(start, side='left'))
+    hi = len(index) if end is None else int(index.searchsorted(end, side='right'))
+    return lo, max(lo, hi)
@@ -0,0 +1,239 @@
+"""
+Market Data Store Module for FIN-SIGHT
+Append-only, memory-mapped columnar storage for universe-wide bar history
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialised within a process
+    fcntl = None
+
+DEFAULT_STORE_DIR = os.path.join('.fin_sight_cache', 'store')
+
+# Column name -> (file name, dtype)
+COLUMNS = {
+    'ts': ('ts.i8', np.int64),
+    'Open': ('open.f8', np.float64),
+    'High': ('high.f8', np.float64),
+    'Low': ('low.f8', np.float64),
+    'Close': ('close.f8', np.float64),
+    'Volume': ('volume.i8', np.int64),
+}
+
+INDEX_FILE = 'index.json'
+
+# Held across an append's read-modify-write of the index by every process
+LOCK_FILE = 'index.lock'
+
+# Series whose memory maps stay open; each holds one descriptor per column
+MAX_OPEN_SERIES = 128
+
+
+class MarketDataStore:
+    """
+    Columnar bar store with one flat binary file per column per series
+
+    Layout:
+        <root>/index.json                  symbol index: series -> row count
+        <root>/<SYMBOL>/<interval>/ts.i8   int64 nanosecond timestamps
+        <root>/<SYMBOL>/<interval>/*.f8    float64 open/high/low/close
+        <root>/<SYMBOL>/<interval>/volume.i8
+
+    Series only grow at the end. The row count in the index is the commit
+    point: bytes written past it (e.g. by an interrupted append) are ignored
+    on read and overwritten by the next append. Appends hold an exclusive
+    lock on index.lock and start from a fresh read of the index, so several
+    processes can append to one store. Reads go through read-only memory
+    maps, so opening a window never parses or copies data.
+    """
+
+    def __init__(self, root=None, max_open_series=MAX_OPEN_SERIES):
+        """
+        Args:
+            root: Store directory (default: FIN_SIGHT_STORE_DIR env var or
+                  .fin_sight_cache/store)
+            max_open_series: Series whose memory maps are kept open (least
+                             recently used ones are released first)
+        """
+        self.root = root or os.getenv('FIN_SIGHT_STORE_DIR', DEFAULT_STORE_DIR)
+        os.makedirs(self.root, exist_ok=True)
+        self.lock = threading.Lock()
+        self.max_open_series = max_open_series
+        self.maps = OrderedDict()
+        self.index = self._read_index()
+
+    def reload(self):
+        """Re-read the symbol index to pick up appends made by other processes"""
+        with self.lock:
+            self.index = self._read_index()
+
+    def _read_index(self):
+        path = os.path.join(self.root, INDEX_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    @contextmanager
+    def _locked_index(self):
+        """Hold the store-wide append lock with the index re-read from disk"""
+        with self.lock, open(os.path.join(self.root, LOCK_FILE), 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self.index = self._read_index()
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _write_index(self):
+        path = os.path.join(self.root, INDEX_FILE)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _key(symbol, interval):
+        return f'{symbol}/{interval}'
+
+    def _series_dir(self, symbol, interval):
+        return os.path.join(self.root, symbol.replace('/', '_'), interval)
+
+    def symbols(self, interval='daily'):
+        """Return the symbols that have a series at this interval"""
+        suffix = '/' + interval
+        return sorted(key[:-len(suffix)] for key in self.index if key.endswith(suffix))
+
+    def rows(self, symbol, interval='daily'):
+        """Return the number of stored bars for a series"""
+        return self.index.get(self._key(symbol, interval), {}).get('rows', 0)
+
+    def append(self, symbol, df, interval='daily'):
+        """
+        Append bars newer than the last stored bar
+
+        Args:
+            symbol: Stock ticker symbol
+            df: DataFrame with DatetimeIndex and OHLCV columns
+            interval: Series interval
+
+        Returns:
+            Number of bars appended
+        """
+        with self._locked_index():
+            appended = self._append(symbol, df, interval)
+            if appended:
+                self._write_index()
+            return appended
+
+    def append_many(self, frames, interval='daily'):
+        """
+        Append several symbols, committing the symbol index once at the end
+
+        Args:
+            frames: Dict or iterable of (symbol, DataFrame) pairs
+            interval: Series interval
+
+        Returns:
+            Total number of bars appended
+        """
+        items = frames.items() if isinstance(frames, dict) else frames
+        with self._locked_index():
+            appended = sum(self._append(symbol, df, interval) for symbol, df in items)
+            if appended:
+                self._write_index()
+            return appended
+
+    def _append(self, symbol, df, interval):
+        key = self._key(symbol, interval)
+        rows = self.rows(symbol, interval)
+        df = df.sort_index()
+        ts = df.index.values.astype('datetime64[ns]').view(np.int64)
+        if rows:
+            last = self._open(symbol, interval)['ts'][-1]
+            keep = ts > last
+            df, ts = df[keep], ts[keep]
+        if len(df) == 0:
+            return 0
+
+        directory = self._series_dir(symbol, interval)
+        os.makedirs(directory, exist_ok=True)
+        for column, (filename, dtype) in COLUMNS.items():
+            values = ts if column == 'ts' else df[column].to_numpy(dtype=dtype)
+            path = os.path.join(directory, filename)
+            mode = 'r+b' if os.path.exists(path) else 'wb'
+            with open(path, mode) as f:
+                # Drop any uncommitted tail before writing
+                f.seek(rows * np.dtype(dtype).itemsize)
+                f.truncate()
+                f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+        self.index[key] = {'rows': rows + len(df)}
+        self.maps.pop(key, None)
+        return len(df)
+
+    def _open(self, symbol, interval):
+        """Return (cached) read-only memory maps of a series' columns"""
+        key = self._key(symbol, interval)
+        rows = self.rows(symbol, interval)
+        cached = self.maps.get(key)
+        if cached is not None and len(cached['ts']) == rows:
+            self.maps.move_to_end(key)
+            return cached
+
+        directory = self._series_dir(symbol, interval)
+        maps = {}
+        for column, (filename, dtype) in COLUMNS.items():
+            if rows:
+                maps[column] = np.memmap(os.path.join(directory, filename), dtype=dtype,
+                                         mode='r', shape=(rows,))
+            else:
+                maps[column] = np.empty(0, dtype=dtype)
+        self.maps[key] = maps
+        while len(self.maps) > self.max_open_series:
+            # Views already handed out keep their own reference to the map
+            self.maps.popitem(last=False)
+        return maps
+
+    def window(self, symbol, start_date=None, end_date=None, interval='daily'):
+        """
+        Zero-copy views of a series restricted to a date range
+
+        Args:
+            symbol: Stock ticker symbol
+            start_date: Inclusive lower bound
+            end_date: Inclusive upper bound
+            interval: Series interval
+
+        Returns:
+            Dict of read-only NumPy views keyed by 'ts' and the OHLCV columns
+        """
+        maps = self._open(symbol, interval)
+        ts = maps['ts']
+        lo = 0 if start_date is None else np.searchsorted(ts, pd.Timestamp(start_date).value, 'left')
+        hi = len(ts) if end_date is None else np.searchsorted(ts, pd.Timestamp(end_date).value, 'right')
+        return {column: values[lo:hi] for column, values in maps.items()}
+
+    def frame(self, symbol, start_date=None, end_date=None, interval='daily'):
+        """
+        DataFrame over the memory-mapped window, without copying the data
+
+        Args:
+            symbol: Stock ticker symbol
+            start_date: Inclusive lower bound
+            end_date: Inclusive upper bound
+            interval: Series interval
+        """
+        view = self.window(symbol, start_date, end_date, interval)
+        index = pd.DatetimeIndex(view.pop('ts').view('datetime64[ns]'), copy=False)
+        return pd.DataFrame(view, index=index, copy=False)
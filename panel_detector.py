@@ -0,0 +1,243 @@
+"""
+Panel Detector Module for FIN-SIGHT
+Detects unusual trading activity across many symbols in one vectorized pass
+"""
+
+import warnings
+import numpy as np
+import pandas as pd
+from baselines import BASELINE_METHODS, MAD_SCALE, MIN_PERIODS, STD_RTOL, RollingMedian
+
+
+class PanelAnomalyDetector:
+    """
+    Anomaly detection over a dates x symbols volume matrix
+
+    Baselines, z-scores, thresholds and pre-event windows are computed for
+    every symbol at once with column-wise NumPy operations. Results match
+    running AnomalyDetector on each symbol separately; with rolling, expanding
+    or EWM baselines, missing (NaN) bars still count as panel rows.
+    """
+
+    def __init__(self, volume, dates=None, symbols=None):
+        """
+        Initialize detector with a volume panel
+
+        Args:
+            volume: Wide DataFrame (DatetimeIndex x symbols) or 2-D array of
+                    volumes; missing bars are NaN
+            dates: Row dates when volume is an array
+            symbols: Column symbols when volume is an array
+        """
+        if isinstance(volume, pd.DataFrame):
+            dates = volume.index if dates is None else dates
+            symbols = volume.columns if symbols is None else symbols
+            volume = volume.to_numpy(dtype=np.float64)
+        volume = np.asarray(volume, dtype=np.float64)
+        if volume.ndim != 2:
+            raise ValueError("Volume panel must be 2-D (dates x symbols)")
+
+        if dates is None:
+            raise ValueError("Row dates are required for an array volume panel")
+        self.dates = pd.DatetimeIndex(dates)
+        self.symbols = pd.Index(symbols if symbols is not None else range(volume.shape[1]))
+        if not self.dates.is_monotonic_increasing:
+            order = np.argsort(self.dates.values, kind='stable')
+            self.dates = self.dates[order]
+            volume = volume[order]
+
+        self.volume = volume
+        self.baseline_method = 'global'
+        self.z_score = None
+        self.avg_volume = None
+        self.std_dev_volume = None
+        self.anomaly_threshold = None
+        self.z_scores = None
+        self.is_anomaly = None
+        self.event_day = None
+
+    @classmethod
+    def from_store(cls, store, symbols=None, start_date=None, end_date=None, interval='daily'):
+        """
+        Build a panel from MarketDataStore series, aligned on their union of dates
+
+        Args:
+            store: MarketDataStore holding the symbols
+            symbols: Symbols to include (default: every symbol at this interval)
+            start_date: Inclusive start of the window
+            end_date: Inclusive end of the window
+            interval: Series interval
+        """
+        symbols = store.symbols(interval) if symbols is None else list(symbols)
+        columns = {symbol: store.frame(symbol, start_date, end_date, interval)['Volume']
+                   for symbol in symbols}
+        return cls(pd.DataFrame(columns, dtype=np.float64))
+
+    def calculate_baseline(self, z_score=3, method='global', window=20, span=20):
+        """
+        Calculate baseline statistics for every symbol
+
+        Methods follow AnomalyDetector.calculate_baseline: 'global' and
+        'median' use each symbol's whole column, the others score each bar
+        against the bars before it.
+
+        Args:
+            z_score: Number of standard deviations for threshold (default: 3)
+            method: 'global', 'expanding', 'rolling', 'ewm', 'median' or
+                    'rolling_median'
+            window: Bars in a rolling baseline
+            span: Span of an exponentially weighted baseline
+
+        Returns:
+            Dict of per-symbol arrays (dates x symbols arrays for non-global methods)
+        """
+        if method not in BASELINE_METHODS:
+            raise ValueError(f"Unsupported baseline method: {method}")
+        self.z_score = z_score
+        self.baseline_method = method
+
+        if method == 'global':
+            counts = np.sum(~np.isnan(self.volume), axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = np.nansum(self.volume, axis=0) / counts
+                std = np.sqrt(np.nansum((self.volume - mean) ** 2, axis=0) / (counts - 1))
+            std[counts < MIN_PERIODS] = np.nan
+        elif method == 'median':
+            with warnings.catch_warnings():
+                # Symbols without any bars give all-NaN columns
+                warnings.simplefilter('ignore', RuntimeWarning)
+                mean = np.nanmedian(self.volume, axis=0)
+                mad = np.nanmedian(np.abs(self.volume - mean), axis=0)
+            counts = np.sum(~np.isnan(self.volume), axis=0)
+            std = np.where((mad > 0) & (counts >= MIN_PERIODS), MAD_SCALE * mad, np.nan)
+        elif method == 'rolling_median':
+            # Each symbol's window skips its own missing bars, so one
+            # sorted-window pass per symbol
+            mean = np.empty_like(self.volume)
+            std = np.empty_like(self.volume)
+            for col in range(self.volume.shape[1]):
+                mean[:, col], std[:, col] = RollingMedian(window).extend(self.volume[:, col])
+        else:
+            # Compiled column-wise windows over the whole panel, shifted one
+            # bar so each bar is scored against the bars before it
+            frame = pd.DataFrame(self.volume)
+            if method == 'expanding':
+                mean = frame.expanding(min_periods=1).mean()
+                std = frame.expanding(min_periods=MIN_PERIODS).std()
+            elif method == 'rolling':
+                mean = frame.rolling(window, min_periods=1).mean()
+                std = frame.rolling(window, min_periods=MIN_PERIODS).std()
+            else:
+                ewm = frame.ewm(span=span, adjust=False, min_periods=1)
+                mean = ewm.mean()
+                std = frame.ewm(span=span, adjust=False, min_periods=MIN_PERIODS).std(bias=True)
+            mean = mean.shift(1).to_numpy()
+            std = std.shift(1).to_numpy()
+            # A flat stretch has no spread to score against, as in baselines
+            with np.errstate(invalid='ignore'):
+                std = np.where(std > STD_RTOL * np.abs(mean), std, np.nan)
+
+        self.avg_volume = mean
+        self.std_dev_volume = std
+        self.anomaly_threshold = mean + z_score * std
+
+        return {
+            'average_volume': self.avg_volume,
+            'std_deviation': self.std_dev_volume,
+            'anomaly_threshold': self.anomaly_threshold
+        }
+
+    def _window_mask(self, events, pre_event_window):
+        """Boolean dates x symbols masks of pre-event windows and event days"""
+        n, m = self.volume.shape
+        # Flatten the sparse calendar into (column, event date) pairs
+        calendars = [(col, pd.DatetimeIndex(dates).dropna())
+                     for col, dates in zip(self.symbols.get_indexer(list(events)), events.values())
+                     if col >= 0]
+        calendars = [(col, dates) for col, dates in calendars if len(dates)]
+        edges = np.zeros((n + 1, m), dtype=np.int32)
+        event_day = np.zeros((n, m), dtype=bool)
+        if not calendars:
+            return edges[:n] > 0, event_day
+
+        cols = np.concatenate([np.full(len(dates), col) for col, dates in calendars])
+        event_dates = pd.DatetimeIndex(np.concatenate([dates.values for _, dates in calendars]))
+
+        lo = self.dates.searchsorted(event_dates - pd.Timedelta(days=pre_event_window), side='left')
+        hi = self.dates.searchsorted(event_dates - pd.Timedelta(days=1), side='right')
+        nonempty = hi > lo
+        np.add.at(edges, (lo[nonempty], cols[nonempty]), 1)
+        np.add.at(edges, (hi[nonempty], cols[nonempty]), -1)
+
+        pos = self.dates.searchsorted(event_dates, side='left')
+        found = pos < n
+        found[found] = self.dates[pos[found]] == event_dates[found]
+        event_day[pos[found], cols[found]] = True
+
+        return np.cumsum(edges[:n], axis=0) > 0, event_day
+
+    def detect_anomalies(self, events, pre_event_window=3, z_score=3):
+        """
+        Detect anomalies in every symbol's pre-event windows
+
+        Args:
+            events: Mapping of symbol -> list of event dates; symbols without
+                    events are scored but never flagged
+            pre_event_window: Number of days before event to check
+            z_score: Number of standard deviations for threshold
+
+        Returns:
+            Boolean DataFrame (dates x symbols) of anomaly flags
+        """
+        # Calculate baseline if not already done
+        if self.anomaly_threshold is None:
+            self.calculate_baseline(z_score)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.z_scores = (self.volume - self.avg_volume) / self.std_dev_volume
+            above = self.volume > self.anomaly_threshold
+
+        in_window, self.event_day = self._window_mask(events, pre_event_window)
+        self.is_anomaly = in_window & above
+        return pd.DataFrame(self.is_anomaly, index=self.dates, columns=self.symbols)
+
+    def get_anomaly_summary(self):
+        """
+        Get all detected anomalies in long form
+
+        Returns:
+            DataFrame with one row per anomaly: symbol, date, volume, z_score,
+            anomaly_score and percentage_above_avg
+        """
+        rows, cols = np.nonzero(self.is_anomaly)
+        avg = self.avg_volume[cols] if np.ndim(self.avg_volume) == 1 else self.avg_volume[rows, cols]
+        volume = self.volume[rows, cols]
+        z = self.z_scores[rows, cols]
+        return pd.DataFrame({
+            'symbol': self.symbols[cols],
+            'date': self.dates[rows],
+            'volume': volume,
+            'z_score': z,
+            'anomaly_score': z,
+            'percentage_above_avg': ((volume - avg) / avg) * 100,
+        })
+
+    def get_statistics(self):
+        """Get per-symbol statistics as a DataFrame indexed by symbol"""
+        with warnings.catch_warnings():
+            # Symbols without any bars give all-NaN columns
+            warnings.simplefilter('ignore', RuntimeWarning)
+            stats = {
+                'total_days': np.sum(~np.isnan(self.volume), axis=0),
+                'min_volume': np.nanmin(self.volume, axis=0),
+                'max_volume': np.nanmax(self.volume, axis=0),
+                'median_volume': np.nanmedian(self.volume, axis=0),
+            }
+        if self.baseline_method in ('global', 'median') and self.avg_volume is not None:
+            stats['average_volume'] = self.avg_volume
+            stats['std_deviation'] = self.std_dev_volume
+            stats['anomaly_threshold'] = self.anomaly_threshold
+        if self.is_anomaly is not None:
+            stats['anomaly_count'] = self.is_anomaly.sum(axis=0)
+            stats['event_day_count'] = self.event_day.sum(axis=0)
+        return pd.DataFrame(stats, index=self.symbols)
@@ -0,0 +1,130 @@
+"""
+Pyramid Module for FIN-SIGHT
+Multi-resolution aggregates of a bar series for zoomable charts
+"""
+
+import copy
+import numpy as np
+
+# Levels finest first
+PYRAMID_LEVELS = ['raw', 'hourly', 'daily', 'weekly', 'monthly']
+
+# Level each one is aggregated from (weeks do not nest in months)
+LEVEL_SOURCES = {'hourly': 'raw', 'daily': 'hourly', 'weekly': 'daily', 'monthly': 'daily'}
+
+# A chart reads at most this many buckets of the finest level that fits
+MAX_SCAN_BUCKETS = 50_000
+
+HOUR_NS = 3_600_000_000_000
+
+
+def _bucket_times(times, level):
+    """Start of the hourly/daily/weekly/monthly bucket of each timestamp (ns)"""
+    if level == 'hourly':
+        return times // HOUR_NS * HOUR_NS
+    days = times.astype('datetime64[ns]').astype('datetime64[D]')
+    if level == 'weekly':
+        # 1970-01-01 was a Thursday; weeks start on Monday
+        day_numbers = days.view(np.int64)
+        days = (day_numbers - (day_numbers + 3) % 7).astype('datetime64[D]')
+    elif level == 'monthly':
+        days = days.astype('datetime64[M]')
+    return days.astype('datetime64[ns]').view(np.int64)
+
+
+class DataPyramid:
+    """
+    Volume aggregates of a bar series at raw, hourly, daily, weekly and
+    monthly resolution
+
+    Each level holds, per bucket, its start time and first row ('time',
+    'start'), the total and peak volume ('volume', 'volume_max') and the bar
+    count. Levels are built bottom-up, each from a finer level whose buckets
+    nest inside its own, so building costs about one pass over the bars. A chart then
+    reads the finest level with few enough buckets for the visible range
+    instead of the bars themselves. Levels coarser than the bar interval
+    simply repeat the level below (e.g. hourly over daily bars).
+
+    Build one pyramid per fetched series and treat it as read-only; with_max()
+    adds per-bucket maxima of a result column such as the z-score without
+    copying the volume levels.
+    """
+
+    def __init__(self, index, volume):
+        """
+        Args:
+            index: Sorted DatetimeIndex of the bars
+            volume: Volume per bar
+        """
+        volume = np.asarray(volume, dtype=np.float64)
+        self.levels = {'raw': {
+            'time': index.values.astype('datetime64[ns]').view(np.int64),
+            'start': np.arange(len(volume)),
+            'volume': volume,
+            'volume_max': volume,
+            'count': np.ones(len(volume), dtype=np.int64),
+        }}
+        for level in PYRAMID_LEVELS[1:]:
+            source = self.levels[LEVEL_SOURCES[level]]
+            if len(volume):
+                times = _bucket_times(source['time'], level)
+                firsts = np.flatnonzero(np.r_[True, times[1:] != times[:-1]])
+                source = {
+                    'time': times[firsts],
+                    'start': source['start'][firsts],
+                    'volume': np.add.reduceat(source['volume'], firsts),
+                    'volume_max': np.maximum.reduceat(source['volume_max'], firsts),
+                    'count': np.add.reduceat(source['count'], firsts),
+                }
+            self.levels[level] = source
+
+    def __len__(self):
+        return len(self.levels['raw']['time'])
+
+    def with_max(self, name, values):
+        """
+        Pyramid that also holds the per-bucket maximum of `values`
+
+        Args:
+            name: Column name for the maxima (e.g. 'z_max')
+            values: Value per bar; NaN values are ignored
+
+        Returns:
+            A new DataPyramid sharing this one's arrays
+        """
+        values = np.asarray(values)
+        pyramid = copy.copy(self)
+        pyramid.levels = {}
+        for level, buckets in self.levels.items():
+            buckets = dict(buckets)
+            if level == 'raw' or not len(values):
+                buckets[name] = values
+            else:
+                buckets[name] = np.fmax.reduceat(values, buckets['start'])
+            pyramid.levels[level] = buckets
+        return pyramid
+
+    def buckets(self, level, lo, hi):
+        """Bucket range [first, last) of a level covering rows [lo, hi)"""
+        starts = self.levels[level]['start']
+        if hi <= lo:
+            return 0, 0
+        return (int(np.searchsorted(starts, lo, side='right')) - 1,
+                int(np.searchsorted(starts, hi, side='left')))
+
+    def bucket_of(self, level, rows):
+        """Bucket of each row position in a level"""
+        return np.searchsorted(self.levels[level]['start'], rows, side='right') - 1
+
+    def select(self, lo, hi, max_buckets=MAX_SCAN_BUCKETS):
+        """
+        Finest level with at most max_buckets buckets covering rows [lo, hi)
+
+        Returns:
+            (level, first, last): the level name and its bucket range
+        """
+        for level in PYRAMID_LEVELS:
+            first, last = self.buckets(level, lo, hi)
+            if last - first <= max_buckets:
+                break
+        return level, first, last
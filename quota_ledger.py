@@ -0,0 +1,179 @@
+"""
+Quota Ledger Module for FIN-SIGHT
+Coordinates the Alpha Vantage call budget across processes on one host
+"""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+
+DEFAULT_LEDGER_PATH = os.path.join(tempfile.gettempdir(), 'fin_sight_quota.sqlite')
+
+
+def scope_for_key(api_key, prefix='alpha_vantage'):
+    """
+    Ledger scope of an API key, so each key on a host has its own budget
+
+    Args:
+        api_key: API key whose calls are counted (None for an anonymous budget)
+        prefix: Name of the service
+
+    Returns:
+        Scope string holding a short hash of the key, never the key itself
+    """
+    digest = hashlib.sha256((api_key or '').encode()).hexdigest()[:16]
+    return f"{prefix}:{digest}"
+
+
+class QuotaLedger:
+    """
+    SQLite-backed sliding-window call ledger shared by every process on a host
+
+    Each call made against the shared API key is recorded with its time.
+    Callers take a ticket and are served strictly in ticket order, so a
+    worker that has been waiting longest calls next regardless of which
+    process it lives in. Tickets of crashed callers expire on their own.
+    """
+
+    def __init__(self, calls_per_minute, path=None, scope='alpha_vantage', window=60.0,
+                 poll_interval=0.05, stale_after=30.0):
+        """
+        Args:
+            calls_per_minute: Calls allowed per window for the shared key (at least 1)
+            path: Ledger file (default: FIN_SIGHT_QUOTA_LEDGER env var or a file
+                  in the system temp directory)
+            scope: Name of the budget, so several keys can share one ledger file
+                   (see scope_for_key)
+            window: Length of the sliding window in seconds
+            poll_interval: Longest sleep between checks while queued
+            stale_after: Seconds after which a silent ticket is considered dead
+        """
+        self.limit = int(calls_per_minute)
+        if self.limit < 1:
+            raise ValueError(f"QuotaLedger needs at least 1 call per window, got {calls_per_minute}")
+        self.path = path or os.getenv('FIN_SIGHT_QUOTA_LEDGER', DEFAULT_LEDGER_PATH)
+        self.scope = scope
+        self.window = window
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+        finally:
+            conn.close()
+
+        with self._connect(immediate=True) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS calls (
+                    scope TEXT NOT NULL,
+                    called_at REAL NOT NULL
+                )
+            """)
+            conn.execute('CREATE INDEX IF NOT EXISTS calls_scope ON calls (scope, called_at)')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tickets (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    scope TEXT NOT NULL,
+                    pid INTEGER NOT NULL,
+                    heartbeat REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS blocks (
+                    scope TEXT PRIMARY KEY,
+                    blocked_until REAL NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self, immediate=False):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+
+    def _expire(self, conn, now):
+        conn.execute('DELETE FROM calls WHERE scope = ? AND called_at <= ?',
+                     (self.scope, now - self.window))
+        conn.execute('DELETE FROM tickets WHERE scope = ? AND heartbeat < ?',
+                     (self.scope, now - self.stale_after))
+
+    def acquire(self):
+        """Block until this caller's turn comes and the window has room, then record a call"""
+        with self._connect(immediate=True) as conn:
+            ticket = conn.execute(
+                'INSERT INTO tickets (scope, pid, heartbeat) VALUES (?, ?, ?)',
+                (self.scope, os.getpid(), time.time())
+            ).lastrowid
+
+        try:
+            while True:
+                with self._connect(immediate=True) as conn:
+                    now = time.time()
+                    self._expire(conn, now)
+                    conn.execute('UPDATE tickets SET heartbeat = ? WHERE id = ?', (now, ticket))
+
+                    head = conn.execute('SELECT MIN(id) FROM tickets WHERE scope = ?',
+                                        (self.scope,)).fetchone()[0]
+                    used, oldest = conn.execute(
+                        'SELECT COUNT(*), MIN(called_at) FROM calls WHERE scope = ?', (self.scope,)
+                    ).fetchone()
+                    row = conn.execute('SELECT blocked_until FROM blocks WHERE scope = ?',
+                                       (self.scope,)).fetchone()
+                    blocked_until = row[0] if row else 0.0
+
+                    if head == ticket and used < self.limit and now >= blocked_until:
+                        conn.execute('INSERT INTO calls VALUES (?, ?)', (self.scope, now))
+                        conn.execute('DELETE FROM tickets WHERE id = ?', (ticket,))
+                        ticket = None
+                        return
+
+                    wait = self.poll_interval
+                    if head == ticket:
+                        if used >= self.limit:
+                            wait = oldest + self.window - now
+                        wait = max(wait, blocked_until - now)
+                # Wake up at least every second to keep the ticket's heartbeat fresh
+                time.sleep(min(max(wait, 0.001), 1.0))
+        finally:
+            if ticket is not None:
+                with self._connect(immediate=True) as conn:
+                    conn.execute('DELETE FROM tickets WHERE id = ?', (ticket,))
+
+    def drain(self):
+        """Hold every caller back for one call slot, e.g. after a rate-limit note"""
+        with self._connect(immediate=True) as conn:
+            conn.execute('INSERT OR REPLACE INTO blocks VALUES (?, ?)',
+                         (self.scope, time.time() + self.window / self.limit))
+
+    def usage(self):
+        """
+        Report current quota usage
+
+        Returns:
+            Dict with calls used in the current window, the limit, the window
+            length in seconds and the number of queued callers
+        """
+        with self._connect() as conn:
+            now = time.time()
+            used = conn.execute('SELECT COUNT(*) FROM calls WHERE scope = ? AND called_at > ?',
+                                (self.scope, now - self.window)).fetchone()[0]
+            waiting = conn.execute('SELECT COUNT(*) FROM tickets WHERE scope = ? AND heartbeat >= ?',
+                                   (self.scope, now - self.stale_after)).fetchone()[0]
+        return {
+            'used': used,
+            'limit': self.limit,
+            'window_seconds': self.window,
+            'waiting': waiting,
+        }
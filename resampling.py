@@ -0,0 +1,78 @@
+"""
+Resampling Module for FIN-SIGHT
+Derives coarser OHLCV bars locally from a finer cached series
+"""
+
+import pandas as pd
+
+# Intraday intervals offered by Alpha Vantage, finest first
+INTRADAY_INTERVALS = ['1min', '5min', '15min', '30min', '60min']
+
+# Granularities the engine can produce, finest first
+GRANULARITIES = INTRADAY_INTERVALS + ['daily', 'weekly']
+
+# Bar length in minutes for intraday granularities
+INTERVAL_MINUTES = {'1min': 1, '5min': 5, '15min': 15, '30min': 30, '60min': 60}
+
+OHLCV_AGGREGATION = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Volume': 'sum',
+}
+
+
+def can_derive(source, target):
+    """
+    Check whether bars of one granularity can be built from another
+
+    Args:
+        source: Granularity of the available series
+        target: Granularity wanted
+    """
+    if source == target:
+        return True
+    if source in INTERVAL_MINUTES and target in INTERVAL_MINUTES:
+        return INTERVAL_MINUTES[target] % INTERVAL_MINUTES[source] == 0
+    return GRANULARITIES.index(source) < GRANULARITIES.index(target)
+
+
+def resample_ohlcv(df, target):
+    """
+    Aggregate OHLCV bars to a coarser granularity
+
+    Intraday bars are labelled by their start time, as Alpha Vantage does.
+    Daily bars are labelled by date and weekly bars by the last trading day
+    of the week, matching the TIME_SERIES_DAILY/WEEKLY endpoints.
+
+    Args:
+        df: DataFrame with sorted DatetimeIndex and OHLCV columns
+        target: One of GRANULARITIES
+
+    Returns:
+        Resampled DataFrame with empty periods dropped
+    """
+    if target not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {target}")
+    if df.empty:
+        return df
+
+    columns = [col for col in OHLCV_AGGREGATION if col in df.columns]
+    aggregation = {col: OHLCV_AGGREGATION[col] for col in columns}
+
+    if target in INTERVAL_MINUTES:
+        out = df[columns].resample(target).agg(aggregation)
+        return out[df['Volume'].resample(target).count() > 0]
+
+    if target == 'daily':
+        out = df[columns].resample('D').agg(aggregation)
+        return out[df['Volume'].resample('D').count() > 0]
+
+    # Weekly: group Monday-Friday, label with the last timestamp in the week
+    grouper = pd.Grouper(freq='W-FRI')
+    grouped = df[columns].groupby(grouper)
+    out = grouped.agg(aggregation)
+    last_seen = df.index.to_series().groupby(grouper).max()
+    out.index = pd.DatetimeIndex(last_seen.reindex(out.index).values)
+    return out[out.index.notna()]
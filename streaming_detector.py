@@ -0,0 +1,234 @@
+"""
+Streaming Detector Module for FIN-SIGHT
+Flags unusual volume bar by bar for live intraday surveillance
+"""
+
+from bisect import bisect_left, insort
+import numpy as np
+import pandas as pd
+from baselines import make_moments
+
+DAY_NS = 86_400_000_000_000
+
+# Recent bars kept for scoring events that are added after their bars arrived
+DEFAULT_BUFFER_SIZE = 8192
+
+
+def _to_ns(timestamp):
+    """Nanoseconds since the epoch for an int, datetime-like or string"""
+    if isinstance(timestamp, (int, np.integer)):
+        return int(timestamp)
+    return pd.Timestamp(timestamp).value
+
+
+class StreamingAnomalyDetector:
+    """
+    Online counterpart of AnomalyDetector with a push API
+
+    Bars are scored against a running baseline of the bars before them, so
+    memory stays bounded: the running moments plus a ring buffer of the most
+    recent bars. A bar is an anomaly when its volume exceeds the baseline by
+    `z_score` standard deviations inside a pre-event window
+    [event - pre_event_window days, event - 1 day], as in AnomalyDetector.
+    Anomalies are returned from push() (and passed to `on_anomaly`) as soon
+    as the bar arrives.
+    """
+
+    def __init__(self, event_dates=(), pre_event_window=3, z_score=3, method='expanding',
+                 window=20, span=20, min_periods=20, buffer_size=DEFAULT_BUFFER_SIZE,
+                 on_anomaly=None):
+        """
+        Args:
+            event_dates: Known upcoming event dates (more can be added later)
+            pre_event_window: Number of days before an event to check
+            z_score: Number of standard deviations for threshold
+            method: Baseline method: 'expanding', 'rolling', 'ewm' or 'rolling_median'
+            window: Bars in a rolling baseline
+            span: Span of an exponentially weighted baseline
+            min_periods: Bars seen before anything is flagged
+            buffer_size: Recent bars kept for events added after the fact
+            on_anomaly: Optional callback invoked with each anomaly dict
+        """
+        self.pre_event_window = pre_event_window
+        self.z_score = z_score
+        self.min_periods = min_periods
+        self.on_anomaly = on_anomaly
+        self.moments = make_moments(method, window, span)
+        self.events = []
+        self.last_ts = None
+        self.bar_count = 0
+
+        # Ring buffer of recent bars with the baseline each was scored against
+        self.capacity = int(buffer_size)
+        self.ts = np.zeros(self.capacity, dtype=np.int64)
+        self.volume = np.zeros(self.capacity)
+        self.mean = np.full(self.capacity, np.nan)
+        self.std = np.full(self.capacity, np.nan)
+        self.flagged = np.zeros(self.capacity, dtype=bool)
+        self.head = 0
+        self.size = 0
+
+        for event_date in event_dates:
+            insort(self.events, _to_ns(event_date))
+
+    @property
+    def window_ns(self):
+        return self.pre_event_window * DAY_NS
+
+    def add_event(self, event_date):
+        """
+        Add an event date, scoring buffered bars that fall in its window
+
+        Args:
+            event_date: Date of the event
+
+        Returns:
+            List of anomaly dicts found among the buffered bars
+        """
+        event = _to_ns(event_date)
+        insort(self.events, event)
+
+        ts = self.ts[:self.size]
+        mean = self.mean[:self.size]
+        std = self.std[:self.size]
+        # Ordinal of each buffered bar in the stream; the newest sits before head
+        seen = self.bar_count - (self.head - 1 - np.arange(self.size)) % self.capacity
+        with np.errstate(invalid='ignore'):
+            hits = ((ts >= event - self.window_ns) & (ts <= event - DAY_NS)
+                    & (self.volume[:self.size] > mean + self.z_score * std)
+                    & (seen > self.min_periods)
+                    & ~self.flagged[:self.size])
+        positions = np.flatnonzero(hits)
+        positions = positions[np.argsort(ts[positions], kind='stable')]
+        self.flagged[positions] = True
+        return [self._emit(int(ts[i]), float(self.volume[i]), mean[i], std[i], event)
+                for i in positions]
+
+    def push(self, bar):
+        """
+        Feed one bar or a micro-batch of bars
+
+        Bars must arrive in time order; bars not newer than the last one seen
+        are ignored.
+
+        Args:
+            bar: (timestamp, volume) pair, or a DataFrame with a DatetimeIndex
+                 and Volume column for a micro-batch
+
+        Returns:
+            List of anomaly dicts raised by these bars
+        """
+        if isinstance(bar, pd.DataFrame):
+            return self._push_batch(bar)
+
+        timestamp, volume = bar
+        ts = _to_ns(timestamp)
+        if self.last_ts is not None and ts <= self.last_ts:
+            return []
+        self.last_ts = ts
+        volume = float(volume)
+        mean, std = self.moments.update(volume)
+        self.bar_count += 1
+
+        i = self.head
+        self.ts[i] = ts
+        self.volume[i] = volume
+        self.mean[i] = mean
+        self.std[i] = std
+        self.flagged[i] = False
+        self.head = (i + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+        # NaN baselines compare False, so bars without one are never flagged
+        if not volume > mean + self.z_score * std or self.bar_count <= self.min_periods:
+            return []
+        event = self._covering_event(ts)
+        if event is None:
+            return []
+        self.flagged[i] = True
+        return [self._emit(ts, volume, mean, std, event)]
+
+    def _push_batch(self, bars):
+        if not bars.index.is_monotonic_increasing:
+            bars = bars.sort_index()
+        ts = bars.index.values.astype('datetime64[ns]').view(np.int64)
+        volume = bars['Volume'].to_numpy(dtype=np.float64)
+        if self.last_ts is not None:
+            newer = ts > self.last_ts
+            ts, volume = ts[newer], volume[newer]
+        if len(ts):
+            # Keep the first bar of any run of equal timestamps
+            keep = np.concatenate(([True], ts[1:] > ts[:-1]))
+            ts, volume = ts[keep], volume[keep]
+        if len(ts) == 0:
+            return []
+
+        self.last_ts = int(ts[-1])
+        # Events whose windows have passed can never match again
+        del self.events[:bisect_left(self.events, ts[0] + DAY_NS)]
+        mean, std = self.moments.extend(volume)
+        seen = self.bar_count + np.arange(1, len(ts) + 1)
+        self.bar_count += len(ts)
+
+        with np.errstate(invalid='ignore'):
+            candidates = (volume > mean + self.z_score * std) & (seen > self.min_periods)
+        flagged = np.zeros(len(ts), dtype=bool)
+        covering = np.zeros(len(ts), dtype=np.int64)
+        if self.events and candidates.any():
+            events = np.asarray(self.events, dtype=np.int64)
+            nearest = np.searchsorted(events, ts + DAY_NS, side='left')
+            in_range = nearest < len(events)
+            covering[in_range] = events[nearest[in_range]]
+            flagged = candidates & in_range & (covering <= ts + self.window_ns)
+
+        # Write the newest bars into the ring buffer
+        tail = slice(max(len(ts) - self.capacity, 0), None)
+        slots = (self.head + np.arange(len(ts))[tail]) % self.capacity
+        self.ts[slots] = ts[tail]
+        self.volume[slots] = volume[tail]
+        self.mean[slots] = mean[tail]
+        self.std[slots] = std[tail]
+        self.flagged[slots] = flagged[tail]
+        self.head = (self.head + len(ts)) % self.capacity
+        self.size = min(self.size + len(ts), self.capacity)
+
+        return [self._emit(int(ts[i]), float(volume[i]), mean[i], std[i], int(covering[i]))
+                for i in np.flatnonzero(flagged)]
+
+    def _covering_event(self, ts):
+        """Earliest event whose pre-event window contains ts, or None"""
+        events = self.events
+        i = bisect_left(events, ts + DAY_NS)
+        if i >= 64:
+            # Events whose windows have passed can never match again
+            del events[:i]
+            i = 0
+        if i < len(events) and events[i] <= ts + self.window_ns:
+            return events[i]
+        return None
+
+    def _emit(self, ts, volume, mean, std, event):
+        z = (volume - mean) / std
+        anomaly = {
+            'date': pd.Timestamp(ts),
+            'volume': volume,
+            'z_score': z,
+            'anomaly_score': z,
+            'percentage_above_avg': ((volume - mean) / mean) * 100,
+            'event_date': pd.Timestamp(event),
+        }
+        if self.on_anomaly is not None:
+            self.on_anomaly(anomaly)
+        return anomaly
+
+    def get_statistics(self):
+        """Get the current state of the stream"""
+        return {
+            'bars_seen': self.bar_count,
+            'average_volume': self.moments.mean,
+            'std_deviation': self.moments.std,
+            'anomaly_threshold': self.moments.mean + self.z_score * self.moments.std,
+            'buffered_bars': self.size,
+            'pending_events': len(self.events),
+        }
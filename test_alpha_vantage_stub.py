@@ -0,0 +1,40 @@
+"""
+Tests for the FIN-SIGHT Alpha Vantage stand-in
+Run with: python -m pytest -q
+"""
+
+from alpha_vantage_stub import AlphaVantageStub, record_responses
+from data_collector import AlphaVantageTransport, StockDataCollector
+
+
+def _collector(stub):
+    return StockDataCollector('demo', use_cache=False, base_url=stub.url,
+                              transport=AlphaVantageTransport(calls_per_minute=6000, max_retries=0))
+
+
+def test_weekly_recording_replays(tmp_path):
+    # Record from one synthetic source, replay through a stub whose own
+    # synthetic data differs, so only a matched recording can agree
+    with AlphaVantageStub(seed=1) as live:
+        collector = _collector(live)
+        written = record_responses(collector, ['AAA'], functions=('TIME_SERIES_WEEKLY',),
+                                   record_dir=str(tmp_path))
+        recorded = collector._download_weekly('AAA')
+    assert [p.rsplit('/', 1)[-1] for p in written] == ['TIME_SERIES_WEEKLY_AAA.json']
+
+    with AlphaVantageStub(seed=2, record_dir=str(tmp_path)) as replay:
+        replayed = _collector(replay)._download_weekly('AAA')
+    with AlphaVantageStub(seed=2) as synthetic:
+        other = _collector(synthetic)._download_weekly('AAA')
+
+    assert replayed.equals(recorded)
+    assert not other.equals(recorded)
+
+
+def test_daily_recording_keyed_by_outputsize(tmp_path):
+    with AlphaVantageStub(seed=1) as live:
+        collector = _collector(live)
+        record_responses(collector, ['AAA'], record_dir=str(tmp_path), outputsize='compact')
+        recorded = collector._download_daily('AAA', 'compact')
+    with AlphaVantageStub(seed=2, record_dir=str(tmp_path)) as replay:
+        assert _collector(replay)._download_daily('AAA', 'compact').equals(recorded)
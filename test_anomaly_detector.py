@@ -0,0 +1,82 @@
+"""
+Tests for the FIN-SIGHT anomaly detector
+Run with: python -m pytest -q
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from anomaly_detector import AnomalyDetector
+from baselines import BASELINE_METHODS
+from trading_calendar import get_calendar
+
+
+def _daily_frame(volume, start='2024-01-01'):
+    index = pd.bdate_range(start, periods=len(volume))
+    return pd.DataFrame({'Open': 10.0, 'High': 11.0, 'Low': 9.5, 'Close': 10.5,
+                         'Volume': np.asarray(volume, dtype=np.int64)}, index=index)
+
+
+def test_empty_event_type():
+    volume = np.full(60, 1000)
+    volume[::3] += 50
+    volume[40] = 1_000_000
+    df = _daily_frame(volume)
+    events = {df.index[41]: '', df.index[20]: 'earnings'}
+
+    result = AnomalyDetector(df).detect_anomalies(events, pre_event_window=3)
+
+    assert list(result.event_types.categories) == ['', 'earnings']
+    assert len(result.anomalies) == 1
+
+
+def _volume_frame(bars=400, seed=0):
+    rng = np.random.default_rng(seed)
+    volume = rng.lognormal(12, 0.4, bars)
+    volume[rng.random(bars) < 0.03] *= 8
+    return _daily_frame(volume.round(), start='2023-01-02')
+
+
+def _events(df, count=25, seed=1):
+    rng = np.random.default_rng(seed)
+    return pd.DatetimeIndex(np.sort(rng.choice(df.index.values[10:], count, replace=False)))
+
+
+@pytest.mark.parametrize('method', BASELINE_METHODS)
+def test_append_matches_full_recompute(method):
+    df = _volume_frame()
+    events = _events(df)
+
+    appended = AnomalyDetector(df.iloc[:250])
+    appended.calculate_baseline(3, method, window=20, span=10)
+    assert appended.append(df.iloc[200:330]) == 80
+    assert appended.append(df.iloc[330:]) == 70
+    full = AnomalyDetector(df)
+    full.calculate_baseline(3, method, window=20, span=10)
+
+    incremental, recomputed = appended.detect_anomalies(events), full.detect_anomalies(events)
+    np.testing.assert_allclose(incremental.z_scores, recomputed.z_scores, rtol=1e-5)
+    assert np.array_equal(incremental.anomalies, recomputed.anomalies)
+    np.testing.assert_allclose(appended.anomaly_threshold, full.anomaly_threshold, rtol=1e-9)
+
+
+@pytest.mark.parametrize('calendar', [None, get_calendar('NYSE')])
+@pytest.mark.parametrize('method', ['global', 'rolling'])
+def test_sweep_matches_detect_anomalies(calendar, method):
+    df = _volume_frame(seed=2)
+    events = _events(df, seed=3)
+    z_scores, windows = (2.0, 2.5, 3.0), (1, 3, 5)
+
+    detector = AnomalyDetector(df, calendar=calendar)
+    detector.calculate_baseline(z_scores[0], method)
+    sweep = detector.sweep(events, z_scores, windows).set_index(['z_score', 'pre_event_window'])
+
+    for z in z_scores:
+        for window in windows:
+            single = AnomalyDetector(df, calendar=calendar)
+            single.calculate_baseline(z, method)
+            result = single.detect_anomalies(events, pre_event_window=window)
+            row = sweep.loc[(z, window)]
+            assert row['anomaly_count'] == len(result.anomalies)
+            assert row['anomaly_dates'].equals(df.index[result.anomalies])
+    assert sweep['anomaly_count'].sum() > 0
@@ -0,0 +1,95 @@
+"""
+Tests for the FIN-SIGHT data collector
+Run with: python -m pytest -q
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import data_collector
+from data_cache import MarketDataCache
+from data_collector import OHLCV_COLUMNS, StockDataCollector, decode_time_series
+from quota_ledger import QuotaLedger
+
+
+def _bar(volume):
+    return {'1. open': '10.0', '2. high': '11.0', '3. low': '9.5',
+            '4. close': '10.5', '5. volume': str(volume)}
+
+
+DAILY = {
+    '2024-01-05': _bar(300),
+    '2024-01-04': _bar(200),
+    '2024-01-03': _bar(100),
+}
+
+
+def _assert_typed_empty(df):
+    assert df.empty
+    assert list(df.columns) == OHLCV_COLUMNS
+    assert isinstance(df.index, pd.DatetimeIndex)
+    assert df['Volume'].dtype == np.int64
+    assert all(df[col].dtype == np.float64 for col in OHLCV_COLUMNS[:4])
+
+
+def test_decode_sorts_and_types():
+    df = decode_time_series(DAILY)
+    assert list(df.index) == list(pd.to_datetime(['2024-01-03', '2024-01-04', '2024-01-05']))
+    assert df['Volume'].tolist() == [100, 200, 300]
+    assert df['Volume'].dtype == np.int64
+
+
+def test_decode_date_range():
+    df = decode_time_series(DAILY, start_date='2024-01-04', end_date='2024-01-04')
+    assert df['Volume'].tolist() == [200]
+
+
+def test_decode_empty_range():
+    # A range with no trading days, or an incremental refresh with nothing new
+    _assert_typed_empty(decode_time_series(DAILY, start_date='2024-01-06'))
+    _assert_typed_empty(decode_time_series(DAILY, start_date='2023-12-30', end_date='2024-01-01'))
+
+
+def test_decode_empty_series():
+    _assert_typed_empty(decode_time_series({}))
+
+
+def test_full_request_backfills_compact_history(tmp_path):
+    cache = MarketDataCache(str(tmp_path / 'bars.sqlite'))
+    collector = StockDataCollector('demo', cache=cache, max_age=3600)
+    full = decode_time_series(DAILY)
+    downloads = []
+
+    def download(size, start=None, end=None):
+        downloads.append(size)
+        return full.tail(1) if size == 'compact' else full
+
+    assert len(collector._fetch_incremental('TEST', 'AAA', 'daily', download, 'compact')) == 1
+    assert len(collector._fetch_incremental('TEST', 'AAA', 'daily', download, 'full')) == 3
+    # Full history is cached now; asking again downloads nothing
+    assert len(collector._fetch_incremental('TEST', 'AAA', 'daily', download, 'full')) == 3
+    assert downloads == ['compact', 'full']
+
+
+def test_shared_transport_per_api_key(tmp_path, monkeypatch):
+    monkeypatch.setenv('FIN_SIGHT_QUOTA_LEDGER', str(tmp_path / 'quota.sqlite'))
+    monkeypatch.setenv('ALPHA_VANTAGE_CALLS_PER_MINUTE', '5')
+    monkeypatch.setattr(data_collector, '_shared_transports', {})
+    first = data_collector.get_shared_transport('key-one')
+    assert data_collector.get_shared_transport('key-one') is first
+    second = data_collector.get_shared_transport('key-two')
+    assert second.limiter.scope != first.limiter.scope
+    assert 'key-one' not in first.limiter.scope
+
+    first.limiter.acquire()
+    assert first.limiter.usage()['used'] == 1
+    assert second.limiter.usage()['used'] == 0
+
+
+def test_shared_quota_disabled_below_one_call(monkeypatch):
+    monkeypatch.setenv('ALPHA_VANTAGE_CALLS_PER_MINUTE', '0.5')
+    monkeypatch.setattr(data_collector, '_shared_transports', {})
+    transport = data_collector.get_shared_transport('key-one')
+    assert not isinstance(transport.limiter, QuotaLedger)
+    with pytest.raises(ValueError):
+        QuotaLedger(0.5)
@@ -0,0 +1,40 @@
+"""
+Tests for the FIN-SIGHT chart downsampling
+Run with: python -m pytest -q
+"""
+
+import numpy as np
+from downsampling import downsample, lttb_indices, minmax_indices
+
+
+def _series(n=10_000, seed=0):
+    rng = np.random.default_rng(seed)
+    y = rng.lognormal(10, 0.3, n)
+    y[[1234, 7777]] = [1e7, 1.0]
+    return np.arange(n, dtype=np.float64), y
+
+
+def test_minmax_keeps_bucket_extrema():
+    _, y = _series()
+    picked = minmax_indices(y, 100)
+    assert {1234, 7777} <= set(picked)
+    for bucket in np.array_split(np.arange(len(y)), 100):
+        assert bucket[np.argmax(y[bucket])] in picked
+        assert bucket[np.argmin(y[bucket])] in picked
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x, y = _series()
+    picked = lttb_indices(x, y, 500)
+    assert len(picked) == 500
+    assert picked[0] == 0 and picked[-1] == len(y) - 1
+    assert 1234 in picked and 7777 in picked
+    assert np.all(np.diff(picked) > 0)
+
+
+def test_downsample_keeps_endpoints_and_requested_points():
+    x, y = _series()
+    for method in ('minmax', 'lttb'):
+        picked = downsample(x, y, max_points=400, keep=[42, 4242], method=method)
+        assert {0, len(y) - 1, 42, 4242, 1234} <= set(picked)
+    assert len(downsample(x[:300], y[:300], max_points=400)) == 300
@@ -0,0 +1,60 @@
+"""
+Tests for the FIN-SIGHT market data store
+Run with: python -m pytest -q
+"""
+
+import numpy as np
+import pandas as pd
+from market_store import MarketDataStore
+
+
+def _bars(start, periods, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, periods))
+    return pd.DataFrame({
+        'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+        'Volume': rng.integers(1_000, 100_000, periods),
+    }, index=pd.bdate_range(start, periods=periods).as_unit('ns'))
+
+
+def _assert_stored(stored, expected):
+    # Stored frames are zero-copy views over memory maps; compare the values
+    pd.testing.assert_frame_equal(stored.copy(), expected, check_freq=False)
+
+
+def test_round_trip(tmp_path):
+    store = MarketDataStore(str(tmp_path))
+    df = _bars('2024-01-01', 50)
+    assert store.append('AAA', df) == 50
+
+    stored = store.frame('AAA')
+    _assert_stored(stored, df)
+    assert store.symbols() == ['AAA']
+
+    window = store.frame('AAA', df.index[10], df.index[19])
+    _assert_stored(window, df.iloc[10:20])
+
+
+def test_append_only_newer_bars(tmp_path):
+    store = MarketDataStore(str(tmp_path))
+    df = _bars('2024-01-01', 80)
+    store.append('AAA', df.iloc[:50])
+    # Overlapping bars are skipped, including out-of-order input
+    assert store.append('AAA', df.iloc[40:].iloc[::-1]) == 30
+    assert store.append('AAA', df.iloc[:60]) == 0
+
+    _assert_stored(store.frame('AAA'), df)
+    # A fresh instance reads the committed index from disk
+    assert MarketDataStore(str(tmp_path)).rows('AAA') == 80
+
+
+def test_appends_from_two_instances(tmp_path):
+    first, second = MarketDataStore(str(tmp_path)), MarketDataStore(str(tmp_path))
+    first.append('AAA', _bars('2024-01-01', 20))
+    # The second instance has a stale index but must not overwrite AAA
+    second.append_many({'BBB': _bars('2024-01-01', 30, seed=1)})
+    first.append('AAA', _bars('2024-01-01', 25))
+
+    store = MarketDataStore(str(tmp_path))
+    assert store.symbols() == ['AAA', 'BBB']
+    assert (store.rows('AAA'), store.rows('BBB')) == (25, 30)
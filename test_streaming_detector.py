@@ -0,0 +1,79 @@
+"""
+Tests for the FIN-SIGHT streaming detector
+Run with: python -m pytest -q
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from anomaly_detector import AnomalyDetector
+from streaming_detector import StreamingAnomalyDetector
+
+METHODS = ['expanding', 'rolling', 'ewm', 'rolling_median']
+
+
+@pytest.fixture(scope='module')
+def bars():
+    rng = np.random.default_rng(4)
+    days = pd.bdate_range('2024-01-02', periods=60)
+    index = pd.DatetimeIndex((days.values[:, None]
+                              + pd.to_timedelta(570 + 30 * np.arange(13), unit='min').values).ravel())
+    volume = rng.lognormal(10, 0.4, len(index))
+    volume[rng.random(len(index)) < 0.02] *= 10
+    return pd.DataFrame({'Volume': volume.round()}, index=index)
+
+
+@pytest.fixture(scope='module')
+def events(bars):
+    return bars.index.normalize().unique()[5::7]
+
+
+def _batch_dates(bars, events, method):
+    detector = AnomalyDetector(bars)
+    detector.calculate_baseline(3, method)
+    return list(bars.index[detector.detect_anomalies(events, pre_event_window=3).anomalies])
+
+
+def _dates(anomalies):
+    return sorted(anomaly['date'] for anomaly in anomalies)
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_push_matches_batch_detector(bars, events, method):
+    expected = _batch_dates(bars, events, method)
+    assert expected
+
+    single = StreamingAnomalyDetector(events, method=method, min_periods=1)
+    found = [a for bar in zip(bars.index, bars['Volume']) for a in single.push(bar)]
+    assert _dates(found) == expected
+
+    batched = StreamingAnomalyDetector(events, method=method, min_periods=1)
+    found = [a for i in range(0, len(bars), 100) for a in batched.push(bars.iloc[i:i + 100])]
+    assert _dates(found) == expected
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_late_events_match_batch_detector(bars, events, method):
+    detector = StreamingAnomalyDetector(method=method, min_periods=1)
+    assert detector.push(bars) == []
+    found = [a for event in events for a in detector.add_event(event)]
+    assert _dates(found) == _batch_dates(bars, events, method)
+
+
+def test_late_events_respect_min_periods():
+    # The spike at bar 6 is in the event's window but comes before min_periods
+    index = pd.date_range('2024-01-02 10:00', periods=30, freq='h')
+    volume = np.tile([100.0, 110.0, 90.0], 10)
+    volume[5] = volume[25] = 10_000.0
+    bars = pd.DataFrame({'Volume': volume}, index=index)
+    events = [pd.Timestamp('2024-01-04'), pd.Timestamp('2024-01-05')]
+
+    guarded = StreamingAnomalyDetector(min_periods=10)
+    guarded.push(bars)
+    found = [a for event in events for a in guarded.add_event(event)]
+    assert _dates(found) == [index[25]]
+
+    unguarded = StreamingAnomalyDetector(min_periods=1)
+    unguarded.push(bars)
+    found = [a for event in events for a in unguarded.add_event(event)]
+    assert _dates(found) == [index[5], index[25]]
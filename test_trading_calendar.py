@@ -0,0 +1,42 @@
+"""
+Tests for the FIN-SIGHT trading calendar
+Run with: python -m pytest -q
+"""
+
+import numpy as np
+import pandas as pd
+from trading_calendar import calendar_for_symbol, get_calendar
+
+
+def test_holidays_are_not_sessions():
+    nyse = get_calendar('NYSE')
+    for holiday in ['2024-01-01', '2024-03-29', '2024-07-04', '2024-11-28', '2024-12-25']:
+        assert not nyse.is_trading_day(holiday)
+    # Early-close days are full sessions for window counting
+    for half_day in ['2024-07-03', '2024-11-29', '2024-12-24']:
+        assert nyse.is_trading_day(half_day)
+    assert get_calendar('WEEKDAYS').is_trading_day('2024-07-04')
+
+
+def test_window_mask_skips_holidays():
+    nyse = get_calendar('NYSE')
+    # Intraday bars around Independence Day, including the 13:00 early close
+    bars = pd.DatetimeIndex(['2024-07-01 10:00', '2024-07-02 10:00', '2024-07-03 12:59',
+                             '2024-07-04 10:00', '2024-07-05 10:00', '2024-07-08 10:00'])
+    sessions = nyse.bar_sessions(bars)
+    assert sessions[3] == -1
+    assert sessions[4] == sessions[2] + 1
+
+    # Two sessions before Monday 8 July are 3 and 5 July; the holiday is skipped
+    mask = nyse.window_mask(sessions, pd.DatetimeIndex(['2024-07-08']), 2)
+    assert mask.tolist() == [False, False, True, False, True, False]
+    distance = nyse.sessions_to_next_event(sessions, pd.DatetimeIndex(['2024-07-08']))
+    assert distance[[2, 4]].tolist() == [2, 1]
+    assert distance[3] == np.iinfo(np.int64).max
+
+
+def test_calendar_for_symbol():
+    assert calendar_for_symbol('AAPL') is get_calendar('NYSE')
+    assert calendar_for_symbol('RELIANCE.BSE') is get_calendar('WEEKDAYS')
+    # Dates beyond the default range widen the calendar instead of failing
+    assert calendar_for_symbol('AAPL', [pd.Timestamp('1985-06-03')]).is_trading_day('1985-06-03')
@@ -0,0 +1,174 @@
+"""
+Trading Calendar Module for FIN-SIGHT
+Precomputed exchange sessions for measuring event windows in trading days
+"""
+
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar, GoodFriday, Holiday, USLaborDay, USMemorialDay,
+    USPresidentsDay, USThanksgivingDay, MO, nearest_workday, sunday_to_monday
+)
+
+# Days covered by the precomputed session bitmap (widened per request by
+# calendar_for_symbol when dates fall outside it)
+CALENDAR_START = '1990-01-01'
+CALENDAR_END = '2040-12-31'
+
+# Alpha Vantage exchange suffixes (SYMBOL.SUFFIX) of non-US listings. No
+# holiday lists are kept for them, so every weekday counts as a session;
+# anything else (AAPL, BRK.B) trades on the NYSE calendar.
+WEEKDAY_SUFFIXES = {'BSE', 'NSE', 'LON', 'TRT', 'TRV', 'DEX', 'FRK', 'SHH', 'SHZ',
+                    'TYO', 'HKG', 'PAR', 'AMS', 'STO', 'SAO', 'ASX'}
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """Regular NYSE full-day holidays (unscheduled closures are not included)"""
+    rules = [
+        Holiday('New Year', month=1, day=1, observance=sunday_to_monday),
+        Holiday('Martin Luther King Jr. Day', month=1, day=1, offset=pd.DateOffset(weekday=MO(3)),
+                start_date='1998-01-01'),
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday('Juneteenth', month=6, day=19, start_date='2022-01-01', observance=nearest_workday),
+        Holiday('Independence Day', month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday('Christmas', month=12, day=25, observance=nearest_workday),
+    ]
+
+
+class TradingCalendar:
+    """
+    Day-by-day session bitmap for one exchange
+
+    Built once for the whole calendar range: is_session marks trading days
+    and sessions_before counts the sessions strictly before each day. Any
+    timestamp then resolves to a session number with one integer offset
+    lookup, so windows measured in trading sessions need no per-event
+    datetime comparisons.
+    """
+
+    def __init__(self, holidays=(), weekmask='1111100', start=CALENDAR_START, end=CALENDAR_END):
+        """
+        Args:
+            holidays: Dates the exchange is closed on weekdays
+            weekmask: Trading weekdays, Monday first (numpy busday format)
+            start: First day of the bitmap
+            end: Last day of the bitmap
+        """
+        self.start = np.datetime64(pd.Timestamp(start).date(), 'D')
+        days = np.arange(self.start, np.datetime64(pd.Timestamp(end).date(), 'D') + 1)
+        holidays = pd.DatetimeIndex(holidays).values.astype('datetime64[D]')
+        self.is_session = np.is_busday(days, weekmask=weekmask, holidays=holidays)
+        self.sessions_before = (np.cumsum(self.is_session) - self.is_session).astype(np.int32)
+        self.session_count = int(self.is_session.sum())
+
+    @property
+    def sessions(self):
+        """All trading session dates in the calendar range"""
+        return pd.DatetimeIndex(self.start + np.flatnonzero(self.is_session))
+
+    def _offsets(self, timestamps):
+        """Day offsets of timestamps into the bitmap"""
+        days = pd.DatetimeIndex(timestamps).values.astype('datetime64[D]')
+        offsets = (days - self.start).astype(np.int64)
+        if len(offsets) and (offsets.min() < 0 or offsets.max() >= len(self.is_session)):
+            raise ValueError("Dates fall outside the trading calendar range")
+        return offsets
+
+    def is_trading_day(self, date):
+        """Check whether the exchange trades on this date"""
+        return bool(self.is_session[self._offsets([date])[0]])
+
+    def bar_sessions(self, timestamps):
+        """Session number of each bar's day, -1 for bars on non-trading days"""
+        offsets = self._offsets(timestamps)
+        return np.where(self.is_session[offsets], self.sessions_before[offsets], -1)
+
+    def event_sessions(self, event_dates):
+        """Sessions strictly before each event day, i.e. where its pre-event window ends"""
+        return self.sessions_before[self._offsets(event_dates)]
+
+    def window_mask(self, bar_sessions, event_dates, sessions):
+        """
+        Flag bars in the trading sessions immediately before any event
+
+        Args:
+            bar_sessions: Output of bar_sessions() for the bars
+            event_dates: Event dates
+            sessions: Window length in trading sessions
+
+        Returns:
+            Boolean array aligned with bar_sessions
+        """
+        ends = self.event_sessions(event_dates)
+        starts = np.maximum(ends - sessions, 0)
+        nonempty = ends > starts
+        edges = (np.bincount(starts[nonempty], minlength=self.session_count + 1)
+                 - np.bincount(ends[nonempty], minlength=self.session_count + 1))
+        covered = np.cumsum(edges) > 0
+        return (bar_sessions >= 0) & covered[np.maximum(bar_sessions, 0)]
+
+    def sessions_to_next_event(self, bar_sessions, event_dates):
+        """
+        Trading sessions from each bar to the next event on a later day
+
+        A bar is inside an N-session pre-event window exactly when this is at
+        most N. Bars with no later event, or on non-trading days, get the
+        largest int64.
+        """
+        ends = np.unique(self.event_sessions(event_dates))
+        nxt = np.searchsorted(ends, bar_sessions + 1, side='left')
+        distance = np.full(len(bar_sessions), np.iinfo(np.int64).max)
+        found = (nxt < len(ends)) & (bar_sessions >= 0)
+        distance[found] = ends[nxt[found]] - bar_sessions[found]
+        return distance
+
+
+@lru_cache(maxsize=None)
+def get_calendar(exchange='NYSE', start=CALENDAR_START, end=CALENDAR_END):
+    """
+    Shared TradingCalendar for an exchange, built on first use
+
+    Args:
+        exchange: 'NYSE' (also used for NASDAQ) or 'WEEKDAYS' (no holidays)
+        start: First day of the calendar
+        end: Last day of the calendar
+    """
+    exchange = exchange.upper()
+    if exchange in ('NYSE', 'NASDAQ'):
+        holidays = NYSEHolidayCalendar().holidays(start, end)
+        return TradingCalendar(holidays, start=start, end=end)
+    if exchange == 'WEEKDAYS':
+        return TradingCalendar(start=start, end=end)
+    raise ValueError(f"Unsupported exchange calendar: {exchange}")
+
+
+def calendar_for_symbol(symbol, dates=()):
+    """
+    Shared TradingCalendar for a ticker's exchange, covering the given dates
+
+    The exchange comes from the symbol's suffix (see WEEKDAY_SUFFIXES). Dates
+    outside the default range widen the calendar to whole years around them
+    rather than failing.
+
+    Args:
+        symbol: Ticker symbol, e.g. 'AAPL' or 'RELIANCE.BSE'
+        dates: Dates the calendar must cover (only the earliest and latest matter)
+    """
+    suffix = symbol.rpartition('.')[2].upper() if '.' in symbol else ''
+    exchange = 'WEEKDAYS' if suffix in WEEKDAY_SUFFIXES else 'NYSE'
+    start, end = CALENDAR_START, CALENDAR_END
+    dates = pd.DatetimeIndex(dates)
+    if len(dates):
+        first, last = dates.min(), dates.max()
+        if first < pd.Timestamp(start):
+            start = f"{first.year}-01-01"
+        if last.normalize() > pd.Timestamp(end):
+            end = f"{last.year}-12-31"
+    if (start, end) == (CALENDAR_START, CALENDAR_END):
+        return get_calendar(exchange)
+    return get_calendar(exchange, start, end)